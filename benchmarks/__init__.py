@@ -0,0 +1,6 @@
+"""
+benchmarks — локальні навантажувальні тести та бенчмарки TelegramGPT_DO.
+
+Запуск із кореня проєкту, наприклад:
+    python -m benchmarks.gpt_concurrency
+"""
@@ -0,0 +1,122 @@
+"""
+fake_openai.py — локальний фейковий сервер OpenAI Chat Completions.
+
+Відповідає на POST /v1/chat/completions із заданою затримкою,
+не звертаючись до справжнього API. Підтримує stream=True (SSE):
+перший фрагмент приходить через latency, далі — по слову кожні token_delay;
+з stream_options.include_usage останній фрагмент містить кількість токенів.
+
+Зберігає отримані запити, щоб бенчмарки могли аналізувати
+їх розмір і кількість.
+"""
+
+import asyncio
+import json
+import time
+
+from http_server import HttpServer, Request, StreamResponse, json_response, text_response
+
+
+class FakeOpenAIServer:
+    """
+    Фейковий сервер Chat Completions.
+
+    latency — затримка (секунди) перед кожною відповіддю (або першим фрагментом)
+    або функція payload -> затримка (наприклад, різна для різних моделей).
+    reply — текст відповіді (або функція payload -> текст).
+    token_delay — затримка між фрагментами у потоковому режимі;
+    звичайна (не потокова) відповідь чекає latency + token_delay × кількість слів.
+    """
+
+    def __init__(self, latency: float = 0.5, reply="Фейкова відповідь.", token_delay: float = 0.0):
+        self.latency = latency
+        self.reply = reply
+        self.token_delay = token_delay
+        self.requests: list[dict] = []
+        self.server = HttpServer(self.handle)
+
+    async def start(self) -> None:
+        await self.server.start()
+
+    async def stop(self) -> None:
+        await self.server.stop()
+
+    @property
+    def base_url(self) -> str:
+        """Адреса, яку треба передати в ChatGptService(base_url=...)."""
+        return f"{self.server.url}/v1"
+
+    async def handle(self, request: Request):
+        if request.method != "POST" or request.path != "/v1/chat/completions":
+            return text_response("not found", status=404)
+
+        payload = request.json()
+        self.requests.append(payload)
+
+        text = self.reply(payload) if callable(self.reply) else self.reply
+
+        if payload.get("stream"):
+            return StreamResponse(self._stream(payload, text))
+
+        await asyncio.sleep(self._latency(payload) + self.token_delay * len(text.split()))
+
+        return json_response({
+            "id": f"chatcmpl-fake-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": self._usage(payload, text),
+        })
+
+    async def _stream(self, payload: dict, text: str):
+        """Віддає відповідь фрагментами у форматі Server-Sent Events."""
+        await asyncio.sleep(self._latency(payload))
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token_delay)
+
+            chunk = {
+                "id": f"chatcmpl-fake-{len(self.requests)}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": f"chatcmpl-fake-{len(self.requests)}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [],
+                "usage": self._usage(payload, text),
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        yield b"data: [DONE]\n\n"
+
+    @staticmethod
+    def _usage(payload: dict, text: str) -> dict:
+        """Приблизна кількість токенів (~4 символи на токен)."""
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in payload.get("messages", []))
+        return {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(text) // 4,
+            "total_tokens": (prompt_chars + len(text)) // 4,
+        }
+
+    def _latency(self, payload: dict) -> float:
+        return self.latency(payload) if callable(self.latency) else self.latency
@@ -0,0 +1,331 @@
+"""
+fake_telegram.py — локальний фейковий сервер Telegram Bot API.
+
+Відповідає на виклики методів бота (getMe, sendMessage, setWebhook…)
+правдоподібними результатами, не звертаючись до справжнього Telegram.
+Бот підключається через ApplicationBuilder().base_url(server.base_url).
+
+Зберігає всі виклики (метод + параметри), щоб бенчмарки могли
+перевіряти, що і скільки разів бот надіслав.
+
+За бажанням імітує flood control Telegram: якщо бот надсилає більше
+chat_limit повідомлень (надсилання й редагування) на секунду в один чат
+або global_limit викликів загалом (разом із видаленням), сервер
+відповідає 429 із retry_after. flood_rate додає випадкові 429
+незалежно від темпу (частка викликів надсилання).
+
+Текст і підписи з parse_mode=MarkdownV2 перевіряються за правилами
+Telegram (markdown_v2_error): неекранований службовий символ чи
+незакрита розмітка дають 400 «can't parse entities», як і справжній API.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qsl
+
+from http_server import HttpServer, Request, json_response
+
+BOT_USER = {
+    "id": 100000001,
+    "is_bot": True,
+    "first_name": "FakeBot",
+    "username": "fake_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+
+# Символи, які в MarkdownV2 поза розміткою треба екранувати
+MARKDOWN_V2_RESERVED = frozenset("_*[]()~`>#+-=|{}.!")
+
+# Маркери розмітки MarkdownV2 (довші — першими)
+_MARKDOWN_V2_ENTITIES = (("||", "spoiler"), ("__", "underline"), ("*", "bold"), ("_", "italic"), ("~", "strikethrough"))
+
+
+def markdown_v2_error(text: str) -> str | None:
+    """Помилка розбору MarkdownV2 у формулюванні Telegram або None, якщо текст коректний."""
+    stack: list[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+
+        if char == "\\":
+            if i + 1 >= n:
+                return "Can't parse entities: unexpected end of text after '\\'"
+            i += 2
+            continue
+
+        # Код: усередині екрануються лише ` і \
+        if char == "`":
+            fence = "```" if text.startswith("```", i) else "`"
+            i += len(fence)
+            while i < n and not text.startswith(fence, i):
+                i += 2 if text[i] == "\\" else 1
+            if i >= n:
+                return f"Can't find end of {'pre' if len(fence) == 3 else 'code'} entity at byte offset {i}"
+            i += len(fence)
+            continue
+
+        if char == "[":
+            stack.append("link")
+            i += 1
+            continue
+        if char == "]" and stack and stack[-1] == "link":
+            stack.pop()
+            if not text.startswith("(", i + 1):
+                return f"Can't parse entities: character ']' is reserved and must be escaped with the preceding '\\'"
+            i += 2
+            while i < n and text[i] != ")":
+                i += 2 if text[i] == "\\" else 1
+            if i >= n:
+                return "Can't find end of a URL at byte offset " + str(i)
+            i += 1
+            continue
+
+        # Цитата: > на початку рядка
+        if char == ">" and (i == 0 or text[i - 1] == "\n"):
+            i += 1
+            continue
+
+        for marker, entity in _MARKDOWN_V2_ENTITIES:
+            if text.startswith(marker, i):
+                if stack and stack[-1] == entity:
+                    stack.pop()
+                elif entity in stack:
+                    return f"Can't parse entities: can't find end of {stack[-1]} entity at byte offset {i}"
+                else:
+                    stack.append(entity)
+                i += len(marker)
+                break
+        else:
+            if char in MARKDOWN_V2_RESERVED:
+                return (f"Can't parse entities: character '{char}' is reserved "
+                        f"and must be escaped with the preceding '\\'")
+            i += 1
+
+    if stack:
+        return f"Can't parse entities: can't find end of {stack[-1]} entity at byte offset {n}"
+    return None
+
+
+def parse_params(request: Request) -> dict:
+    """Параметри виклику: JSON, multipart (завантаження файлів) або form-urlencoded (значення — JSON-рядки)."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        return request.json() or {}
+
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"content-type: {content_type}\r\n\r\n".encode() + request.body
+        )
+        params = {}
+        for part in message.iter_parts():
+            key = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                params[key] = f"<file {len(part.get_payload(decode=True) or b'')} bytes>"
+                continue
+            value = part.get_payload(decode=True).decode("utf-8")
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+        return params
+
+    params = {}
+    for key, value in parse_qsl(request.body.decode("utf-8"), keep_blank_values=True):
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+class FakeTelegramServer:
+    """
+    Фейковий Bot API.
+
+    latency — затримка (секунди) кожної відповіді або функція method -> затримка
+    (наприклад, sendPhoto повільніший за sendMessage),
+    token — токен, який очікується в шляху /bot<token>/<method>,
+    chat_limit / global_limit — імітація flood control (None — без обмежень),
+    flood_rate — частка викликів надсилання, на які сервер випадково відповідає 429,
+    retry_after — скільки секунд просити зачекати у відповіді 429.
+    """
+
+    # Методи, на які поширюється flood control (загальний ліміт)
+    LIMITED_METHODS = frozenset({
+        "sendmessage", "sendphoto", "editmessagetext", "editmessagecaption",
+        "editmessagereplymarkup", "deletemessage",
+    })
+
+    # Повідомлення в чаті — лише вони рахуються в ліміт чату
+    CHAT_METHODS = LIMITED_METHODS - {"deletemessage"}
+
+    def __init__(self, latency: float = 0.0, token: str = "123456:TEST",
+                 chat_limit: int | None = None, global_limit: int | None = None,
+                 flood_rate: float = 0.0, retry_after: int = 1):
+        self.latency = latency
+        self.token = token
+        self.chat_limit = chat_limit
+        self.global_limit = global_limit
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+
+        self.calls: list[tuple[float, str, dict]] = []
+        self.rejected: list[tuple[float, str, dict]] = []
+        # Виклики з некоректною розміткою MarkdownV2 (відповідь 400)
+        self.invalid: list[tuple[str, dict, str]] = []
+        self.server = HttpServer(self.handle)
+        self._message_ids = itertools.count(1)
+
+        # Моменти прийнятих повідомлень за останню секунду: загалом і по чатах
+        self._global_window: deque[float] = deque()
+        self._chat_windows: dict = {}
+
+    async def start(self) -> None:
+        await self.server.start()
+
+    async def stop(self) -> None:
+        await self.server.stop()
+
+    @property
+    def base_url(self) -> str:
+        """Адреса для ApplicationBuilder().base_url(...) (токен додає сам PTB)."""
+        return f"{self.server.url}/bot"
+
+    def methods(self, name: str) -> list[dict]:
+        """Параметри всіх викликів заданого методу."""
+        return [params for _, method, params in self.calls if method == name]
+
+    async def handle(self, request: Request):
+        prefix = f"/bot{self.token}/"
+        if not request.path.startswith(prefix):
+            return json_response({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+
+        method = request.path[len(prefix):]
+        params = parse_params(request)
+
+        if self._flooded(method.lower(), params):
+            self.rejected.append((time.perf_counter(), method, params))
+            return json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+
+        if str(params.get("parse_mode", "")).lower() == "markdownv2":
+            error = markdown_v2_error(str(params.get("text", params.get("caption", ""))))
+            if error:
+                self.invalid.append((method, params, error))
+                return json_response({
+                    "ok": False,
+                    "error_code": 400,
+                    "description": f"Bad Request: {error[0].lower()}{error[1:]}",
+                }, status=400)
+
+        self.calls.append((time.perf_counter(), method, params))
+
+        latency = self.latency(method) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+
+        return json_response({"ok": True, "result": self._result(method.lower(), params)})
+
+    def _flooded(self, method: str, params: dict) -> bool:
+        """Чи перевищено ліміт повідомлень (ковзне вікно в 1 секунду) або випав випадковий 429."""
+        if method not in self.LIMITED_METHODS:
+            return False
+        if self.flood_rate and random.random() < self.flood_rate:
+            return True
+        if self.chat_limit is None and self.global_limit is None:
+            return False
+
+        now = time.monotonic()
+        chat_window = self._chat_windows.setdefault(params.get("chat_id"), deque())
+        for window in (self._global_window, chat_window):
+            while window and window[0] <= now - 1.0:
+                window.popleft()
+
+        in_chat = method in self.CHAT_METHODS
+        if self.global_limit is not None and len(self._global_window) >= self.global_limit:
+            return True
+        if in_chat and self.chat_limit is not None and len(chat_window) >= self.chat_limit:
+            return True
+
+        self._global_window.append(now)
+        if in_chat:
+            chat_window.append(now)
+        return False
+
+    def _result(self, method: str, params: dict):
+        if method == "getme":
+            return BOT_USER
+
+        if method in ("sendmessage", "sendphoto", "editmessagetext", "editmessagecaption"):
+            chat_id = params.get("chat_id", 1)
+            message = {
+                "message_id": params.get("message_id") or next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+            }
+            if "text" in params:
+                message["text"] = params["text"]
+            if method == "sendphoto":
+                message["photo"] = [{
+                    "file_id": f"fake-photo-{message['message_id']}",
+                    "file_unique_id": f"u{message['message_id']}",
+                    "width": 1280,
+                    "height": 720,
+                }]
+            return message
+
+        if method == "getwebhookinfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+
+        # setWebhook, deleteWebhook, setMyCommands, answerCallbackQuery,
+        # deleteMessage, sendChatAction … — достатньо True
+        return True
+
+
+def make_message_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Синтетичне оновлення з текстовим повідомленням від користувача (або командою /...)."""
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        # CommandHandler розпізнає команду лише за сутністю bot_command
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+def make_callback_update(update_id: int, chat_id: int, data: str, message_id: int = 1) -> dict:
+    """Синтетичне натискання inline-кнопки під повідомленням бота."""
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": str(chat_id),
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"},
+                "from": BOT_USER,
+                "text": "…",
+            },
+        },
+    }
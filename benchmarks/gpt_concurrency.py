@@ -0,0 +1,100 @@
+"""
+gpt_concurrency.py — навантажувальний тест ChatGptService.
+
+Запускає локальний фейковий сервер OpenAI (в окремому потоці)
+із фіксованою затримкою і надсилає N одночасних запитів (по одному на «чат»).
+
+З асинхронним клієнтом N запитів завершуються приблизно за час
+одного запиту. Режим --sync відтворює стару поведінку (синхронний
+клієнт усередині async-функції) і показує, що час росте як N × затримка.
+
+Запуск:
+    python -m benchmarks.gpt_concurrency --chats 20 --latency 0.5
+    python -m benchmarks.gpt_concurrency --chats 20 --latency 0.5 --sync
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from openai import OpenAI
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.server_thread import ServerThread
+from gpt_service import ChatGptService
+
+
+async def run_async(base_url: str, chats: int, pool: int) -> float:
+    """N одночасних запитів через асинхронний ChatGptService."""
+    shared = ChatGptService("test", base_url=base_url, max_connections=pool)
+
+    async def one_chat(i: int):
+        return await shared.send_question("Ти тестовий бот.", f"Питання #{i}")
+
+    # Прогрів: перше з'єднання та ініціалізація клієнта не входять у вимір
+    await one_chat(-1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_chat(i) for i in range(chats)))
+    elapsed = time.perf_counter() - started
+
+    await shared.close()
+
+    return elapsed
+
+
+async def run_sync(base_url: str, chats: int) -> float:
+    """Стара поведінка: синхронний клієнт блокує цикл подій."""
+    client = OpenAI(api_key="test", base_url=base_url, http_client=httpx.Client())
+
+    async def one_chat(i: int):
+        client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": f"Питання #{i}"}],
+        )
+
+    await one_chat(-1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_chat(i) for i in range(chats)))
+    elapsed = time.perf_counter() - started
+
+    client.close()
+    return elapsed
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20, help="кількість одночасних чатів")
+    parser.add_argument("--latency", type=float, default=0.5, help="затримка однієї відповіді, с")
+    parser.add_argument("--pool", type=int, default=20, help="розмір пулу з'єднань")
+    parser.add_argument("--sync", action="store_true", help="виміряти стару синхронну поведінку")
+    args = parser.parse_args()
+
+    with ServerThread(FakeOpenAIServer(latency=args.latency)) as server:
+        if args.sync:
+            elapsed = await run_sync(server.base_url, args.chats)
+        else:
+            elapsed = await run_async(server.base_url, args.chats, args.pool)
+
+    ratio = elapsed / args.latency
+    mode = "sync" if args.sync else "async"
+
+    print(f"mode={mode} chats={args.chats} latency={args.latency:.2f}s pool={args.pool}")
+    print(f"wall time: {elapsed:.2f}s  ({ratio:.1f} × одна відповідь)")
+
+    # Очікування для асинхронного режиму: ceil(N / pool) «хвиль» запитів із запасом 50%
+    if not args.sync:
+        waves = -(-args.chats // args.pool)
+        if ratio > waves * 1.5:
+            print("❌ Запити виконуються послідовно — цикл подій блокується")
+            return 1
+        print("✅ Одночасні чати не блокують один одного")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,105 @@
+"""
+history_payload.py — бенчмарк розміру запиту в довгому діалозі.
+
+Моделює 200 реплік у режимі /gpt через ChatSession і фейковий сервер
+OpenAI, фіксуючи розмір кожного запиту (байти JSON та оцінка токенів).
+
+Без політики історії розмір росте лінійно з довжиною розмови;
+з HistoryPolicy він виходить на «полицю» і далі не росте.
+
+Запуск:
+    python -m benchmarks.history_payload --turns 200
+    python -m benchmarks.history_payload --turns 200 --no-summary
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from gpt_history import HistoryPolicy, message_tokens
+from gpt_service import ChatGptService
+from gpt_session import ChatSessionManager
+from util import load_prompt
+
+SUMMARY_PROMPT = load_prompt("history_summary")
+
+
+def fake_reply(payload: dict) -> str:
+    """Відповідь середньої довжини; для запитів на підсумок — короткий підсумок."""
+    if payload["messages"][0]["content"] == SUMMARY_PROMPT:
+        return "Користувач розпитував про різні теми; асистент відповідав стисло. " * 3
+    return "Це розгорнута відповідь асистента на чергове питання користувача. " * 6
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="кількість реплік користувача")
+    parser.add_argument("--budget", type=int, default=3000, help="бюджет токенів історії")
+    parser.add_argument("--no-summary", action="store_true", help="вимкнути фонове стискання")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=0.0, reply=fake_reply)
+    await server.start()
+
+    service = ChatGptService("test", base_url=server.base_url)
+    sessions = ChatSessionManager(
+        service,
+        history=HistoryPolicy(
+            token_budget=args.budget,
+            summarize=not args.no_summary,
+            summary_prompt=SUMMARY_PROMPT
+        )
+    )
+
+    session = await sessions.get(1)
+    session.set_prompt(load_prompt("gpt"))
+
+    sizes = []
+    try:
+        for turn in range(1, args.turns + 1):
+            await session.add_message(f"Питання номер {turn}: розкажи щось цікаве про тему {turn}.")
+
+            payload = next(
+                p for p in reversed(server.requests)
+                if p["messages"][0]["content"] != SUMMARY_PROMPT
+            )
+            sizes.append((
+                len(json.dumps(payload, ensure_ascii=False).encode("utf-8")),
+                sum(message_tokens(m) for m in payload["messages"]),
+                len(payload["messages"]),
+            ))
+
+            # Даємо фоновому підсумку шанс виконатися між репліками
+            await asyncio.sleep(0)
+    finally:
+        await service.close()
+        await server.stop()
+
+    print(f"{'репліка':>8} {'байти':>8} {'токени':>8} {'повідомлень':>12}")
+    for turn in sorted({1, 10, 25, 50, 100, 150, args.turns}):
+        if turn <= len(sizes):
+            size, tokens, count = sizes[turn - 1]
+            print(f"{turn:>8} {size:>8} {tokens:>8} {count:>12}")
+
+    max_tokens = max(tokens for _, tokens, _ in sizes)
+    tail = sizes[len(sizes) // 2:]
+    summaries = sum(1 for p in server.requests if p["messages"][0]["content"] == SUMMARY_PROMPT)
+    print(f"\nфонових підсумків: {summaries} ({summaries / args.turns:.0%} додаткових запитів до OpenAI)")
+    print(f"макс. токенів у запиті: {max_tokens} (бюджет {args.budget})")
+    print(f"друга половина розмови: {min(t for _, t, _ in tail)}–{max(t for _, t, _ in tail)} токенів")
+
+    if max_tokens > args.budget:
+        print("❌ Запит перевищив бюджет")
+        return 1
+    if summaries > args.turns * 0.1:
+        print("❌ Підсумки історії додають понад 10% запитів до OpenAI")
+        return 1
+
+    print("✅ Розмір запиту не росте з довжиною розмови")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,93 @@
+"""
+menu_calls.py — скільки викликів налаштування меню коштує /start.
+
+MenuSync (menu_sync.py) проти фейкового Telegram і справжнього
+StateStore на SQLite у тимчасовому файлі:
+    1. перший деплой: перший /start у кожному з N чатів;
+    2. повторний /start у тих самих чатах;
+    3. рестарт (новий MenuSync поверх того самого сховища) і знову /start;
+    4. змінений commands.json (гаряче перезавантаження) і /start.
+
+Раніше кожен /start робив два виклики: set_my_commands і set_chat_menu_button.
+
+Запуск:
+    python -m benchmarks.menu_calls
+    python -m benchmarks.menu_calls --chats 500
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+from telegram.ext import ExtBot
+
+from benchmarks.fake_telegram import FakeTelegramServer
+from menu_sync import MenuSync
+from state_store import SqliteBackend, StateStore
+
+COMMANDS = {"start": "Головне меню · 🌟", "quiz": "Пройти квіз · 🧠"}
+
+
+async def starts(menu: MenuSync, bot: ExtBot, telegram: FakeTelegramServer, chats: int) -> tuple[int, int]:
+    """/start у кожному чаті; повертає (set_my_commands, set_chat_menu_button)."""
+    before_commands = len(telegram.methods("setMyCommands"))
+    before_buttons = len(telegram.methods("setChatMenuButton"))
+    for chat_id in range(1000, 1000 + chats):
+        await menu.ensure_chat(bot, chat_id)
+    return (len(telegram.methods("setMyCommands")) - before_commands,
+            len(telegram.methods("setChatMenuButton")) - before_buttons)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=200, help="кількість чатів")
+    args = parser.parse_args()
+
+    telegram = FakeTelegramServer()
+    await telegram.start()
+    bot = ExtBot(telegram.token, base_url=telegram.base_url)
+
+    commands = dict(COMMANDS)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            async with bot:
+                store = StateStore(SqliteBackend(Path(tmp) / "state.sqlite3"))
+                menu = MenuSync(store, lambda: commands)
+                results["перший деплой"] = await starts(menu, bot, telegram, args.chats)
+                results["повторний /start"] = await starts(menu, bot, telegram, args.chats)
+                await store.close()
+
+                store = StateStore(SqliteBackend(Path(tmp) / "state.sqlite3"))
+                menu = MenuSync(store, lambda: commands)
+                results["після рестарту"] = await starts(menu, bot, telegram, args.chats)
+
+                commands = {**COMMANDS, "translate": "Перекладач · 🌐"}
+                results["новий commands.json"] = await starts(menu, bot, telegram, args.chats)
+                await store.close()
+    finally:
+        await telegram.stop()
+
+    print(f"чатів: {args.chats}; раніше — {2 * args.chats} викликів на кожен прохід\n")
+    print(f"{'':>20} {'set_my_commands':>16} {'set_chat_menu_button':>21}")
+    for name, (sent_commands, sent_buttons) in results.items():
+        print(f"{name:>20} {sent_commands:>16} {sent_buttons:>21}")
+
+    expected = {
+        "перший деплой": (1, args.chats),
+        "повторний /start": (0, 0),
+        "після рестарту": (0, 0),
+        "новий commands.json": (1, 0),
+    }
+    if results != expected:
+        print("\n❌ Меню налаштовується частіше, ніж потрібно")
+        return 1
+
+    print("\n✅ Повторний /start — без жодного виклику налаштувань меню")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,115 @@
+"""
+metrics_overhead.py — скільки коштують метрики на гарячому шляху.
+
+Вимірює:
+    - Counter.inc і Histogram.observe (наносекунди на виклик);
+    - обгортку timed_handler навколо порожнього хендлера;
+    - render() реєстру з реалістичною кількістю серій (те, що робить scrape).
+
+Обробка одного оновлення записує ~5 метрик (хендлер, OpenAI, токени,
+виклики Telegram), тож сумарна ціна має бути мікросекундами —
+на тлі сотень мілісекунд очікування OpenAI і Telegram.
+
+Запуск:
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --calls 1000000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from metrics import HANDLERS, MetricsRegistry, timed_handler
+
+METHODS = ("sendMessage", "editMessageText", "deleteMessage", "sendChatAction", "sendPhoto", "answerCallbackQuery")
+FEATURES = ("gpt", "talk", "random", "quiz_pool", "quiz_grade", "translate", "resume", "history_summary")
+
+
+def per_call(fn, calls: int) -> float:
+    """Наносекунди на виклик."""
+    started = time.perf_counter()
+    fn(calls)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+async def handler_overhead(calls: int) -> float:
+    async def handler(update, context):
+        return None
+
+    wrapped = timed_handler("gpt")(handler)
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await handler(None, None)
+    plain = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await wrapped(None, None)
+    timed = time.perf_counter() - started
+
+    return (timed - plain) / calls * 1e9
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300_000, help="викликів на вимірювання")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "виклики", labels=("method",))
+    histogram = registry.histogram("latency_seconds", "затримка", labels=("feature", "model"))
+    handlers = registry.histogram("handler_seconds", "затримка хендлерів", labels=("handler",), preset=HANDLERS)
+
+    def inc(n):
+        for i in range(n):
+            counter.inc("sendMessage")
+
+    def observe(n):
+        for i in range(n):
+            histogram.observe(0.42, "translate", "gpt-4o-mini")
+
+    def loop(n):
+        for i in range(n):
+            pass
+
+    baseline = per_call(loop, args.calls)
+    inc_ns = per_call(inc, args.calls) - baseline
+    observe_ns = per_call(observe, args.calls) - baseline
+    handler_ns = asyncio.run(handler_overhead(args.calls // 3))
+
+    # Реалістичний набір серій для scrape
+    for method in METHODS:
+        counter.inc(method)
+    for feature in FEATURES:
+        for model in ("gpt-3.5-turbo", "gpt-4o-mini"):
+            histogram.observe(1.0, feature, model)
+    for name in HANDLERS:
+        handlers.observe(0.1, name)
+
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        text = registry.render()
+    render_ms = (time.perf_counter() - started) / rounds * 1000
+    series = sum(1 for line in text.splitlines() if not line.startswith("#"))
+
+    per_update_us = (handler_ns + 2 * observe_ns + 3 * inc_ns) / 1000
+
+    print(f"Counter.inc:         {inc_ns:8.0f} нс")
+    print(f"Histogram.observe:   {observe_ns:8.0f} нс")
+    print(f"timed_handler:       {handler_ns:8.0f} нс")
+    print(f"на одне оновлення:   {per_update_us:8.2f} мкс (хендлер + 2 гістограми + 3 лічильники)")
+    print(f"render():            {render_ms:8.2f} мс ({series} рядків)")
+
+    if per_update_us > 20 or render_ms > 20:
+        print("\n❌ Метрики надто дорогі для продакшену")
+        return 1
+
+    print(f"\n✅ {per_update_us:.1f} мкс на оновлення, scrape {render_ms:.1f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
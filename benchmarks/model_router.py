@@ -0,0 +1,203 @@
+"""
+model_router.py — відтворення суміші запитів бота з роутером моделей і без нього.
+
+Фейковий OpenAI імітує дві моделі (швидкості — умовні, ціни — за прайсом OpenAI):
+    gpt-3.5-turbo — 350 мс до відповіді + 12 мс/токен, $0.50 / $1.50 за 1M токенів;
+    gpt-4o-mini   — 250 мс до відповіді +  8 мс/токен, $0.15 / $0.60 за 1M токенів.
+Частина запитів до gpt-3.5-turbo «зависає» на 60 с (перевантаження API).
+Довжина відповіді — природна довжина для функції, обрізана max_tokens запиту.
+
+Порівнюються:
+    - без роутера: усе на gpt-3.5-turbo, max_tokens=3000, temperature=0.9;
+    - з роутером: профілі GPT_MODEL_ROUTES із config.py і запасна модель
+      OPENAI_FALLBACK_MODEL після таймауту.
+
+Усі затримки й таймаути множаться на --scale, щоб бенчмарк ішов секунди.
+Показує p50/p95 затримки за функціями та загальну вартість.
+
+Запуск:
+    python -m benchmarks.model_router
+    python -m benchmarks.model_router --requests 1000 --stall 0.1 --scale 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import sys
+import time
+from dataclasses import replace
+
+import config
+from benchmarks.fake_openai import FakeOpenAIServer
+from gpt_service import ChatGptService
+from model_router import ModelRouter
+
+# (частка запитів, символів вхідного тексту, природна довжина відповіді в токенах (мін, макс))
+MIX = {
+    "gpt": (0.25, 600, (150, 700)),
+    "talk": (0.15, 300, (100, 500)),
+    "translate": (0.25, 400, (60, 250)),
+    "quiz_grade": (0.15, 150, (40, 400)),
+    "random": (0.10, 100, (300, 700)),
+    "resume": (0.10, 1200, (500, 1300)),
+}
+
+SPEED = {  # модель → (затримка до відповіді, с/токен)
+    "gpt-3.5-turbo": (0.35, 0.012),
+    "gpt-4o-mini": (0.25, 0.008),
+}
+PRICE = {  # модель → ($ за 1M вхідних, $ за 1M вихідних)
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+STALL_SECONDS = 60.0
+SYSTEM_PROMPT = "Ти — корисний асистент Telegram-бота. " * 20
+
+LENGTH = re.compile(r"\[n=(\d+) stall=(\d)\]")
+
+
+class ReplayOpenAI:
+    """Фейковий OpenAI з двома моделями; рахує токени й вартість."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.usage: list[tuple[str, int, int]] = []
+        self.server = FakeOpenAIServer(latency=self.latency, reply=self.reply)
+
+    @staticmethod
+    def parse(payload: dict) -> tuple[int, bool]:
+        match = LENGTH.search(payload["messages"][-1]["content"])
+        return int(match.group(1)), match.group(2) == "1"
+
+    def tokens(self, payload: dict) -> int:
+        natural, _ = self.parse(payload)
+        return min(natural, payload.get("max_tokens") or natural)
+
+    def latency(self, payload: dict) -> float:
+        model = payload["model"]
+        first, per_token = SPEED[model]
+        _, stall = self.parse(payload)
+        delay = first + per_token * self.tokens(payload)
+        if stall and model == "gpt-3.5-turbo":
+            delay += STALL_SECONDS
+        return delay * self.scale
+
+    def reply(self, payload: dict) -> str:
+        prompt = sum(len(m["content"]) for m in payload["messages"]) // 4
+        completion = self.tokens(payload)
+        self.usage.append((payload["model"], prompt, completion))
+        return "ok " * completion
+
+    def cost(self, since: int = 0) -> float:
+        return sum(
+            (prompt * PRICE[model][0] + completion * PRICE[model][1]) / 1_000_000
+            for model, prompt, completion in self.usage[since:]
+        )
+
+
+def make_trace(count: int, stall: float, seed: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    features = list(MIX)
+    weights = [MIX[f][0] for f in features]
+    trace = []
+    for _ in range(count):
+        feature = rng.choices(features, weights)[0]
+        _, chars, (low, high) = MIX[feature]
+        text = "Текст запиту користувача. " * (chars // 26)
+        trace.append((feature, f"{text}[n={rng.randint(low, high)} stall={int(rng.random() < stall)}]"))
+    return trace
+
+
+def scaled_router(scale: float) -> ModelRouter:
+    router = ModelRouter.from_specs(
+        config.OPENAI_MODEL,
+        dict(config.GPT_MODEL_ROUTES),
+        fallback_model=config.OPENAI_FALLBACK_MODEL,
+        fallback_timeout=config.OPENAI_FALLBACK_TIMEOUT * scale
+    )
+    router.profiles = {
+        feature: replace(profile, timeout=profile.timeout * scale) if profile.timeout else profile
+        for feature, profile in router.profiles.items()
+    }
+    return router
+
+
+async def replay(openai: ReplayOpenAI, router: ModelRouter | None, trace, concurrency: int) -> dict:
+    service = ChatGptService("test", base_url=openai.server.base_url, router=router,
+                             max_connections=concurrency, max_keepalive=concurrency)
+    latencies: dict[str, list[float]] = {}
+    limit = asyncio.Semaphore(concurrency)
+    since = len(openai.usage)
+
+    async def one(feature: str, text: str):
+        async with limit:
+            started = time.perf_counter()
+            await service.send_message_list([
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": text},
+            ], feature=feature)
+            latencies.setdefault(feature, []).append((time.perf_counter() - started) / openai.scale)
+
+    try:
+        await asyncio.gather(*(one(feature, text) for feature, text in trace))
+    finally:
+        await service.close()
+
+    return {"latencies": latencies, "cost": openai.cost(since)}
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="кількість запитів у суміші")
+    parser.add_argument("--stall", type=float, default=0.06, help="частка «завислих» запитів до gpt-3.5-turbo")
+    parser.add_argument("--concurrency", type=int, default=50, help="одночасних запитів")
+    parser.add_argument("--scale", type=float, default=0.1, help="множник усіх затримок")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    trace = make_trace(args.requests, args.stall, args.seed)
+    openai = ReplayOpenAI(args.scale)
+    await openai.server.start()
+    try:
+        router = scaled_router(args.scale)
+        baseline = await replay(openai, None, trace, args.concurrency)
+        routed = await replay(openai, router, trace, args.concurrency)
+    finally:
+        await openai.server.stop()
+
+    print(f"запитів: {args.requests}, зависань gpt-3.5-turbo: {args.stall:.0%}, "
+          f"затримки у реальному масштабі (×{args.scale} під час прогону)\n")
+    print(f"{'функція':>12} {'профіль':>28} {'p50 до':>8} {'p50 після':>10} {'p95 до':>8} {'p95 після':>10}")
+    for feature in MIX:
+        profile = router.profile(feature)
+        before, after = baseline["latencies"][feature], routed["latencies"][feature]
+        name = f"{profile.model}/{profile.max_tokens}/{profile.temperature}"
+        print(f"{feature:>12} {name:>28} {percentile(before, 50):>8.2f} {percentile(after, 50):>10.2f} "
+              f"{percentile(before, 95):>8.2f} {percentile(after, 95):>10.2f}")
+
+    all_before = [x for v in baseline["latencies"].values() for x in v]
+    all_after = [x for v in routed["latencies"].values() for x in v]
+    p50 = (percentile(all_before, 50), percentile(all_after, 50))
+    p95 = (percentile(all_before, 95), percentile(all_after, 95))
+    print(f"{'усього':>12} {'':>28} {p50[0]:>8.2f} {p50[1]:>10.2f} {p95[0]:>8.2f} {p95[1]:>10.2f}")
+    print(f"\nвартість: ${baseline['cost']:.4f} → ${routed['cost']:.4f} "
+          f"({routed['cost'] / baseline['cost'] - 1:+.0%})")
+    print(f"переходів на запасну модель: {router.report()['fallbacks']}")
+
+    if p50[1] >= p50[0] or p95[1] >= p95[0] or routed["cost"] >= baseline["cost"]:
+        print("\n❌ Роутер не зменшив затримку або вартість")
+        return 1
+
+    print(f"\n✅ p50 {p50[1] / p50[0] - 1:+.0%}, p95 {p95[1] / p95[0] - 1:+.0%}, "
+          f"вартість {routed['cost'] / baseline['cost'] - 1:+.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,90 @@
+"""
+progress_calls.py — скільки викликів Bot API коштує індикація очікування.
+
+Імітує запит до ChatGPT (затримка --latency) і відповідь з кнопками
+для кожного режиму Progress:
+    - message — заглушка + видалення + відповідь (старий спосіб);
+    - edit    — заглушка, яка редагується у відповідь;
+    - typing  — статус «друкує…» + відповідь.
+
+Окремо — «швидка» відповідь (кеш, пул питань): індикація не встигає
+з'явитися, і лишається тільки сама відповідь.
+
+Запуск:
+    python -m benchmarks.progress_calls
+    python -m benchmarks.progress_calls --requests 20 --latency 1.5
+"""
+
+import argparse
+import asyncio
+import sys
+
+from telegram.ext import ExtBot
+
+from benchmarks.fake_telegram import FakeTelegramServer
+from util import PROGRESS_EDIT, PROGRESS_MESSAGE, PROGRESS_TYPING, Progress
+
+MODES = (PROGRESS_MESSAGE, PROGRESS_EDIT, PROGRESS_TYPING)
+
+
+async def serve(bot: ExtBot, chat_id: int, mode: str, latency: float, delay: float) -> None:
+    """Один запит користувача: «ChatGPT» думає latency секунд, потім відповідь."""
+    async with Progress(bot, chat_id, "🔍 Обробляю…", mode=mode, delay=delay) as p:
+        await asyncio.sleep(latency)
+        await p.reply("Відповідь", {"start": "🏁 Завершити"})
+
+
+async def measure(bot: ExtBot, telegram: FakeTelegramServer, mode: str, latency: float, args) -> float:
+    """Середня кількість викликів Bot API на запит."""
+    before = len(telegram.calls)
+    await asyncio.gather(*(
+        serve(bot, 1000 + i, mode, latency, args.delay) for i in range(args.requests)
+    ))
+    return (len(telegram.calls) - before) / args.requests
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="запитів на кожен режим")
+    parser.add_argument("--latency", type=float, default=2.0, help="час відповіді ChatGPT, с")
+    parser.add_argument("--fast", type=float, default=0.05, help="час «швидкої» відповіді (кеш), с")
+    parser.add_argument("--delay", type=float, default=0.5, help="затримка появи індикації, с")
+    args = parser.parse_args()
+
+    telegram = FakeTelegramServer()
+    await telegram.start()
+    bot = ExtBot(telegram.token, base_url=telegram.base_url)
+
+    results = {}
+    try:
+        async with bot:
+            for mode in MODES:
+                results[mode] = (
+                    await measure(bot, telegram, mode, args.latency, args),
+                    await measure(bot, telegram, mode, args.fast, args),
+                )
+    finally:
+        await telegram.stop()
+
+    print(f"запитів на режим: {args.requests}, ChatGPT: {args.latency} с, кеш: {args.fast} с\n")
+    print(f"{'режим':>8} {'викликів (ChatGPT)':>19} {'викликів (кеш)':>15}")
+    for mode, (slow, fast) in results.items():
+        print(f"{mode:>8} {slow:>19.1f} {fast:>15.1f}")
+
+    # Старі хендлери надсилали й видаляли заглушку завжди — навіть для відповіді з кешу
+    legacy = results[PROGRESS_MESSAGE][0]
+    best = min(results[PROGRESS_EDIT][0], results[PROGRESS_TYPING][0])
+    fast = results[PROGRESS_TYPING][1]
+    print(f"\nекономія проти заглушки з видаленням: ChatGPT — {1 - best / legacy:.0%}, "
+          f"кеш — {1 - fast / legacy:.0%}")
+
+    if best >= legacy or any(fast > 1 for _, fast in results.values()):
+        print("\n❌ Індикація не зменшує кількість викликів Bot API")
+        return 1
+
+    print("✅ Менше викликів Bot API на кожен запит")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,141 @@
+"""
+quiz_grading.py — бенчмарк локальної перевірки відповідей квізу.
+
+Генерує 1000 відповідей користувачів на питання з відомою відповіддю
+(точні, з іншим регістром/пунктуацією, з одруківками, синоніми,
+лише прізвище, числа, неправильні, іншим алфавітом) і прогоняє їх
+через QuizGrader.
+
+Показує, скільки запитів до ChatGPT зекономлено на 1000 відповідей,
+скільки локальних вердиктів помилкові та час однієї перевірки.
+
+Запуск:
+    python -m benchmarks.quiz_grading
+    python -m benchmarks.quiz_grading --answers 5000 --seed 7
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from quiz_grader import AMBIGUOUS, CORRECT, QuizGrader
+
+# (відповідь, синоніми, неправильні варіанти)
+QUESTIONS = [
+    ("Марс", ("Червона планета",), ("Венера", "Юпітер", "Сатурн")),
+    ("Юрій Гагарін", ("Гагарін",), ("Ніл Армстронг", "Герман Титов")),
+    ("Альберт Ейнштейн", (), ("Ісаак Ньютон", "Нільс Бор")),
+    ("1945", (), ("1944", "1939", "1918")),
+    ("1991", (), ("1990", "1989")),
+    ("кисень", ("O2",), ("водень", "азот", "гелій")),
+    ("Python", ("Пайтон",), ("Java", "Rust")),
+    ("Тихий океан", ("Тихий",), ("Атлантичний океан", "Індійський океан")),
+    ("Леонардо да Вінчі", ("да Вінчі",), ("Мікеланджело", "Рафаель")),
+    ("3,14", ("пі",), ("2,71", "1,61")),
+    ("Київ", (), ("Львів", "Харків", "Одеса")),
+    ("мітохондрія", ("мітохондрії",), ("рибосома", "ядро")),
+    ("Тарас Шевченко", ("Шевченко",), ("Іван Франко", "Леся Українка")),
+    ("фотосинтез", (), ("дихання", "бродіння")),
+    ("Google", ("Гугл",), ("Microsoft", "Apple")),
+    # Неправильні відповіді, схожі на правильну (ratio ≥ 0,85)
+    ("Австралія", (), ("Австрія", "Аргентина")),
+    ("Північна Америка", (), ("Південна Америка",)),
+]
+
+# Сусідні клавіші для правдоподібних одруківок
+NEIGHBOURS = {
+    "а": "фв", "о": "лр", "е": "кн", "і": "ши", "и": "мт", "н": "ег", "т": "ьи",
+    "р": "по", "с": "чм", "к": "уе", "a": "sq", "o": "ip", "e": "wr", "n": "bm",
+}
+
+# Частки категорій відповідей
+MIX = [
+    ("exact", 0.30),
+    ("variant", 0.15),
+    ("typo", 0.15),
+    ("alias", 0.08),
+    ("number_or_part", 0.07),
+    ("wrong", 0.20),
+    ("other_alphabet", 0.05),
+]
+
+TRANSLIT = {"Марс": "Mars", "Київ": "Kyiv", "кисень": "oxygen", "фотосинтез": "photosynthesis"}
+
+
+def typo(text: str, rng: random.Random) -> str:
+    """Одна одруківка: заміна сусідньою клавішею або пропуск літери."""
+    positions = [i for i, ch in enumerate(text) if ch.lower() in NEIGHBOURS]
+    if not positions:
+        return text[:-1]
+    i = rng.choice(positions)
+    if rng.random() < 0.5:
+        return text[:i] + rng.choice(NEIGHBOURS[text[i].lower()]) + text[i + 1:]
+    return text[:i] + text[i + 1:]
+
+
+def make_answer(rng: random.Random) -> tuple[str, str, tuple, bool]:
+    """Повертає (відповідь користувача, очікувана, синоніми, чи правильна насправді)."""
+    answer, aliases, wrong = rng.choice(QUESTIONS)
+    kind = rng.choices([k for k, _ in MIX], weights=[w for _, w in MIX])[0]
+
+    if kind == "exact":
+        return answer, answer, aliases, True
+    if kind == "variant":
+        return rng.choice([answer.upper(), answer.lower(), f"{answer}!", f" {answer}."]), answer, aliases, True
+    if kind == "typo" and not any(ch.isdigit() for ch in answer):
+        # одруківка в числі — це вже інша (неправильна) відповідь
+        return typo(answer, rng), answer, aliases, True
+    if kind == "alias" and aliases:
+        return rng.choice(aliases), answer, aliases, True
+    if kind == "number_or_part":
+        if answer.isdigit():
+            return f"у {answer} році", answer, aliases, True
+        return answer.split()[-1], answer, aliases, True
+    if kind == "other_alphabet" and answer in TRANSLIT:
+        return TRANSLIT[answer], answer, aliases, True
+    return rng.choice(wrong), answer, aliases, False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=1000, help="кількість відповідей")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = [make_answer(rng) for _ in range(args.answers)]
+
+    grader = QuizGrader()
+    errors = 0
+    false_correct = 0
+
+    started = time.perf_counter()
+    for user_answer, answer, aliases, truth in samples:
+        grade = grader.grade(user_answer, answer, aliases)
+        if grade.verdict != AMBIGUOUS and (grade.verdict == CORRECT) != truth:
+            errors += 1
+            false_correct += grade.verdict == CORRECT
+            print(f"  помилка: {user_answer!r} на {answer!r} → {grade.verdict} ({grade.confidence:.2f})")
+    elapsed = time.perf_counter() - started
+
+    stats = grader.stats()
+    saved_per_1000 = stats["local"] * 1000 / args.answers
+
+    print(f"відповідей: {args.answers}")
+    print(f"оцінено локально: {stats['local']}, до ChatGPT: {stats['escalated']}")
+    print(f"зекономлено запитів на 1000 відповідей: {saved_per_1000:.0f}")
+    print(f"помилкових локальних вердиктів: {errors} ({errors / max(stats['local'], 1):.1%}), "
+          f"з них бали за неправильну відповідь: {false_correct}")
+    print(f"час однієї перевірки: {elapsed / args.answers * 1e6:.0f} мкс")
+
+    if saved_per_1000 < 500 or errors > stats["local"] * 0.02 or false_correct:
+        print("❌ Локальна перевірка неефективна або неточна")
+        return 1
+
+    print("✅ Більшість відповідей оцінено без запиту до моделі")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
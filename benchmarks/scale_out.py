@@ -0,0 +1,270 @@
+"""
+scale_out.py — кластер: ingress + 1, 2, 4 процеси-робітники.
+
+Кожен компонент — окремий процес, як у продакшені:
+    фейковий Telegram, фейковий OpenAI, ingress (IngressServer)
+    і N робітників (Application + WebhookServer з відкиданням повторів).
+
+Генератор навантаження надсилає на ingress оновлення від M чатів
+(у межах чату — по одному, як Telegram) і частину з них повторно
+(імітація повторної доставки). Хендлер робітника робить запит до
+фейкового OpenAI і відповідає через фейковий Telegram.
+
+Для кожної кількості робітників показує пропускну здатність і перевіряє:
+    - кожне оновлення оброблене рівно один раз (повтори відкинуто);
+    - чат завжди обробляв той самий робітник;
+    - у межах чату оновлення оброблені в порядку надходження.
+
+Приріст пропускної здатності видно лише тоді, коли ядер більше,
+ніж процесів-робітників (плюс ingress і фейкові сервери).
+
+Запуск:
+    python -m benchmarks.scale_out
+    python -m benchmarks.scale_out --workers 1 2 4 8 --updates 2000 --chats 400
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import sys
+import time
+
+import httpx
+
+from webhook import SECRET_HEADER
+
+TOKEN = "123456:TEST"
+TELEGRAM_SECRET = "telegram-secret"
+WORKER_SECRET = "worker-secret"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ---------------------------------
+# Процеси кластера
+# ---------------------------------
+
+def fake_process(kind: str, port: int, latency: float) -> None:
+    """Фейковий Telegram або OpenAI у власному процесі."""
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.fake_telegram import FakeTelegramServer
+
+    async def serve():
+        server = FakeTelegramServer(token=TOKEN) if kind == "telegram" else \
+            FakeOpenAIServer(latency=latency, reply="Відповідь.")
+        server.server.port = port
+        await server.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def worker_process(index: int, port: int, telegram_port: int, openai_port: int,
+                   concurrency: int, results) -> None:
+    """Робітник: Application + WebhookServer, як bot.py --mode worker."""
+    from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+    from gpt_service import ChatGptService
+    from update_processor import ChatOrderedUpdateProcessor
+    from webhook import WebhookServer, run_webhook
+
+    service = ChatGptService("test", base_url=f"http://127.0.0.1:{openai_port}/v1",
+                             max_connections=concurrency, max_keepalive=concurrency)
+
+    async def handler(update, context):
+        answer = await service.send_question("Ти тестовий бот.", update.message.text)
+        await update.message.reply_text(answer)
+        context.chat_data["seen"] = context.chat_data.get("seen", 0) + 1
+        results.put((index, update.effective_chat.id, update.update_id))
+
+    app = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .base_url(f"http://127.0.0.1:{telegram_port}/bot")
+        .updater(None)
+        .concurrent_updates(ChatOrderedUpdateProcessor(workers=concurrency))
+        .build()
+    )
+    app.add_handler(MessageHandler(filters.TEXT, handler))
+
+    server = WebhookServer(app, path="/update", secret_token=WORKER_SECRET,
+                           host="127.0.0.1", port=port, dedupe=10000)
+
+    async def shutdown(_app):
+        await service.close()
+
+    asyncio.run(run_webhook(app, server, on_shutdown=shutdown))
+
+
+def ingress_process(port: int, worker_ports: list[int]) -> None:
+    """Ingress: приймає «webhook» і розподіляє оновлення між робітниками."""
+    from ingress import IngressServer, run_ingress
+
+    server = IngressServer(
+        [f"http://127.0.0.1:{p}/update" for p in worker_ports],
+        path="/telegram",
+        secret_token=TELEGRAM_SECRET,
+        worker_secret=WORKER_SECRET,
+        host="127.0.0.1",
+        port=port
+    )
+    asyncio.run(run_ingress(server))
+
+
+# ---------------------------------
+# Генератор навантаження
+# ---------------------------------
+
+async def wait_ready(client: httpx.AsyncClient, ports: list[int], timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while True:
+            try:
+                if (await client.get(f"http://127.0.0.1:{port}/healthz")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"процес на порту {port} не запустився")
+            await asyncio.sleep(0.1)
+
+
+async def send_chat(client: httpx.AsyncClient, url: str, updates: list[dict], duplicate_rate: float) -> None:
+    """Оновлення одного чату — по одному, частину повторно (як повторна доставка Telegram)."""
+    headers = {SECRET_HEADER: TELEGRAM_SECRET}
+    for update in updates:
+        copies = 2 if random.random() < duplicate_rate else 1
+        for _ in range(copies):
+            while True:
+                response = await client.post(url, json=update, headers=headers)
+                if response.status_code == 200:
+                    break
+                await asyncio.sleep(0.1)  # 503 — Telegram повторив би доставку
+
+
+async def run(workers: int, args, ctx) -> dict:
+    from benchmarks.fake_telegram import make_message_update
+
+    telegram_port, openai_port, ingress_port = free_port(), free_port(), free_port()
+    worker_ports = [free_port() for _ in range(workers)]
+    results = ctx.Queue()
+
+    processes = [
+        ctx.Process(target=fake_process, args=("telegram", telegram_port, 0.0)),
+        ctx.Process(target=fake_process, args=("openai", openai_port, args.latency)),
+        ctx.Process(target=ingress_process, args=(ingress_port, worker_ports)),
+    ] + [
+        ctx.Process(target=worker_process,
+                    args=(i, port, telegram_port, openai_port, args.concurrency, results))
+        for i, port in enumerate(worker_ports)
+    ]
+    for process in processes:
+        process.start()
+
+    chats: dict[int, list[dict]] = {}
+    for update_id in range(1, args.updates + 1):
+        chat_id = 1000 + update_id % args.chats
+        chats.setdefault(chat_id, []).append(make_message_update(update_id, chat_id, f"питання {update_id}"))
+
+    processed: list[tuple[int, int, int]] = []
+    try:
+        async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=args.chats)) as client:
+            await wait_ready(client, [ingress_port, *worker_ports])
+
+            started = time.perf_counter()
+            sending = asyncio.gather(*(
+                send_chat(client, f"http://127.0.0.1:{ingress_port}/telegram", updates, args.duplicates)
+                for updates in chats.values()
+            ))
+
+            while len(processed) < args.updates:
+                try:
+                    processed.append(await asyncio.to_thread(results.get, True, 60))
+                except queue.Empty:
+                    break
+            elapsed = time.perf_counter() - started
+            await sending
+
+            # Повтори могли б з'явитися трохи пізніше за останнє оновлення
+            await asyncio.sleep(0.5)
+            while True:
+                try:
+                    processed.append(results.get_nowait())
+                except queue.Empty:
+                    break
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(30)
+
+    owners: dict[int, set[int]] = {}
+    order: dict[int, list[int]] = {}
+    per_worker = [0] * workers
+    for worker, chat_id, update_id in processed:
+        owners.setdefault(chat_id, set()).add(worker)
+        order.setdefault(chat_id, []).append(update_id)
+        per_worker[worker] += 1
+
+    ids = [update_id for _, _, update_id in processed]
+    return {
+        "workers": workers,
+        "elapsed": elapsed,
+        "throughput": len(set(ids)) / elapsed,
+        "per_worker": per_worker,
+        "lost": args.updates - len(set(ids)),
+        "duplicates": len(ids) - len(set(ids)),
+        "pinned": all(len(w) == 1 for w in owners.values()),
+        "in_order": all(u == sorted(u) for u in order.values()),
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--updates", type=int, default=600, help="кількість оновлень")
+    parser.add_argument("--chats", type=int, default=120, help="кількість різних чатів")
+    parser.add_argument("--latency", type=float, default=0.2, help="затримка фейкового OpenAI, с")
+    parser.add_argument("--concurrency", type=int, default=16, help="одночасних хендлерів у робітнику")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="частка повторно доставлених оновлень")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = [await run(workers, args, ctx) for workers in args.workers]
+
+    cores = os.cpu_count() or 1
+    print(f"оновлень: {args.updates}, чатів: {args.chats}, затримка OpenAI: {args.latency} с, ядер: {cores}\n")
+    print(f"{'робітників':>10} {'час, с':>8} {'оновл./с':>9} {'втрачено':>9} {'повторів':>9} "
+          f"{'закріплено':>11} {'порядок':>8}  розподіл")
+    for r in results:
+        print(f"{r['workers']:>10} {r['elapsed']:>8.2f} {r['throughput']:>9.1f} {r['lost']:>9} "
+              f"{r['duplicates']:>9} {'так' if r['pinned'] else 'НІ':>11} "
+              f"{'так' if r['in_order'] else 'НІ':>8}  {r['per_worker']}")
+
+    if any(r["lost"] or r["duplicates"] or not r["pinned"] or not r["in_order"] for r in results):
+        print("\n❌ Втрачені/повторні оновлення або порушено закріплення чи порядок")
+        return 1
+
+    # Процесів: робітники + ingress + 2 фейкові сервери + генератор
+    scalable = [r for r in results if r["workers"] + 4 <= cores]
+    if len(scalable) > 1 and scalable[-1]["throughput"] < scalable[0]["throughput"] * 1.3:
+        print("\n❌ Пропускна здатність не росте з кількістю робітників")
+        return 1
+
+    if len(scalable) < len(results):
+        print(f"\nℹ️ Ядер ({cores}) замало, щоб побачити приріст для всіх конфігурацій — "
+              f"перевірено лише коректність")
+    print("\n✅ Кожне оновлення оброблене рівно раз, чати закріплені за робітниками, порядок збережено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
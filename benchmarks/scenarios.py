@@ -0,0 +1,362 @@
+"""
+scenarios.py — сценарії користувачів проти справжнього застосунку bot.py.
+
+Бот збирається тією ж bot.build_app(), що й у продакшені: усі хендлери,
+ChatOrderedUpdateProcessor, TelegramRateLimiter, StatePersistence, кеші,
+пул питань квізу. Зовнішній світ замінено локальними фейками:
+    - Telegram Bot API (TELEGRAM_BASE_URL) — затримка за методами
+      і випадкові 429 (--flood-rate);
+    - OpenAI (OPENAI_BASE_URL) — затримка, швидкість токенів, потоки.
+
+Сценарії (кожен — новий чат, кроки в межах чату йдуть по черзі,
+наступний — після обробки попереднього і паузи --think):
+    quiz       /start → /quiz → тема → відповідь → наступне → відповідь → завершити
+    talk       /talk → особистість → три репліки → завершити
+    translate  /translate → мова → п'ять повідомлень підряд (не чекаючи відповіді)
+
+Сценарії запускаються з такою частотою, щоб разом давати --rps оновлень
+за секунду. Затримка оновлення — від потрапляння в чергу Application
+до завершення хендлера (разом з очікуванням у черзі чату та лімітами
+Telegram). Показує p50 / p95 / p99 загалом, за типом кроку і сценарієм,
+а також фактичну кількість оброблених оновлень за секунду. Рахується
+лише усталений режим: перші --warmup секунд (сценарії ще набираються)
+і хвіст після --duration (сценарії лише завершуються) відкидаються.
+
+Ліміти вихідних повідомлень за замовчуванням — як у .env.example
+(бот сам тримає ~25 повідомлень/с); --no-limits прибирає їх, щоб
+виміряти стелю обробки. Інші змінні середовища (UPDATE_WORKERS,
+PROGRESS_*, RESPONSE_CACHE_* …) читаються як звичайно.
+
+Запуск:
+    python -m benchmarks.scenarios
+    python -m benchmarks.scenarios --rps 30 --duration 60 --no-limits
+    python -m benchmarks.scenarios --mix quiz=1 --openai-latency 2.0 --flood-rate 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_telegram import FakeTelegramServer, make_callback_update, make_message_update
+
+TOKEN = "123456:TEST"
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+# ---------------------------------
+# Сценарії
+# ---------------------------------
+
+@dataclass(frozen=True)
+class Step:
+    """Крок сценарію: команда, натискання кнопки або текст."""
+    kind: str  # command | button | text
+    value: str
+    wait: bool = True  # чекати обробки перед наступним кроком
+
+
+def command(value: str) -> Step:
+    return Step("command", value)
+
+
+def button(value: str) -> Step:
+    return Step("button", value)
+
+
+def text(value: str, wait: bool = True) -> Step:
+    return Step("text", value, wait)
+
+
+SCENARIOS = {
+    "quiz": lambda n: [
+        command("/start"),
+        command("/quiz"),
+        button("quiz_science"),
+        text("Юпітер"),
+        button("quiz_next"),
+        text("Сатурн"),
+        button("start"),
+    ],
+    "talk": lambda n: [
+        command("/talk"),
+        button("talk_marie_curie"),
+        text(f"Привіт! Розкажіть про свою роботу ({n})"),
+        text("Що було найважчим?"),
+        text("Дякую, до зустрічі!"),
+        button("start"),
+    ],
+    "translate": lambda n: [
+        command("/translate"),
+        button("translate_en"),
+        *(text(f"Речення номер {i} у пачці {n}", wait=False) for i in range(4)),
+        text(f"Останнє речення пачки {n}"),
+    ],
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """quiz=0.4,talk=0.3,translate=0.3 → ваги сценаріїв."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"невідомий сценарій: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ---------------------------------
+# Фейкові відповіді OpenAI
+# ---------------------------------
+
+_questions = itertools.count(1)
+
+
+def fake_reply(payload: dict) -> str:
+    """Відповідь у форматі, якого чекає функція бота (пакет квізу, оцінка, переклад, діалог)."""
+    last = str(payload["messages"][-1].get("content") or "")
+
+    if "JSON-масив" in last:
+        batch = [
+            {"question": f"Яка планета найбільша? (#{next(_questions)})", "answer": "Юпітер", "aliases": ["Jupiter"]}
+            for _ in range(5)
+        ]
+        return json.dumps(batch, ensure_ascii=False)
+    if "Оціни відповідь" in last:
+        return "Правильно! Коротке пояснення відповіді."
+    return " ".join(["Фейкова відповідь моделі з кількома словами для потокового режиму."] * 4)
+
+
+def telegram_latency(base: float):
+    """Завантаження фото довше за текстові виклики."""
+    def latency(method: str) -> float:
+        return base * 4 if method == "sendPhoto" else base
+    return latency
+
+
+# ---------------------------------
+# Прогін
+# ---------------------------------
+
+@dataclass
+class Results:
+    """Оброблені оновлення: (сценарій, тип кроку, момент надсилання, затримка)."""
+    updates: list[tuple[str, str, float, float]] = field(default_factory=list)
+    sent: int = 0
+    lost: int = 0
+    window: tuple[float, float] = (0.0, 0.0)
+
+    def add(self, scenario: str, kind: str, sent_at: float, latency: float) -> None:
+        self.updates.append((scenario, kind, sent_at, latency))
+
+    def values(self, scenario: str | None = None, kind: str | None = None) -> list[float]:
+        """Затримки оновлень, надісланих в усталеному режимі."""
+        start, end = self.window
+        return [
+            latency for s, k, sent_at, latency in self.updates
+            if scenario in (None, s) and kind in (None, k) and start <= sent_at < end
+        ]
+
+    def rate(self) -> float:
+        """Оновлень за секунду, оброблених в усталеному режимі."""
+        start, end = self.window
+        done = sum(1 for *_, sent_at, latency in self.updates if start <= sent_at + latency < end)
+        return done / (end - start)
+
+
+def configure_env(args, telegram: FakeTelegramServer, openai: FakeOpenAIServer, tmp: str) -> None:
+    """Змінні середовища для config.py — до першого імпорту модулів бота."""
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": TOKEN,
+        "TELEGRAM_BASE_URL": telegram.base_url,
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": openai.base_url,
+        "OPENAI_PROXY": "",
+        "STATE_DB": os.path.join(tmp, "state.sqlite3"),
+        "TRANSLATION_CACHE_DB": os.path.join(tmp, "translations.sqlite3"),
+        "MEDIA_CACHE_FILE": os.path.join(tmp, "file_ids.json"),
+        "METRICS_ENABLED": "false",
+        "TRACE_ENABLED": "false",
+        "RESOURCES_RELOAD_INTERVAL": "0",
+    })
+    if args.no_limits:
+        os.environ.update({
+            "TELEGRAM_GLOBAL_RATE": "100000",
+            "TELEGRAM_GLOBAL_BURST": "100000",
+            "TELEGRAM_CHAT_RATE": "100000",
+            "TELEGRAM_GROUP_RATE": "100000",
+            "TELEGRAM_CHAT_BURST": "100000",
+        })
+
+
+async def run(args) -> int:
+    telegram = FakeTelegramServer(latency=telegram_latency(args.telegram_latency), token=TOKEN,
+                                  flood_rate=args.flood_rate, retry_after=1)
+    openai = FakeOpenAIServer(latency=args.openai_latency, reply=fake_reply, token_delay=args.token_delay)
+    await telegram.start()
+    await openai.start()
+
+    tmp = tempfile.TemporaryDirectory()
+    configure_env(args, telegram, openai, tmp.name)
+
+    # Імпорт після налаштування середовища: config.py читає його один раз
+    import logging
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    import bot
+    from metrics import HANDLER_ERRORS
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+    results = Results()
+    pending: dict[int, tuple[float, asyncio.Future]] = {}
+    update_ids = itertools.count(1)
+
+    async def finished(update, context):
+        """Остання група хендлерів: оновлення повністю оброблене."""
+        sent_at, future = pending.pop(update.update_id, (None, None))
+        if future is not None and not future.done():
+            future.set_result(time.perf_counter() - sent_at)
+
+    app = bot.build_app()
+    app.add_handler(TypeHandler(Update, finished), group=99)
+
+    await app.initialize()
+    await app.post_init(app)
+    await app.start()
+
+    async def send(chat_id: int, step: Step) -> tuple[float, asyncio.Future]:
+        update_id = next(update_ids)
+        if step.kind == "button":
+            data = make_callback_update(update_id, chat_id, step.value)
+        else:
+            data = make_message_update(update_id, chat_id, step.value)
+
+        future = asyncio.get_running_loop().create_future()
+        sent_at = time.perf_counter()
+        pending[update_id] = (sent_at, future)
+        results.sent += 1
+        await app.update_queue.put(Update.de_json(data, app.bot))
+        return sent_at, future
+
+    async def journey(name: str, chat_id: int) -> None:
+        in_flight = []
+        for step in SCENARIOS[name](chat_id):
+            sent_at, future = await send(chat_id, step)
+            in_flight.append((step, sent_at, future))
+            if not step.wait:
+                continue
+            for waited, waited_at, f in in_flight:
+                try:
+                    results.add(name, waited.kind, waited_at, await asyncio.wait_for(f, args.timeout))
+                except asyncio.TimeoutError:
+                    results.lost += 1
+            in_flight.clear()
+            if args.think:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * args.think)
+
+    # Сценарії стартують пуассонівським потоком з такою частотою, щоб разом дати --rps оновлень/с
+    names, weights = zip(*args.mix.items())
+    steps = sum(len(SCENARIOS[n](0)) * w for n, w in zip(names, weights)) / sum(weights)
+    journeys_per_second = args.rps / steps
+
+    print(f"Сценарії: {', '.join(f'{n}={w:g}' for n, w in args.mix.items())}; "
+          f"~{steps:.1f} оновлень на сценарій, {journeys_per_second:.2f} сценаріїв/с, "
+          f"{args.duration:.0f} с\n")
+
+    tasks = []
+    chat_ids = itertools.count(10_000)
+    random.seed(args.seed)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    results.window = (started + min(args.warmup, args.duration / 2), deadline)
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        tasks.append(asyncio.create_task(journey(name, next(chat_ids))))
+        await asyncio.sleep(random.expovariate(journeys_per_second))
+    await asyncio.gather(*tasks)
+
+    await app.stop()
+    await app.shutdown()
+    await app.post_shutdown(app)
+    await telegram.stop()
+    await openai.stop()
+    tmp.cleanup()
+
+    return report(args, results, telegram, openai, sum(HANDLER_ERRORS.values.values()))
+
+
+def report(args, results: Results, telegram: FakeTelegramServer, openai: FakeOpenAIServer, errors: float) -> int:
+    def row(title: str, values: list[float]) -> None:
+        if not values:
+            return
+        print(f"  {title:<20} {len(values):>6} {percentile(values, 0.5) * 1000:>9.0f} "
+              f"{percentile(values, 0.95) * 1000:>9.0f} {percentile(values, 0.99) * 1000:>9.0f}")
+
+    print(f"  {'':<20} {'оновл.':>6} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    row("усі", results.values())
+    for kind in ("command", "button", "text"):
+        row(kind, results.values(kind=kind))
+    for name in args.mix:
+        row(name, results.values(scenario=name))
+
+    rate = results.rate()
+    start, end = results.window
+
+    print(f"\nоновлень: {results.sent} надіслано, {len(results.updates)} оброблено; "
+          f"усталений режим {end - start:.0f} с → {rate:.1f} оновлень/с (ціль {args.rps:g})")
+    print(f"Telegram: {len(telegram.calls)} викликів, {len(telegram.rejected)} відповідей 429, "
+          f"{len(telegram.invalid)} — некоректний MarkdownV2; "
+          f"OpenAI: {len(openai.requests)} запитів; помилок хендлерів: {errors:.0f}")
+
+    for method, params, error in telegram.invalid[:5]:
+        print(f"  {method}: {error}\n    {str(params.get('text', params.get('caption', '')))[:200]!r}")
+
+    if results.lost or errors or telegram.invalid:
+        print(f"\n❌ Не оброблено за {args.timeout:.0f} с: {results.lost}, помилок хендлерів: {errors:.0f}, "
+              f"відхилених через MarkdownV2: {len(telegram.invalid)}")
+        return 1
+
+    print(f"\n✅ {rate:.1f} оновлень/с, p50 {percentile(results.values(), 0.5) * 1000:.0f} мс, "
+          f"p99 {percentile(results.values(), 0.99) * 1000:.0f} мс")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=10.0, help="цільова кількість оновлень за секунду")
+    parser.add_argument("--duration", type=float, default=20.0, help="скільки секунд запускати нові сценарії")
+    parser.add_argument("--warmup", type=float, default=5.0, help="перші секунди, що не враховуються")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("quiz=0.4,talk=0.3,translate=0.3"),
+                        help="ваги сценаріїв (quiz, talk, translate)")
+    parser.add_argument("--think", type=float, default=0.5, help="пауза користувача між кроками, с")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="затримка фейкового OpenAI, с")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="пауза між токенами потоку, с")
+    parser.add_argument("--telegram-latency", type=float, default=0.03,
+                        help="затримка фейкового Telegram, с (sendPhoto — учетверо)")
+    parser.add_argument("--flood-rate", type=float, default=0.01, help="частка випадкових 429 від Telegram")
+    parser.add_argument("--no-limits", action="store_true", help="зняти ліміти вихідних повідомлень бота")
+    parser.add_argument("--timeout", type=float, default=60.0, help="скільки чекати обробки одного оновлення, с")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
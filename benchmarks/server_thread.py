@@ -0,0 +1,42 @@
+"""
+server_thread.py — запуск фейкового сервера в окремому потоці.
+
+Фейковий сервер отримує власний цикл подій, тому бенчмарк
+може навмисно блокувати свій цикл (наприклад, синхронним клієнтом),
+не «заморожуючи» сам сервер.
+"""
+
+import asyncio
+import threading
+
+
+class ServerThread:
+    """
+    Обгортка для об'єкта з методами start()/stop() (async),
+    яка тримає його у фоновому потоці.
+
+        with ServerThread(FakeOpenAIServer(latency=0.5)) as server:
+            ... server.base_url ...
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+        return self.server
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
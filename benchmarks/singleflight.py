@@ -0,0 +1,110 @@
+"""
+singleflight.py — бенчмарк об'єднання однакових одночасних запитів.
+
+N користувачів одночасно перекладають кілька однакових фраз
+(кеш відповідей вимкнено — як у момент, коли він ще порожній).
+Рахує, скільки запитів дійшло до фейкового OpenAI:
+    - без single-flight — по запиту на кожного користувача;
+    - з single-flight — по одному на кожну різну фразу.
+
+Також перевіряє, що функція без opt-in (random) не об'єднується,
+а помилка лідера дістається всім, хто на нього чекав.
+
+Запуск:
+    python -m benchmarks.singleflight
+    python -m benchmarks.singleflight --users 500 --phrases 10 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from gpt_service import ChatGptService
+from singleflight import SingleFlight
+
+PROMPT = "Переклади текст англійською."
+
+
+async def burst(openai: FakeOpenAIServer, singleflight: SingleFlight | None, feature: str,
+                users: int, phrases: int) -> tuple[int, float]:
+    """Повертає (кількість запитів до API, час)."""
+    service = ChatGptService("test", base_url=openai.base_url, singleflight=singleflight,
+                             max_connections=users, max_keepalive=users)
+    before = len(openai.requests)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            service.send_question(PROMPT, f"фраза {i % phrases}", feature=feature)
+            for i in range(users)
+        ))
+    finally:
+        await service.close()
+    return len(openai.requests) - before, time.perf_counter() - started
+
+
+async def leader_error_shared() -> bool:
+    """Помилка лідера отримують усі учасники, реєстр після цього порожній."""
+    singleflight = SingleFlight({"translate"})
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream")
+
+    results = await asyncio.gather(
+        *(singleflight.do("translate", "k", failing) for _ in range(5)),
+        return_exceptions=True
+    )
+    return all(isinstance(r, RuntimeError) for r in results) and singleflight.inflight == 0
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="одночасних користувачів")
+    parser.add_argument("--phrases", type=int, default=5, help="різних фраз")
+    parser.add_argument("--latency", type=float, default=0.3, help="затримка фейкового OpenAI, с")
+    args = parser.parse_args()
+
+    openai = FakeOpenAIServer(latency=args.latency, reply="Translation.")
+    await openai.start()
+    try:
+        plain, plain_time = await burst(openai, None, "translate", args.users, args.phrases)
+
+        singleflight = SingleFlight({"translate"})
+        merged, merged_time = await burst(openai, singleflight, "translate", args.users, args.phrases)
+
+        bypass = SingleFlight({"translate"})
+        not_opted, _ = await burst(openai, bypass, "random", args.users, args.phrases)
+    finally:
+        await openai.stop()
+
+    errors_shared = await leader_error_shared()
+    report = singleflight.report()
+
+    print(f"користувачів: {args.users}, різних фраз: {args.phrases}, затримка OpenAI: {args.latency} с\n")
+    print(f"{'':>18} {'запитів до API':>15} {'час, с':>8}")
+    print(f"{'без single-flight':>18} {plain:>15} {plain_time:>8.2f}")
+    print(f"{'з single-flight':>18} {merged:>15} {merged_time:>8.2f}")
+    print(f"\nоб'єднано: {report['collapsed']}, лідерів: {report['leaders']}, "
+          f"частка об'єднаних: {report['collapse_rate']:.1%}")
+    print(f"функція без opt-in (random): {not_opted} запитів, пропущено повз: {bypass.stats.bypassed}")
+    print(f"помилка лідера дісталася всім: {'так' if errors_shared else 'НІ'}")
+
+    if merged != args.phrases or plain != args.users:
+        print("\n❌ Однакові запити не об'єднано (або об'єднано без single-flight)")
+        return 1
+    if not_opted != args.users or bypass.stats.collapsed:
+        print("\n❌ Об'єднано запити функції без opt-in")
+        return 1
+    if not errors_shared or singleflight.inflight:
+        print("\n❌ Помилка лідера не дісталася учасникам або реєстр не очищено")
+        return 1
+
+    print(f"\n✅ {args.users} однакових запитів → {merged} до API "
+          f"(-{1 - merged / plain:.0%}), opt-in дотримано")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,166 @@
+"""
+startup.py — час старту bot.py: імпорт і перше оброблене оновлення.
+
+Кожен прогін — новий процес Python (як справжній рестарт):
+    1. import bot — скільки коштує імпорт усіх модулів
+       (SDK openai не має імпортуватися: клієнт створюється ліниво);
+    2. build_app → initialize → on_startup → start;
+    3. /start у черзі оновлень → хендлер завершено.
+
+Час до першого оновлення рахується від запуску процесу.
+Фейкові Telegram і OpenAI працюють у процесі бенчмарка, сховище стану
+спільне для всіх прогонів: під час старту перший прогін надсилає
+меню команд, наступні — ні (хеш меню не змінився).
+
+Запуск:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --max-import 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TOKEN = "123456:TEST"
+CHAT_ID = 4242
+
+
+# ---------------------------------
+# Дочірній процес: справжній старт бота
+# ---------------------------------
+
+async def boot() -> dict:
+    started = time.perf_counter()
+    import bot
+    imported = time.perf_counter() - started
+    openai_loaded = "openai" in sys.modules
+
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    from benchmarks.fake_telegram import make_message_update
+
+    done = asyncio.Event()
+
+    async def finished(update, context):
+        done.set()
+
+    app = bot.build_app()
+    app.add_handler(TypeHandler(Update, finished), group=99)
+
+    await app.initialize()
+    await app.post_init(app)
+    await app.start()
+    ready = time.perf_counter() - started
+
+    await app.update_queue.put(Update.de_json(make_message_update(1, CHAT_ID, "/start"), app.bot))
+    await done.wait()
+    first_update_at = time.time()
+
+    await app.stop()
+    await app.shutdown()
+    await app.post_shutdown(app)
+
+    return {"import": imported, "ready": ready, "first_update_at": first_update_at, "openai": openai_loaded}
+
+
+# ---------------------------------
+# Бенчмарк
+# ---------------------------------
+
+def run_child(env: dict) -> dict:
+    spawned = time.time()
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data["first_update"] = data.pop("first_update_at") - spawned
+    return data
+
+
+def startup_commands(calls: list) -> int:
+    """Скільки разів меню команд надіслано під час старту (до першої відповіді в чат)."""
+    count = 0
+    for _, method, params in calls:
+        if params.get("chat_id") == CHAT_ID:
+            break
+        count += method == "setMyCommands"
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="скільки разів запустити бота")
+    parser.add_argument("--max-import", type=float, default=0.6, help="допустимий час import bot, с")
+    parser.add_argument("--max-first-update", type=float, default=2.0,
+                        help="допустимий час від запуску процесу до першого оновлення, с")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(boot())))
+        return 0
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.fake_telegram import FakeTelegramServer
+    from benchmarks.server_thread import ServerThread
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp, \
+            ServerThread(FakeTelegramServer(token=TOKEN)) as telegram, \
+            ServerThread(FakeOpenAIServer(latency=0.05)) as openai:
+        env = {
+            **os.environ,
+            "TELEGRAM_BOT_TOKEN": TOKEN,
+            "TELEGRAM_BASE_URL": telegram.base_url,
+            "OPENAI_API_KEY": "test",
+            "OPENAI_BASE_URL": openai.base_url,
+            "OPENAI_PROXY": "",
+            "STATE_DB": os.path.join(tmp, "state.sqlite3"),
+            "TRANSLATION_CACHE_DB": os.path.join(tmp, "translations.sqlite3"),
+            "MEDIA_CACHE_FILE": os.path.join(tmp, "file_ids.json"),
+            "METRICS_ENABLED": "false",
+            "TRACE_ENABLED": "false",
+        }
+        for i in range(args.runs):
+            calls_before = len(telegram.calls)
+            run = run_child(env)
+            run["set_my_commands"] = startup_commands(telegram.calls[calls_before:])
+            runs.append(run)
+            print(f"  прогін {i + 1}: import {run['import'] * 1000:6.0f} мс, "
+                  f"готовий {run['ready'] * 1000:6.0f} мс, перше оновлення {run['first_update'] * 1000:6.0f} мс, "
+                  f"set_my_commands: {run['set_my_commands']}")
+
+    import_s = sorted(r["import"] for r in runs)[len(runs) // 2]
+    first_update = sorted(r["first_update"] for r in runs)[len(runs) // 2]
+    print(f"\nмедіана: import bot {import_s * 1000:.0f} мс, перше оновлення {first_update * 1000:.0f} мс від запуску процесу")
+
+    failures = []
+    if any(r["openai"] for r in runs):
+        failures.append("import bot імпортує SDK openai")
+    if any(r["set_my_commands"] for r in runs[1:]):
+        failures.append("повторний старт знову надсилає set_my_commands")
+    if import_s > args.max_import:
+        failures.append(f"import bot довше за {args.max_import:.2f} с")
+    if first_update > args.max_first_update:
+        failures.append(f"перше оновлення пізніше за {args.max_first_update:.2f} с")
+
+    if failures:
+        print("\n❌ " + "; ".join(failures))
+        return 1
+
+    print(f"\n✅ Старт без SDK openai і без повторного меню: import {import_s * 1000:.0f} мс, "
+          f"перше оновлення через {first_update * 1000:.0f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+state_persistence.py — старт і запис стану: StatePersistence проти PicklePersistence.
+
+Заповнює сховище стану для N користувачів (типовий user_data: режим,
+рахунок квізу, поля резюме, використані факти), а потім вимірює:
+    - старт: скільки триває initialize-фаза persistence (get_user_data)
+      плюс перше звернення одного користувача;
+    - запис: K користувачів змінили по одному полю — скільки триває flush
+      і скільки байтів/рядків записано.
+
+PicklePersistence з PTB щоразу читає і переписує весь файл,
+StateStore читає лише потрібний запис і пише лише змінені поля.
+
+Запуск:
+    python -m benchmarks.state_persistence
+    python -m benchmarks.state_persistence --users 100000 --changed 200
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from telegram.ext import PicklePersistence, PersistenceInput
+
+from state_store import SqliteBackend, StatePersistence, StateStore
+
+
+def user_data(user_id: int) -> dict:
+    return {
+        "conversation_state": "quiz_waiting_answer",
+        "quiz_topic": "quiz_science",
+        "correct": user_id % 7,
+        "total": user_id % 11,
+        "current_question": f"Питання номер {user_id}: яка найбільша планета Сонячної системи?",
+        "current_answer": "Юпітер",
+        "current_aliases": ["Jupiter"],
+        "used_facts": [f"Факт {user_id}-{i}: восьминоги мають три серця." for i in range(10)],
+    }
+
+
+def pickle_persistence(path: Path) -> PicklePersistence:
+    # on_flush=True — найвигідніший для pickle режим: файл пишеться лише у flush(),
+    # а не після кожного update_user_data
+    return PicklePersistence(path, store_data=PersistenceInput(bot_data=False, callback_data=False),
+                             on_flush=True)
+
+
+async def bench_pickle(path: Path, args) -> dict:
+    persistence = pickle_persistence(path)
+    for user_id in range(args.users):
+        await persistence.update_user_data(user_id, user_data(user_id))
+    await persistence.flush()
+
+    persistence = pickle_persistence(path)
+    started = time.perf_counter()
+    users = await persistence.get_user_data()
+    _ = users.get(args.users - 1)
+    startup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for user_id in range(args.changed):
+        data = dict(users[user_id])
+        data["total"] += 1
+        await persistence.update_user_data(user_id, data)
+    await persistence.flush()
+    write = time.perf_counter() - started
+
+    return {"startup": startup, "write": write, "written": path.stat().st_size}
+
+
+async def bench_state(path: Path, args) -> dict:
+    store = StateStore(SqliteBackend(path), flush_delay=60, batch_size=10 ** 9)
+    for user_id in range(args.users):
+        store.save("user", user_id, user_data(user_id))
+    await store.close()
+
+    started = time.perf_counter()
+    store = StateStore(SqliteBackend(path), flush_delay=60, batch_size=10 ** 9)
+    persistence = StatePersistence(store)
+    users = await persistence.get_user_data()
+    hydrated = {}
+    await persistence.refresh_user_data(args.users - 1, hydrated)
+    startup = time.perf_counter() - started
+    assert hydrated == user_data(args.users - 1), "стан користувача не відновився"
+
+    # Активні користувачі вже довантажені в пам'ять (як і в PicklePersistence)
+    active = {}
+    for user_id in range(args.changed):
+        active[user_id] = {}
+        await persistence.refresh_user_data(user_id, active[user_id])
+
+    # PTB передає в update_user_data повну копію user_data
+    started = time.perf_counter()
+    for user_id, data in active.items():
+        data["total"] += 1
+        await persistence.update_user_data(user_id, dict(data))
+    await persistence.flush()
+    write = time.perf_counter() - started
+    writes = store.writes
+    await store.close()
+
+    assert not users, "StatePersistence не повинна читати всіх користувачів при старті"
+    return {"startup": startup, "write": write, "written": writes}
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000, help="користувачів у сховищі")
+    parser.add_argument("--changed", type=int, default=100, help="користувачів, чий стан змінився")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle = await bench_pickle(Path(tmp) / "state.pickle", args)
+        state = await bench_state(Path(tmp) / "state.sqlite3", args)
+
+    print(f"користувачів: {args.users}, змінили стан: {args.changed}\n")
+    print(f"{'':>20} {'старт, мс':>10} {'запис, мс':>10} {'записано':>18}")
+    print(f"{'PicklePersistence':>20} {pickle['startup'] * 1000:>10.1f} {pickle['write'] * 1000:>10.1f} "
+          f"{pickle['written'] / 1024:>14.0f} КБ")
+    print(f"{'StatePersistence':>20} {state['startup'] * 1000:>10.1f} {state['write'] * 1000:>10.1f} "
+          f"{state['written']:>12} полів")
+
+    if state["startup"] >= pickle["startup"] or state["write"] >= pickle["write"]:
+        print("\n❌ Інкрементальне сховище не швидше за повний pickle")
+        return 1
+
+    print(f"\n✅ Старт у {pickle['startup'] / state['startup']:.0f}× швидший, "
+          f"запис змін у {pickle['write'] / state['write']:.0f}× швидший")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,92 @@
+"""
+stream_latency.py — час до першого видимого фрагмента відповіді.
+
+Порівнює два режими /gpt на фейковому сервері OpenAI:
+- звичайний: користувач бачить відповідь лише після повної генерації
+- потоковий: StreamingMessageEditor редагує заглушку в міру надходження дельт
+
+Telegram замінено фейковим ботом, який лише фіксує час редагувань.
+
+Запуск:
+    python -m benchmarks.stream_latency --latency 0.4 --token-delay 0.02 --words 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from gpt_service import ChatGptService
+from gpt_session import ChatSessionManager
+from util import StreamingMessageEditor
+
+
+class RecordingBot:
+    """Фейковий бот: запам'ятовує момент і текст кожного редагування."""
+
+    def __init__(self):
+        self.edits: list[tuple[float, str]] = []
+
+    async def edit_message_text(self, text, chat_id, message_id, parse_mode=None, reply_markup=None):
+        await asyncio.sleep(0.05)  # умовна затримка Bot API
+        self.edits.append((time.perf_counter(), text))
+
+    async def send_message(self, chat_id, text, parse_mode=None, reply_markup=None):
+        self.edits.append((time.perf_counter(), text))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.4, help="затримка до першого токена, с")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="затримка між словами, с")
+    parser.add_argument("--words", type=int, default=200, help="довжина відповіді у словах")
+    parser.add_argument("--interval", type=float, default=1.0, help="мінімальний інтервал редагувань, с")
+    args = parser.parse_args()
+
+    reply = " ".join(f"слово{i}." for i in range(args.words))
+    server = FakeOpenAIServer(latency=args.latency, reply=reply, token_delay=args.token_delay)
+    await server.start()
+
+    service = ChatGptService("test", base_url=server.base_url)
+    session = await ChatSessionManager(service).get(1)
+    session.set_prompt("Ти тестовий бот.")
+
+    try:
+        # 1) Звичайний режим: перший видимий текст = повна відповідь
+        started = time.perf_counter()
+        await session.add_message("Питання")
+        full_time = time.perf_counter() - started
+
+        # 2) Потоковий режим
+        bot = RecordingBot()
+        editor = StreamingMessageEditor(bot, 1, 1, header="🤖 *Відповідь ChatGPT:*\n\n", interval=args.interval)
+
+        started = time.perf_counter()
+        async for delta in session.stream_message("Питання"):
+            await editor.push(delta)
+        await editor.finish()
+        stream_total = time.perf_counter() - started
+    finally:
+        await service.close()
+        await server.stop()
+
+    first_visible = bot.edits[0][0] - started
+    gaps = [b[0] - a[0] for a, b in zip(bot.edits, bot.edits[1:])]
+    min_gap = min(gaps) if gaps else 0.0
+
+    print(f"звичайний режим — перший видимий текст через: {full_time:.2f}s")
+    print(f"потоковий режим — перший видимий текст через: {first_visible:.2f}s")
+    print(f"потоковий режим — повна відповідь через:      {stream_total:.2f}s")
+    print(f"редагувань: {len(bot.edits)}, мін. проміжок між ними: {min_gap:.2f}s (інтервал {args.interval:.2f}s)")
+
+    if first_visible >= 1.0 or first_visible >= full_time:
+        print("❌ Потоковий режим не пришвидшив появу першого тексту")
+        return 1
+
+    print("✅ Перший фрагмент з'являється менш ніж за секунду")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
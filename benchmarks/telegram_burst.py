@@ -0,0 +1,130 @@
+"""
+telegram_burst.py — сплеск вихідних повідомлень проти flood control Telegram.
+
+Фейковий Bot API відповідає 429, якщо в чат іде більше 3 повідомлень
+на секунду або понад 30 запитів загалом (видалення рахуються лише
+в загальний ліміт). Кожен із N чатів одночасно отримує
+сплеск: відповіді користувачу, видалення заглушок і серію редагувань
+одного повідомлення (як при потоковій відповіді).
+
+Порівнює бота без обмежувача і з TelegramRateLimiter:
+    - скільки запитів втрачено (RetryAfter дійшов до хендлера);
+    - коли доставлено відповіді користувачу і коли — «косметику»;
+    - скільки редагувань схлопнуто.
+
+Запуск:
+    python -m benchmarks.telegram_burst
+    python -m benchmarks.telegram_burst --chats 40 --replies 4 --edits 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+
+from benchmarks.fake_telegram import FakeTelegramServer
+from rate_limiter import TelegramRateLimiter
+
+
+async def burst(bot: ExtBot, chat_id: int, stream_id: int, args, timings: dict, lost: list) -> None:
+    """Сплеск для одного чату: відповіді, видалення та редагування паралельно."""
+    started = time.perf_counter()
+
+    async def call(kind: str, coroutine):
+        try:
+            await coroutine
+            timings.setdefault(kind, []).append(time.perf_counter() - started)
+        except RetryAfter:
+            lost.append(kind)
+
+    tasks = [call("reply", bot.send_message(chat_id, f"відповідь {i}")) for i in range(args.replies)]
+    tasks += [call("delete", bot.delete_message(chat_id, 1000 + i)) for i in range(args.replies)]
+    tasks += [call("edit", bot.edit_message_text(f"частина {i}", chat_id, stream_id))
+              for i in range(args.edits)]
+    await asyncio.gather(*tasks)
+
+
+async def run(limited: bool, args) -> dict:
+    telegram = FakeTelegramServer(chat_limit=3, global_limit=30, retry_after=1)
+    await telegram.start()
+
+    limiter = TelegramRateLimiter() if limited else None
+    bot = ExtBot(telegram.token, base_url=telegram.base_url, rate_limiter=limiter)
+
+    timings: dict[str, list[float]] = {}
+    lost: list[str] = []
+    try:
+        async with bot:
+            # Заглушки для потокових відповідей — заздалегідь, поза сплеском
+            streams = []
+            for i in range(args.chats):
+                streams.append((await bot.send_message(1000 + i, "⏳")).message_id)
+                await asyncio.sleep(1 / 25)
+            await asyncio.sleep(1.1)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                burst(bot, 1000 + i, streams[i], args, timings, lost) for i in range(args.chats)
+            ))
+    finally:
+        await telegram.stop()
+
+    return {
+        "elapsed": time.perf_counter() - started,
+        "lost": len(lost),
+        "rejected": len(telegram.rejected),
+        "timings": timings,
+        "coalesced": limiter.coalesced if limiter else 0,
+        "edits_sent": len(telegram.methods("editMessageText")),
+    }
+
+
+def describe(name: str, result: dict, args) -> None:
+    total = args.chats * (args.replies * 2 + args.edits)
+    print(f"\n{name}")
+    print(f"  запитів: {total}, втрачено: {result['lost']}, відповідей 429 від сервера: {result['rejected']}")
+    print(f"  редагувань надіслано: {result['edits_sent']} із {args.chats * args.edits}, "
+          f"схлопнуто: {result['coalesced']}")
+    for kind in ("reply", "edit", "delete"):
+        values = result["timings"].get(kind)
+        if values:
+            print(f"  {kind:>6}: медіана {statistics.median(values):.2f} с, макс {max(values):.2f} с")
+    print(f"  загальний час: {result['elapsed']:.2f} с")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20, help="кількість чатів")
+    parser.add_argument("--replies", type=int, default=3, help="відповідей (і видалень) на чат")
+    parser.add_argument("--edits", type=int, default=10, help="редагувань одного повідомлення на чат")
+    args = parser.parse_args()
+
+    plain = await run(False, args)
+    limited = await run(True, args)
+
+    describe("Без обмежувача:", plain, args)
+    describe("З TelegramRateLimiter:", limited, args)
+
+    replies = statistics.median(limited["timings"]["reply"])
+    deletes = statistics.median(limited["timings"].get("delete", [0]))
+
+    if limited["lost"]:
+        print("\n❌ З обмежувачем усе ще втрачаються повідомлення")
+        return 1
+    if limited["rejected"]:
+        print("\n❌ Обмежувач не вкладається в ліміти: сервер відповідав 429")
+        return 1
+    if replies > deletes:
+        print("\n❌ Відповіді користувачу не мають пріоритету над видаленнями")
+        return 1
+
+    print("\n✅ Жодного 429 і втраченого повідомлення, відповіді — раніше за косметику")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,145 @@
+"""
+tracing_overhead.py — ціна трасування і перевірка розкладки повільного оновлення.
+
+1. Ціна одного span-а (мікросекунди):
+    - поза трасуванням (трасування вимкнене або оновлення не відстежується);
+    - у трасуванні, що не потрапило у вибірку (span-и збираються і відкидаються);
+    - у трасуванні, що записується у файл.
+
+2. Повільне «/quiz»: промпт, запит до фейкового OpenAI, два надсилання
+   через TelegramRateLimiter (фейковий Telegram із затримкою). Трасування
+   записується у тимчасовий файл і читається назад (scripts/trace_report.py):
+   усі span-и мають один trace id, кожен батько існує, час ChatGPT і
+   надсилань видно окремо.
+
+Запуск:
+    python -m benchmarks.tracing_overhead
+    python -m benchmarks.tracing_overhead --spans 100000 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from gpt_service import ChatGptService
+from rate_limiter import TelegramRateLimiter
+from scripts.trace_report import attributes, duration_ms, print_tree, read_traces, root_of
+from tracing import JsonlExporter, Tracer, span, tracer
+from util import load_prompt
+
+
+def span_cost(local: Tracer, count: int, sampled: bool) -> float:
+    """Мікросекунди на span у трасуваннях по 10 span-ів."""
+    local.sample_rate = 1.0 if sampled else 0.0
+    started = time.perf_counter()
+    for _ in range(count // 10):
+        with local.trace("update"):
+            for _ in range(9):
+                with local.span("child", feature="gpt"):
+                    pass
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def noop_cost(local: Tracer, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        with local.span("child", feature="gpt"):
+            pass
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def slow_quiz(latency: float, send_delay: float, path: Path) -> list[dict]:
+    """Одне «оновлення» /quiz із повним ланцюжком span-ів; повертає записані span-и."""
+    tracer.configure(JsonlExporter(path), sample_rate=0.0, slow_threshold=latency / 2)
+
+    openai = FakeOpenAIServer(latency=latency, reply="Правильно!")
+    await openai.start()
+    service = ChatGptService("test", base_url=openai.base_url)
+    limiter = TelegramRateLimiter()
+
+    async def telegram_call():
+        await asyncio.sleep(send_delay)
+        return True
+
+    try:
+        with tracer.trace("update", command="/quiz", **{"update.kind": "command"}):
+            prompt = load_prompt("quiz_science")
+            with span("send_text"):
+                await limiter.process_request(telegram_call, (), {}, "sendMessage", {"chat_id": 1}, None)
+            await service.send_question(prompt, "Яка планета найбільша?", feature="quiz_grade")
+            with span("progress.reply"):
+                await limiter.process_request(telegram_call, (), {}, "editMessageText",
+                                              {"chat_id": 1, "message_id": 5}, None)
+    finally:
+        await service.close()
+        await openai.stop()
+        tracer.close()
+        tracer.configure()
+
+    traces = read_traces(path)
+    return traces[0] if len(traces) == 1 else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=50_000, help="span-ів на вимірювання")
+    parser.add_argument("--latency", type=float, default=0.3, help="затримка фейкового OpenAI, с")
+    parser.add_argument("--send-delay", type=float, default=0.05, help="затримка фейкового Telegram, с")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local = Tracer(JsonlExporter(Path(tmp) / "bench.jsonl"), sample_rate=1.0)
+        disabled = noop_cost(local, args.spans)
+        unsampled = span_cost(local, args.spans, sampled=False)
+        sampled = span_cost(local, args.spans, sampled=True)
+        local.close()
+
+        spans = asyncio.run(slow_quiz(args.latency, args.send_delay, Path(tmp) / "quiz.jsonl"))
+
+    print(f"span поза трасуванням:        {disabled:6.2f} мкс")
+    print(f"span, трасування не у вибірці: {unsampled:6.2f} мкс")
+    print(f"span, трасування записується:  {sampled:6.2f} мкс\n")
+
+    if not spans:
+        print("❌ Повільне оновлення не записане")
+        return 1
+
+    print_tree(spans)
+
+    ids = {s["spanId"] for s in spans}
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s)
+    root = root_of(spans)
+
+    checks = {
+        "один trace id": len({s["traceId"] for s in spans}) == 1,
+        "батьки існують": all(s.get("parentSpanId") in ids for s in spans if s is not root),
+        "ChatGPT окремим span-ом": duration_ms(by_name["openai.chat_completion"][0]) >= args.latency * 1000,
+        "функція в атрибутах": attributes(by_name["gpt.send_question"][0]).get("feature") == "quiz_grade",
+        "мережа Telegram окремо": len(by_name.get("telegram.sendMessage", [])) == 1
+        and len(by_name.get("telegram.editMessageText", [])) == 1,
+        "промпт": "load_prompt" in by_name,
+    }
+    print()
+    for name, ok in checks.items():
+        print(f"  {'так' if ok else 'НІ':>3}  {name}")
+
+    if not all(checks.values()):
+        print("\n❌ Розкладка трасування неповна")
+        return 1
+    if unsampled > 20 or sampled > 50:
+        print("\n❌ Трасування надто дороге")
+        return 1
+
+    print(f"\n✅ Повільне оновлення розкладене на {len(spans)} span-ів; "
+          f"span коштує {unsampled:.1f} мкс (записаний — {sampled:.1f} мкс)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+update_concurrency.py — масштабування обробки оновлень із кількістю робітників.
+
+Application з ChatOrderedUpdateProcessor отримує N оновлень від M чатів.
+Хендлер, як і message_handler у режимі /gpt, робить повільний запит
+до фейкового OpenAI і відповідає через фейковий Telegram.
+
+Для кожної кількості робітників показує пропускну здатність і перевіряє:
+    - повідомлення одного чату оброблені в порядку надходження;
+    - у межах чату хендлери ніколи не виконувались одночасно.
+
+Фейкові сервери і бот працюють в одному процесі й ділять CPU,
+тому понад ~60 оновлень/с бенчмарк упирається в процесор,
+а не в кількість робітників — для більших значень збільште --latency.
+
+Запуск:
+    python -m benchmarks.update_concurrency
+    python -m benchmarks.update_concurrency --workers 1 4 16 64 --updates 400 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_telegram import FakeTelegramServer, make_message_update
+from gpt_service import ChatGptService
+from update_processor import ChatOrderedUpdateProcessor
+
+
+async def run(workers: int, args, telegram: FakeTelegramServer, service: ChatGptService) -> dict:
+    processed: dict[int, list[int]] = {}
+    active: dict[int, int] = {}
+    overlaps = 0
+    done = asyncio.Event()
+    count = 0
+
+    async def handler(update, context):
+        nonlocal overlaps, count
+        chat_id = update.effective_chat.id
+
+        active[chat_id] = active.get(chat_id, 0) + 1
+        if active[chat_id] > 1:
+            overlaps += 1
+
+        answer = await service.send_question("Ти тестовий бот.", update.message.text)
+        await update.message.reply_text(answer)
+
+        # Стан чату змінюється так само, як у справжніх хендлерах (context.chat_data)
+        context.chat_data["seen"] = context.chat_data.get("seen", 0) + 1
+        processed.setdefault(chat_id, []).append(update.update_id)
+
+        active[chat_id] -= 1
+        count += 1
+        if count == args.updates:
+            done.set()
+
+    processor = ChatOrderedUpdateProcessor(workers=workers, max_pending=args.updates)
+    app = (
+        ApplicationBuilder()
+        .token(telegram.token)
+        .base_url(telegram.base_url)
+        .updater(None)
+        .concurrent_updates(processor)
+        .build()
+    )
+    app.add_handler(MessageHandler(filters.TEXT, handler))
+
+    await app.initialize()
+    await app.start()
+
+    started = time.perf_counter()
+    for update_id in range(1, args.updates + 1):
+        chat_id = 1000 + update_id % args.chats
+        update = Update.de_json(make_message_update(update_id, chat_id, f"питання {update_id}"), app.bot)
+        await app.update_queue.put(update)
+
+    await asyncio.wait_for(done.wait(), timeout=600)
+    elapsed = time.perf_counter() - started
+
+    await app.stop()
+    await app.shutdown()
+
+    in_order = all(ids == sorted(ids) for ids in processed.values())
+    return {
+        "workers": workers,
+        "elapsed": elapsed,
+        "throughput": args.updates / elapsed,
+        "peak": processor.peak_active,
+        "in_order": in_order,
+        "overlaps": overlaps,
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--updates", type=int, default=200, help="кількість оновлень")
+    parser.add_argument("--chats", type=int, default=50, help="кількість різних чатів")
+    parser.add_argument("--latency", type=float, default=0.2, help="затримка фейкового OpenAI, с")
+    args = parser.parse_args()
+
+    openai = FakeOpenAIServer(latency=args.latency, reply="Відповідь.")
+    telegram = FakeTelegramServer()
+    await openai.start()
+    await telegram.start()
+
+    service = ChatGptService("test", base_url=openai.base_url, max_connections=max(args.workers),
+                             max_keepalive=max(args.workers))
+
+    results = []
+    try:
+        for workers in args.workers:
+            results.append(await run(workers, args, telegram, service))
+    finally:
+        await service.close()
+        await openai.stop()
+        await telegram.stop()
+
+    print(f"оновлень: {args.updates}, чатів: {args.chats}, затримка OpenAI: {args.latency} с\n")
+    print(f"{'робітників':>10} {'час, с':>8} {'оновл./с':>9} {'пік':>5} {'порядок':>8} {'накладки':>9}")
+    for r in results:
+        print(f"{r['workers']:>10} {r['elapsed']:>8.2f} {r['throughput']:>9.1f} {r['peak']:>5} "
+              f"{'так' if r['in_order'] else 'НІ':>8} {r['overlaps']:>9}")
+
+    base = results[0]["throughput"]
+    scaled = all(r["throughput"] >= base * min(r["workers"], args.chats) / results[0]["workers"] * 0.5
+                 for r in results)
+    correct = all(r["in_order"] and r["overlaps"] == 0 for r in results)
+
+    if not correct:
+        print("\n❌ Порушено порядок або паралельна обробка в межах чату")
+        return 1
+    if not scaled:
+        print("\n❌ Пропускна здатність не масштабується з кількістю робітників")
+        return 1
+
+    print("\n✅ Пропускна здатність росте з кількістю робітників, порядок у чатах збережено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,138 @@
+"""
+webhook_throughput.py — пропускна здатність режиму webhook.
+
+Піднімає фейковий Telegram Bot API, Application з простим
+хендлером-відлунням і WebhookServer, а потім надсилає на webhook
+N синтетичних оновлень з M паралельних з'єднань (як це робить Telegram).
+
+Показує:
+    - скільки оновлень за секунду приймає webhook (відповідь 200);
+    - час від POST до завершення хендлера (p50 / p99);
+    - що запити з неправильним секретом відхиляються (403).
+
+Запуск:
+    python -m benchmarks.webhook_throughput --updates 2000 --concurrency 50
+    python -m benchmarks.webhook_throughput --work-ms 20 --concurrent-updates 64
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from benchmarks.fake_telegram import FakeTelegramServer, make_message_update
+from webhook import SECRET_HEADER, WebhookServer
+
+SECRET = "bench-secret"
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000, help="кількість оновлень")
+    parser.add_argument("--concurrency", type=int, default=50, help="паралельних з'єднань до webhook")
+    parser.add_argument("--chats", type=int, default=200, help="кількість різних чатів")
+    parser.add_argument("--work-ms", type=float, default=0.0, help="імітація роботи хендлера, мс")
+    parser.add_argument("--concurrent-updates", type=int, default=1,
+                        help="скільки оновлень Application обробляє одночасно")
+    args = parser.parse_args()
+
+    telegram = FakeTelegramServer()
+    await telegram.start()
+
+    done = asyncio.Event()
+    latencies: list[float] = []
+    sent_at: dict[int, float] = {}
+
+    async def echo(update, context):
+        if args.work_ms:
+            await asyncio.sleep(args.work_ms / 1000)
+        await update.message.reply_text(update.message.text)
+        latencies.append(time.perf_counter() - sent_at[update.update_id])
+        if len(latencies) == args.updates:
+            done.set()
+
+    app = (
+        ApplicationBuilder()
+        .token(telegram.token)
+        .base_url(telegram.base_url)
+        .updater(None)
+        .concurrent_updates(args.concurrent_updates)
+        .build()
+    )
+    app.add_handler(MessageHandler(filters.TEXT, echo))
+
+    webhook = WebhookServer(app, path="/telegram", secret_token=SECRET, host="127.0.0.1", port=0)
+
+    await app.initialize()
+    await app.start()
+    await webhook.start()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    client = httpx.AsyncClient(limits=limits, timeout=30)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for update_id in range(1, args.updates + 1):
+        queue.put_nowait(update_id)
+
+    statuses: dict[int, int] = {}
+
+    async def sender():
+        while not queue.empty():
+            update_id = queue.get_nowait()
+            chat_id = 1000 + update_id % args.chats
+            sent_at[update_id] = time.perf_counter()
+            response = await client.post(
+                webhook.url,
+                json=make_message_update(update_id, chat_id, f"повідомлення {update_id}"),
+                headers={SECRET_HEADER: SECRET}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    try:
+        # Неправильний секрет має відхилятися
+        forbidden = await client.post(
+            webhook.url,
+            json=make_message_update(0, 1, "x"),
+            headers={SECRET_HEADER: "wrong"}
+        )
+        health = await client.get(webhook.url.replace("/telegram", "/healthz"))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender() for _ in range(args.concurrency)))
+        accepted_in = time.perf_counter() - started
+        await asyncio.wait_for(done.wait(), timeout=120)
+        processed_in = time.perf_counter() - started
+    finally:
+        await client.aclose()
+        await webhook.stop()
+        await app.stop()
+        await app.shutdown()
+        await telegram.stop()
+
+    print(f"оновлень: {args.updates}, з'єднань: {args.concurrency}, "
+          f"concurrent_updates: {args.concurrent_updates}, робота хендлера: {args.work_ms} мс")
+    print(f"статуси відповідей webhook: {statuses}")
+    print(f"прийнято: {args.updates / accepted_in:.0f} оновлень/с")
+    print(f"оброблено: {args.updates / processed_in:.0f} оновлень/с")
+    print(f"POST → хендлер завершено: p50 {statistics.median(latencies) * 1000:.1f} мс, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} мс")
+    print(f"неправильний секрет: {forbidden.status_code}, /healthz: {health.status_code}")
+
+    if forbidden.status_code != 403 or health.status_code != 200 or statuses.get(200) != args.updates:
+        print("❌ Webhook працює некоректно")
+        return 1
+
+    print("✅ Усі оновлення прийнято та оброблено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
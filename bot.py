@@ -1,13 +1,15 @@
 # ---------------------------------
 # Імпорти стандартних бібліотек
 # ---------------------------------
+import argparse
+import asyncio
 import logging
 
 # ---------------------------------
 # Імпорти сторонніх бібліотек
 # ---------------------------------
 from colorama import Fore, Style, init as colorama_init
-from telegram import Update, BotCommand
+from telegram import Bot, Update
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
@@ -20,16 +22,21 @@ from telegram.ext import (
 # Імпорти локальних модулів застосунку
 # ---------------------------------
 # ✅ функції з інших хендлерів
-from handlers.start import start_screen
-from handlers.random import random_fact, random_fact_button_handler
+from handlers.start import start_screen, menu_sync
+from handlers.random import random_fact, random_fact_button_handler, fact_service
 from handlers.gpt import gpt_handler
 from handlers.talk import talk_handler, talk_button_handler
-from handlers.quiz import quiz_handler, quiz_button_handler
-from handlers.translate import translate_handler, translate_button_handler
+from handlers.quiz import quiz_handler, quiz_button_handler, quiz_pool
+from handlers.translate import translate_handler, translate_button_handler, translation_cache
 from handlers.resume import resume_help_handler, resume_button_handler
 from handlers.message import message_handler
 
+# ✅ ChatGPT сервіс і сховище стану
+from gpt_instance import chat_gpt, response_cache, sessions, singleflight, state_store
+from state_store import StatePersistence
+
 # ✅ конфігурація та логування
+import config
 from credentials import BOT_TOKEN
 from logging_config import setup_logging
 from error_handler import handle_common_error
@@ -37,6 +44,27 @@ from error_handler import handle_common_error
 # ✅ утиліти
 from util import default_callback_handler
 
+# ✅ режим webhook
+from webhook import WebhookServer, run_webhook
+
+# ✅ кластер: ingress розподіляє оновлення між процесами-робітниками
+from ingress import IngressServer, run_ingress, spawn_workers, stop_workers
+
+# ✅ паралельна обробка оновлень із порядком у межах чату
+from update_processor import ChatOrderedUpdateProcessor
+
+# ✅ ліміти Telegram для вихідних повідомлень
+from rate_limiter import TelegramRateLimiter
+
+# ✅ реєстр ресурсів (промпти, повідомлення, команди)
+from resource_registry import registry
+
+# ✅ метрики Prometheus
+from metrics import MetricsServer, handler_for_message, registry as metrics, timed_handler
+
+# ✅ трасування оновлень
+from tracing import JsonlExporter, tracer
+
 
 # ------------------------------------------------------
 # ✅ ОФІЦІЙНЕ МЕНЮ КОМАНД TELEGRAM
@@ -45,18 +73,66 @@ from util import default_callback_handler
 # ------------------------------------------------------
 
 async def setup_bot_commands(app):
-    commands = [
-        BotCommand("start", "Головне меню · 🌟"),
-        BotCommand("random", "Випадковий факт · 🎲"),
-        BotCommand("gpt", "Поставити запитання ChatGPT · 🤖"),
-        BotCommand("talk", "Розмова з відомою особистістю · 👤"),
-        BotCommand("quiz", "Пройти квіз · 🧠"),
-        BotCommand("translate", "Перекладач · 🌐"),
-        BotCommand("resume_help", "Допомога з резюме · 💼"),
-    ]
+    """
+    Меню команд із resources/messages/commands.json. Надсилається лише тоді,
+    коли воно змінилося з останнього успішного надсилання (див. menu_sync.py).
+    """
+    await menu_sync.sync_commands(app.bot)
 
-    await app.bot.set_my_commands(commands)
-    print("✅ MENU UPDATED — sent to Telegram")
+
+# ------------------------------------------------------
+# ✅ МЕТРИКИ
+#     Лічильники хендлерів, OpenAI і Telegram оновлюються
+#     на місці; значення нижче зчитуються під час scrape.
+# ------------------------------------------------------
+
+metrics_server: MetricsServer | None = None
+
+
+def register_gauges():
+    metrics.gauge("bot_active_sessions", "Сесії розмов у пам'яті", lambda: len(sessions))
+    metrics.gauge(
+        "bot_cache_hit_ratio", "Частка влучань кешів",
+        lambda: {
+            "response": response_cache.stats.hit_rate if response_cache else 0.0,
+            "translation": translation_cache.stats.hit_rate,
+            "quiz_pool": quiz_pool.hit_ratio(),
+            "singleflight": singleflight.stats.collapse_rate,
+        },
+        labels=("cache",)
+    )
+
+
+async def on_startup(app):
+    """Виконується після ініціалізації бота."""
+    await setup_bot_commands(app)
+
+    # ✅ локальний ендпоінт /metrics
+    if metrics_server is not None:
+        await metrics_server.start()
+
+    # ✅ гаряче перезавантаження промптів без рестарту
+    registry.start_watching(config.RESOURCES_RELOAD_INTERVAL)
+
+    # ✅ фонове наповнення пулу питань квізу
+    quiz_pool.start()
+
+    # ✅ з'єднання з OpenAI відкривається у фоні — старт на нього не чекає
+    if config.OPENAI_WARM_UP:
+        app.create_task(chat_gpt.warm_up(), name="openai_warm_up")
+
+
+async def on_shutdown(app):
+    """Закриває пул з'єднань ChatGPT, записує стан та зупиняє фонові задачі."""
+    if metrics_server is not None:
+        await metrics_server.stop()
+    await registry.stop_watching()
+    await quiz_pool.stop()
+    await fact_service.close()
+    await translation_cache.close()
+    await state_store.close()
+    await chat_gpt.close()
+    tracer.close()
 
 
 # ---------------------------------
@@ -81,87 +157,236 @@ console_format = logging.Formatter(
 )
 
 
+# ---------------------------------
+# ✅ Перевірка ресурсів: відсутній промпт зупиняє запуск
+# ---------------------------------
+registry.validate()
+
+
 # ---------------------------------
 # ✅ Ініціалізація Telegram-бота
 # ---------------------------------
-app = ApplicationBuilder().token(BOT_TOKEN).build()
-
-# ✅ автоматичне встановлення меню команд
-app.post_init = setup_bot_commands
-
-
-# -------------------------------------------
-# ✅ Реєстрація всіх команд
-# -------------------------------------------
-app.add_handler(CommandHandler('start', start_screen))
-app.add_handler(CommandHandler('random', random_fact))
-app.add_handler(CommandHandler('gpt', gpt_handler))
-app.add_handler(CommandHandler('talk', talk_handler))
-app.add_handler(CommandHandler('quiz', quiz_handler))
-app.add_handler(CommandHandler('translate', translate_handler))
-app.add_handler(CommandHandler('resume_help', resume_help_handler))
-
-
-# -------------------------------------------
-# ✅ Callback для кнопок Випадкових Фактів
-# -------------------------------------------
-app.add_handler(CallbackQueryHandler(
-    random_fact_button_handler,
-    pattern='^(random|start)$'
-))
-
-# -------------------------------------------
-# ✅ Callback для TALK
-# -------------------------------------------
-app.add_handler(CallbackQueryHandler(
-    talk_button_handler,
-    pattern=r'^(talk_|start$)'
-))
-
-# -------------------------------------------
-# ✅ Callback для QUIZ
-#    тут обробляються:
-#    - вибір теми (quiz_science…)
-#    - наступне питання (quiz_next)
-#    - змінити тему (quiz_change_topic)
-#    - завершити (start)
-# -------------------------------------------
-app.add_handler(CallbackQueryHandler(
-    quiz_button_handler,
-    pattern=r'^(quiz_|quiz_next|quiz_change_topic|start$)'
-))
-
-# -------------------------------------------
-# ✅ Callback для кнопок Перекладача
-#    Обробляє:
-#    - вибір мови (translate_*)
-#    - зміну мови (translate_change)
-#    - завершення (start)
-# -------------------------------------------
-app.add_handler(
-    CallbackQueryHandler(
-        translate_button_handler,
-        pattern=r'^(translate_|translate_change|start$)'
+def build_app():
+    """Створює Application з усіма хендлерами (спільне для polling і webhook)."""
+    builder = ApplicationBuilder().token(BOT_TOKEN)
+    if config.TELEGRAM_BASE_URL:
+        builder = builder.base_url(config.TELEGRAM_BASE_URL)
+
+    app = (
+        builder
+        .concurrent_updates(ChatOrderedUpdateProcessor(
+            workers=config.UPDATE_WORKERS,
+            max_pending=config.UPDATE_MAX_PENDING
+        ))
+        .persistence(StatePersistence(state_store, update_interval=config.STATE_UPDATE_INTERVAL))
+        .rate_limiter(TelegramRateLimiter(
+            global_rate=config.TELEGRAM_GLOBAL_RATE,
+            global_burst=config.TELEGRAM_GLOBAL_BURST,
+            chat_rate=config.TELEGRAM_CHAT_RATE,
+            group_rate=config.TELEGRAM_GROUP_RATE,
+            burst=config.TELEGRAM_CHAT_BURST,
+            max_retries=config.TELEGRAM_MAX_RETRIES
+        ))
+        .build()
     )
-)
 
-# ------------------------------------------------
-# ✅ CALLBACK для РЕЗЮМЕ
-# ------------------------------------------------
-app.add_handler(CallbackQueryHandler(
-    resume_button_handler,
-    pattern=r'^(resume_restart|start$)'
-))
+    # ✅ автоматичне встановлення меню команд та фонові задачі
+    app.post_init = on_startup
+
+    # ✅ коректне закриття HTTP-клієнта ChatGPT
+    app.post_shutdown = on_shutdown
+
+
+    # -------------------------------------------
+    # ✅ Реєстрація всіх команд
+    # -------------------------------------------
+    app.add_handler(CommandHandler('start', start_screen))
+    app.add_handler(CommandHandler('random', timed_handler("random")(random_fact)))
+    app.add_handler(CommandHandler('gpt', timed_handler("gpt")(gpt_handler)))
+    app.add_handler(CommandHandler('talk', timed_handler("talk")(talk_handler)))
+    app.add_handler(CommandHandler('quiz', timed_handler("quiz")(quiz_handler)))
+    app.add_handler(CommandHandler('translate', timed_handler("translate")(translate_handler)))
+    app.add_handler(CommandHandler('resume_help', timed_handler("resume")(resume_help_handler)))
+
+
+    # -------------------------------------------
+    # ✅ Callback для кнопок Випадкових Фактів
+    # -------------------------------------------
+    app.add_handler(CallbackQueryHandler(
+        timed_handler("random")(random_fact_button_handler),
+        pattern='^(random|start)$'
+    ))
+
+    # -------------------------------------------
+    # ✅ Callback для TALK
+    # -------------------------------------------
+    app.add_handler(CallbackQueryHandler(
+        timed_handler("talk")(talk_button_handler),
+        pattern=r'^(talk_|start$)'
+    ))
+
+    # -------------------------------------------
+    # ✅ Callback для QUIZ
+    #    тут обробляються:
+    #    - вибір теми (quiz_science…)
+    #    - наступне питання (quiz_next)
+    #    - змінити тему (quiz_change_topic)
+    #    - завершити (start)
+    # -------------------------------------------
+    app.add_handler(CallbackQueryHandler(
+        timed_handler("quiz")(quiz_button_handler),
+        pattern=r'^(quiz_|quiz_next|quiz_change_topic|start$)'
+    ))
+
+    # -------------------------------------------
+    # ✅ Callback для кнопок Перекладача
+    #    Обробляє:
+    #    - вибір мови (translate_*)
+    #    - зміну мови (translate_change)
+    #    - завершення (start)
+    # -------------------------------------------
+    app.add_handler(
+        CallbackQueryHandler(
+            timed_handler("translate")(translate_button_handler),
+            pattern=r'^(translate_|translate_change|start$)'
+        )
+    )
+
+    # ------------------------------------------------
+    # ✅ CALLBACK для РЕЗЮМЕ
+    # ------------------------------------------------
+    app.add_handler(CallbackQueryHandler(
+        timed_handler("resume")(resume_button_handler),
+        pattern=r'^(resume_restart|start$)'
+    ))
+
+
+    # ✅ Загальний обробник текстових повідомлень
+    app.add_handler(MessageHandler(
+        filters.TEXT & ~filters.COMMAND,
+        timed_handler(handler_for_message)(message_handler)
+    ))
+
+    # ✅ Fallback для кнопок без логіки
+    app.add_handler(CallbackQueryHandler(default_callback_handler))
+
+    # ✅ Обробник помилок
+    app.add_error_handler(handle_common_error)
+
+    return app
+
+
+# ---------------------------------
+# ✅ Запуск бота: long polling або webhook
+# ---------------------------------
+def ingress_bot() -> Bot:
+    """Bot для ingress (setWebhook) — з тією ж адресою Bot API, що й Application."""
+    if config.TELEGRAM_BASE_URL:
+        return Bot(BOT_TOKEN, base_url=config.TELEGRAM_BASE_URL)
+    return Bot(BOT_TOKEN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telegram GPT бот")
+    parser.add_argument(
+        "--mode",
+        choices=("polling", "webhook", "ingress", "worker", "cluster"),
+        default=config.BOT_MODE,
+        help="спосіб отримання оновлень (за замовчуванням — BOT_MODE з .env)"
+    )
+    parser.add_argument("--port", type=int, default=config.SHARD_PORT, help="порт робітника (--mode worker)")
+    parser.add_argument("--workers", type=int, default=config.CLUSTER_WORKERS,
+                        help="кількість робітників (--mode cluster)")
+    args = parser.parse_args()
+
+    webhook_url = None
+    if config.WEBHOOK_URL and config.WEBHOOK_SET:
+        webhook_url = config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH
+
+    if args.mode in ("webhook", "ingress", "cluster") and not config.WEBHOOK_SECRET:
+        logger.warning("⚠️ WEBHOOK_SECRET не задано — запити до webhook не перевіряються")
+
+    # Кластер: ingress у цьому процесі, робітники — дочірні процеси на одному хості
+    if args.mode in ("ingress", "cluster"):
+        workers = []
+        worker_urls = config.SHARD_WORKERS
+        if args.mode == "cluster":
+            workers = spawn_workers(args.workers, config.SHARD_PORT)
+            worker_urls = [
+                f"http://{config.SHARD_HOST}:{config.SHARD_PORT + i}{config.SHARD_PATH}"
+                for i in range(args.workers)
+            ]
+
+        server = IngressServer(
+            worker_urls,
+            path=config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET,
+            worker_secret=config.SHARD_SECRET,
+            host=config.WEBHOOK_HOST,
+            port=config.WEBHOOK_PORT,
+            retries=config.SHARD_RETRIES
+        )
+        try:
+            asyncio.run(run_ingress(server, ingress_bot(), webhook_url=webhook_url))
+        finally:
+            stop_workers(workers)
+        return
+
+    app = build_app()
+
+    # ✅ метрики: кожен робітник кластера — на власному порту (METRICS_PORT + 1 + номер)
+    global metrics_server
+    if config.METRICS_ENABLED:
+        register_gauges()
+        port = config.METRICS_PORT
+        if args.mode == "worker":
+            port += 1 + args.port - config.SHARD_PORT
+        metrics_server = MetricsServer(metrics, host=config.METRICS_HOST, port=port)
+
+    # ✅ трасування: вибірка + усі повільні оновлення
+    if config.TRACE_ENABLED:
+        trace_file = config.TRACE_FILE
+        if args.mode == "worker":
+            trace_file = trace_file.replace(".jsonl", f"-{args.port}.jsonl")
+        tracer.configure(
+            JsonlExporter(trace_file),
+            sample_rate=config.TRACE_SAMPLE_RATE,
+            slow_threshold=config.TRACE_SLOW_MS / 1000
+        )
 
+    if args.mode == "polling":
+        app.run_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
+        return
 
-# ✅ Загальний обробник текстових повідомлень
-app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
+    # Webhook / робітник кластера: post_init / post_shutdown викликає run_webhook
+    if args.mode == "worker":
+        server = WebhookServer(
+            app,
+            path=config.SHARD_PATH,
+            secret_token=config.SHARD_SECRET,
+            host=config.SHARD_HOST,
+            port=args.port,
+            dedupe=config.SHARD_DEDUPE
+        )
+        webhook_url = None  # webhook реєструє ingress
+    else:
+        server = WebhookServer(
+            app,
+            path=config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET,
+            host=config.WEBHOOK_HOST,
+            port=config.WEBHOOK_PORT,
+            dedupe=config.SHARD_DEDUPE
+        )
 
-# ✅ Fallback для кнопок без логіки
-app.add_handler(CallbackQueryHandler(default_callback_handler))
+    asyncio.run(run_webhook(
+        app,
+        server,
+        webhook_url=webhook_url,
+        on_startup=on_startup,
+        on_shutdown=on_shutdown
+    ))
 
-# ✅ Обробник помилок
-app.add_error_handler(handle_common_error)
 
-# ✅ Запуск бота
-app.run_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
+if __name__ == "__main__":
+    main()
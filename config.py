@@ -0,0 +1,299 @@
+"""
+Модуль config.py
+----------------
+Зчитує технічні налаштування застосунку зі змінних середовища (.env).
+Токени живуть окремо — у credentials.py.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Завантажує .env у змінні середовища
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Повертає ціле значення змінної середовища або значення за замовчуванням."""
+    value = os.getenv(name, "")
+    return int(value) if value.strip() else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Повертає дробове значення змінної середовища або значення за замовчуванням."""
+    value = os.getenv(name, "")
+    return float(value) if value.strip() else default
+
+
+def _env_ttls(name: str, default: str) -> dict[str, float]:
+    """Розбирає рядок виду "random=0,translate=86400" у словник {функція: TTL}."""
+    ttls = {}
+    for item in os.getenv(name, default).split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            ttls[key.strip()] = float(value)
+    return ttls
+
+
+def _env_map(name: str, default: str) -> dict[str, str]:
+    """Розбирає рядок виду "random=typing,resume=edit" у словник {функція: значення}."""
+    values = {}
+    for item in os.getenv(name, default).split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            values[key.strip()] = value.strip()
+    return values
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Повертає логічне значення змінної середовища (True/1/yes) або значення за замовчуванням."""
+    value = os.getenv(name, "")
+    return value.strip().lower() in ("1", "true", "yes") if value.strip() else default
+
+
+# ---------------------------------
+# 🧠 OpenAI / ChatGPT клієнт
+# ---------------------------------
+# Альтернативна адреса API (наприклад, локальний фейковий сервер для тестів)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Проксі для запитів до OpenAI (порожнє значення — без проксі)
+OPENAI_PROXY = os.getenv("OPENAI_PROXY", "http://18.199.183.77:49232") or None
+
+# Пул з'єднань: скільки запитів до OpenAI може йти одночасно
+OPENAI_MAX_CONNECTIONS = _env_int("OPENAI_MAX_CONNECTIONS", 20)
+OPENAI_MAX_KEEPALIVE = _env_int("OPENAI_MAX_KEEPALIVE", 10)
+
+# Таймаути (секунди)
+OPENAI_CONNECT_TIMEOUT = _env_float("OPENAI_CONNECT_TIMEOUT", 10.0)
+OPENAI_READ_TIMEOUT = _env_float("OPENAI_READ_TIMEOUT", 60.0)
+
+# Відкривати з'єднання з OpenAI у фоні одразу після старту (перший запит не чекає на TLS)
+OPENAI_WARM_UP = _env_bool("OPENAI_WARM_UP", True)
+
+# Модель за замовчуванням і профілі за функціями бота:
+# функція=модель:max_tokens:temperature[:таймаут основної моделі, с]
+# (порожня модель — OPENAI_MODEL)
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+GPT_MODEL_ROUTES = _env_map(
+    "GPT_MODEL_ROUTES",
+    "gpt=:3000:0.9,talk=:1500:0.9,random=:800:1.0,quiz_pool=:1200:0.9,"
+    "quiz_grade=gpt-4o-mini:200:0.2,translate=gpt-4o-mini:1500:0.3,"
+    "resume=:2000:0.5,history_summary=gpt-4o-mini:500:0.3"
+)
+
+# Запасна модель, якщо основна не відповіла за таймаут або перевантажена (порожнє — вимкнено);
+# таймаут за замовчуванням — із запасом на довгу непотокову відповідь (3000 токенів)
+OPENAI_FALLBACK_MODEL = os.getenv("OPENAI_FALLBACK_MODEL", "gpt-4o-mini") or None
+OPENAI_FALLBACK_TIMEOUT = _env_float("OPENAI_FALLBACK_TIMEOUT", 45.0)
+
+# ---------------------------------
+# 💬 Сесії розмов (окрема історія на кожен чат)
+# ---------------------------------
+GPT_SESSION_MAX = _env_int("GPT_SESSION_MAX", 1000)
+GPT_SESSION_TTL = _env_float("GPT_SESSION_TTL", 3600.0)
+GPT_SESSION_MAX_CHARS = _env_int("GPT_SESSION_MAX_CHARS", 5_000_000)
+
+# Бюджет токенів історії діалогу (/gpt, /talk) та фонове стискання старих реплік
+GPT_HISTORY_TOKEN_BUDGET = _env_int("GPT_HISTORY_TOKEN_BUDGET", 3000)
+GPT_HISTORY_SUMMARY = _env_bool("GPT_HISTORY_SUMMARY", True)
+
+# Потокові відповіді в /gpt та /talk: заглушка редагується не частіше, ніж раз на N мс
+GPT_STREAMING = _env_bool("GPT_STREAMING", True)
+STREAM_EDIT_INTERVAL_MS = _env_int("STREAM_EDIT_INTERVAL_MS", 1000)
+
+# ---------------------------------
+# 🖼 Медіа
+# ---------------------------------
+# Файл кешу Telegram file_id для картинок із resources/images
+MEDIA_CACHE_FILE = os.getenv("MEDIA_CACHE_FILE", "data/telegram_file_ids.json")
+
+# ---------------------------------
+# 📝 Ресурси (промпти та повідомлення)
+# ---------------------------------
+# Як часто (секунди) перевіряти зміни файлів у resources/ (0 — вимкнено)
+RESOURCES_RELOAD_INTERVAL = _env_float("RESOURCES_RELOAD_INTERVAL", 2.0)
+
+# ---------------------------------
+# 🧠 Пул питань квізу
+# ---------------------------------
+# Скільки питань тримати напоготові для кожної теми та скільки генерувати за запит
+QUIZ_POOL_DEPTH = _env_int("QUIZ_POOL_DEPTH", 5)
+QUIZ_POOL_BATCH = _env_int("QUIZ_POOL_BATCH", 5)
+
+# Мінімальна пауза (секунди) між пакетними запитами фонового поповнення
+QUIZ_POOL_REFILL_INTERVAL = _env_float("QUIZ_POOL_REFILL_INTERVAL", 1.0)
+
+# Скільки останніх виданих питань пам'ятати, щоб не повторювати їх
+QUIZ_RECENT_SIZE = _env_int("QUIZ_RECENT_SIZE", 200)
+
+# Локальна перевірка відповідей: схожість >= ACCEPT — правильно, <= REJECT — ні,
+# між порогами — відповідь оцінює ChatGPT
+QUIZ_GRADE_ACCEPT = _env_float("QUIZ_GRADE_ACCEPT", 0.85)
+QUIZ_GRADE_REJECT = _env_float("QUIZ_GRADE_REJECT", 0.5)
+
+# ---------------------------------
+# 🎲 Випадкові факти
+# ---------------------------------
+# Скільки фактів генерувати за один запит; при скількох у буфері поповнювати у фоні
+FACTS_BATCH_SIZE = _env_int("FACTS_BATCH_SIZE", 5)
+FACTS_LOW_WATER = _env_int("FACTS_LOW_WATER", 1)
+
+# Схожість шинглів (0..1), від якої факт вважається повтором
+FACTS_SIMILARITY = _env_float("FACTS_SIMILARITY", 0.3)
+
+# ---------------------------------
+# 🌐 Кеш перекладів
+# ---------------------------------
+# Скільки перекладів тримати в пам'яті (LRU)
+TRANSLATION_CACHE_SIZE = _env_int("TRANSLATION_CACHE_SIZE", 1000)
+
+# Файл SQLite для перекладів на диску (порожнє значення — лише пам'ять)
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB", "data/translations.sqlite3") or None
+
+# ---------------------------------
+# 🗃 Кеш відповідей ChatGPT (одноразові запити send_question)
+# ---------------------------------
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_SIZE = _env_int("RESPONSE_CACHE_SIZE", 2000)
+
+# TTL (секунди) за функціями; 0 — без кешу (потрібна різноманітність відповідей).
+# Переклади сюди не потрапляють — їх кешує TranslationCache (точний збіг тексту)
+RESPONSE_CACHE_TTLS = _env_ttls(
+    "RESPONSE_CACHE_TTLS",
+    "random=0,quiz_pool=0,quiz_grade=86400,resume=3600,history_summary=0"
+)
+RESPONSE_CACHE_DEFAULT_TTL = _env_float("RESPONSE_CACHE_DEFAULT_TTL", 3600.0)
+
+# Функції, для яких дозволено пошук майже-дублікатів (MinHash), та поріг схожості;
+# для translate і quiz_grade — ніколи (відповідь має відповідати точному тексту)
+RESPONSE_CACHE_NEAR_FEATURES = set(filter(None, os.getenv("RESPONSE_CACHE_NEAR_FEATURES", "").split(",")))
+RESPONSE_CACHE_NEAR_THRESHOLD = _env_float("RESPONSE_CACHE_NEAR_THRESHOLD", 0.9)
+
+# Функції, для яких однакові одночасні запити об'єднуються в один (single-flight)
+SINGLEFLIGHT_FEATURES = set(filter(None, os.getenv("SINGLEFLIGHT_FEATURES", "quiz_grade,translate").split(",")))
+
+# ---------------------------------
+# 🌐 Режим отримання оновлень: polling або webhook
+# ---------------------------------
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+# Публічна адреса бота (https://...), шлях і секрет webhook
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Адреса, яку слухає HTTP-сервер бота
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = _env_int("WEBHOOK_PORT", 8080)
+
+# Чи викликати setWebhook при старті (на додаткових репліках можна вимкнути)
+WEBHOOK_SET = _env_bool("WEBHOOK_SET", True)
+
+# ---------------------------------
+# ⚙️ Обробка оновлень
+# ---------------------------------
+# Скільки оновлень (різних чатів) обробляються одночасно; в одному чаті — завжди по черзі
+UPDATE_WORKERS = _env_int("UPDATE_WORKERS", 16)
+
+# Загальна межа оновлень в обробці (разом із тими, що чекають у черзі свого чату)
+UPDATE_MAX_PENDING = _env_int("UPDATE_MAX_PENDING", 1024)
+
+# ---------------------------------
+# 📤 Вихідні повідомлення Telegram
+# ---------------------------------
+# Альтернативна адреса Bot API (локальний telegram-bot-api або фейковий сервер бенчмарків)
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL") or None
+
+# Повідомлень за секунду на бота загалом і дозволений сплеск
+# (за будь-яку секунду проходить не більше rate + burst — тримаємо запас від ліміту 30)
+TELEGRAM_GLOBAL_RATE = _env_float("TELEGRAM_GLOBAL_RATE", 25.0)
+TELEGRAM_GLOBAL_BURST = _env_int("TELEGRAM_GLOBAL_BURST", 5)
+
+# Повідомлень за секунду в особистому чаті / в групі (~20 на хвилину) і сплеск у чаті
+TELEGRAM_CHAT_RATE = _env_float("TELEGRAM_CHAT_RATE", 1.0)
+TELEGRAM_GROUP_RATE = _env_float("TELEGRAM_GROUP_RATE", 0.33)
+TELEGRAM_CHAT_BURST = _env_int("TELEGRAM_CHAT_BURST", 2)
+
+# Скільки разів повторювати запит після RetryAfter
+TELEGRAM_MAX_RETRIES = _env_int("TELEGRAM_MAX_RETRIES", 3)
+
+# ---------------------------------
+# ⏳ Індикація очікування відповіді ChatGPT
+# ---------------------------------
+# Режим для кожної функції:
+#   typing  — статус «друкує…» (sendChatAction), відповідь — окремим повідомленням;
+#   edit    — заглушка «🔍 …», яка редагується у фінальну відповідь;
+#   message — заглушка, яка видаляється перед відповіддю (старий спосіб).
+PROGRESS_MODES = _env_map(
+    "PROGRESS_MODES",
+    "random=typing,quiz_question=edit,quiz_grade=typing,resume=edit,gpt=typing,talk=typing,translate=typing"
+)
+PROGRESS_DEFAULT_MODE = os.getenv("PROGRESS_DEFAULT_MODE", "typing")
+
+# Індикація з'являється, лише якщо відповідь готується довше (кеш і пул відповідають миттєво)
+PROGRESS_DELAY_MS = _env_int("PROGRESS_DELAY_MS", 500)
+
+# Як часто повторювати «друкує…» (Telegram показує статус ~5 секунд)
+PROGRESS_TYPING_INTERVAL = _env_float("PROGRESS_TYPING_INTERVAL", 4.5)
+
+# ---------------------------------
+# 💾 Збереження стану між перезапусками
+# ---------------------------------
+# Бекенд: sqlite (файл), redis (потрібен пакет redis) або memory (без збереження)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+STATE_DB = os.getenv("STATE_DB", "data/state.sqlite3")
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://localhost:6379/0")
+
+# Відкладений запис: пачка змін пишеться через N секунд або при заповненні буфера
+STATE_FLUSH_DELAY = _env_float("STATE_FLUSH_DELAY", 1.0)
+STATE_BATCH_SIZE = _env_int("STATE_BATCH_SIZE", 500)
+
+# Скільки записів (чатів/користувачів) тримати в пам'яті з хешами збережених полів
+STATE_CACHE_RECORDS = _env_int("STATE_CACHE_RECORDS", 10_000)
+
+# Як часто PTB передає змінені user_data/chat_data у сховище, секунди
+STATE_UPDATE_INTERVAL = _env_float("STATE_UPDATE_INTERVAL", 5.0)
+
+# ---------------------------------
+# 🧩 Кластер: ingress + робітники (bot.py --mode ingress|worker|cluster)
+# ---------------------------------
+# Адреси робітників для ingress через кому (порядок = номер шарду; не змінювати без потреби)
+SHARD_WORKERS = [url.strip() for url in os.getenv("SHARD_WORKERS", "").split(",") if url.strip()]
+
+# Ендпоінт робітника для оновлень від ingress і секрет, яким ingress їх підписує
+SHARD_PATH = os.getenv("SHARD_PATH", "/update")
+SHARD_SECRET = os.getenv("SHARD_SECRET", "")
+SHARD_HOST = os.getenv("SHARD_HOST", "127.0.0.1")
+SHARD_PORT = _env_int("SHARD_PORT", 8081)
+
+# Скільки останніх update_id пам'ятає робітник, щоб не обробити повтор
+SHARD_DEDUPE = _env_int("SHARD_DEDUPE", 10000)
+
+# Скільки разів ingress повторює пересилання, перш ніж відповісти Telegram 503
+SHARD_RETRIES = _env_int("SHARD_RETRIES", 3)
+
+# Кількість робітників-процесів для --mode cluster (на одному хості)
+CLUSTER_WORKERS = _env_int("CLUSTER_WORKERS", 2)
+
+
+# ---------------------------------
+# 📈 Метрики Prometheus (GET /metrics на локальному порту)
+# ---------------------------------
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Робітники кластера (--mode worker) слухають METRICS_PORT + 1 + номер робітника
+METRICS_PORT = _env_int("METRICS_PORT", 9100)
+
+
+# ---------------------------------
+# 🔎 Трасування оновлень (span-и хендлер → ChatGPT → Telegram)
+# ---------------------------------
+TRACE_ENABLED = _env_bool("TRACE_ENABLED", True)
+
+# Файл JSON Lines (OTLP/JSON); робітники кластера пишуть у власні файли (traces-<порт>.jsonl)
+TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+
+# Частка оновлень, що записуються завжди, і поріг (мс), після якого записується будь-яке оновлення
+TRACE_SAMPLE_RATE = _env_float("TRACE_SAMPLE_RATE", 0.01)
+TRACE_SLOW_MS = _env_int("TRACE_SLOW_MS", 5000)
@@ -0,0 +1,174 @@
+"""
+facts.py — випадкові факти для /random пачками з буфером на користувача.
+
+Один запит до ChatGPT повертає одразу кілька фактів, які складаються
+в буфер користувача (context.user_data) і видаються по одному на
+«Хочу ще факт». Коли в буфері лишається мало фактів, наступна пачка
+генерується у фоні — користувач не чекає.
+
+Повтори відсіюються не точним порівнянням рядків, а схожістю
+символьних шинглів (Jaccard) з історією показаних фактів,
+тож перефразований той самий факт теж вважається повтором.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Інструкція для пакетної генерації (додається до промпту random)
+BATCH_REQUEST = (
+    "Дай мені {count} різних цікавих фактів із різних галузей, кожен коротко.\n"
+    "Поверни ТІЛЬКИ JSON-масив рядків, без жодного іншого тексту:\n"
+    '["перший факт", "другий факт"]'
+)
+
+# Ключі в context.user_data
+BUFFER_KEY = "fact_buffer"
+HISTORY_KEY = "used_facts"
+
+SHINGLE_SIZE = 3
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> frozenset[str]:
+    """Множина символьних n-грам нормалізованого тексту."""
+    text = " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+    if len(text) <= size:
+        return frozenset({text})
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Коефіцієнт Жаккара двох множин шинглів."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def parse_facts(raw: str) -> list[str]:
+    """Факти з відповіді моделі: JSON-масив або, як резерв, непорожні рядки."""
+    start, end = raw.find("["), raw.rfind("]")
+    if start != -1 and end > start:
+        try:
+            items = json.loads(raw[start:end + 1])
+            return [str(item).strip() for item in items if str(item).strip()]
+        except ValueError:
+            pass
+
+    lines = (re.sub(r"^\s*(\d+[.)]|[-•*])\s*", "", line) for line in raw.splitlines())
+    return [line.strip() for line in lines if line.strip()]
+
+
+class FactService:
+    """
+    Видача фактів із буфера користувача з фоновим поповненням.
+
+    batch_size — скільки фактів просити за один запит,
+    low_water — при якій кількості фактів у буфері запускати фонове поповнення,
+    history_size — скільки показаних фактів пам'ятати,
+    threshold — від якої схожості шинглів факт вважається повтором.
+    """
+
+    def __init__(
+        self,
+        service,
+        prompt_for: Callable[[], str],
+        batch_size: int = 5,
+        low_water: int = 1,
+        history_size: int = 25,
+        threshold: float = 0.3
+    ):
+        self.service = service
+        self.prompt_for = prompt_for
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.history_size = history_size
+        self.threshold = threshold
+
+        self.batches = 0
+        self.duplicates = 0
+
+        # Фонові поповнення: user_id → задача (одна на користувача)
+        self._refills: dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    def has_buffered(user_data: dict) -> bool:
+        """Чи є в буфері користувача готовий факт."""
+        return bool(user_data.get(BUFFER_KEY))
+
+    async def next_fact(self, user_id: int, user_data: dict) -> str:
+        """Наступний факт для користувача; якщо буфер порожній — генерує пачку одразу."""
+        if not user_data.get(BUFFER_KEY):
+            pending = self._refills.get(user_id)
+            if pending is not None:
+                await asyncio.shield(pending)
+            if not user_data.get(BUFFER_KEY):
+                await self._refill(user_data, fallback=True)
+
+        buffer = user_data[BUFFER_KEY]
+        fact = buffer.pop(0)
+
+        history = user_data.setdefault(HISTORY_KEY, [])
+        history.append(fact)
+        del history[:-self.history_size]
+
+        if len(buffer) <= self.low_water:
+            self._schedule_refill(user_id, user_data)
+
+        return fact
+
+    def _schedule_refill(self, user_id: int, user_data: dict) -> None:
+        if user_id in self._refills:
+            return
+
+        task = asyncio.create_task(self._refill(user_data))
+        self._refills[user_id] = task
+        task.add_done_callback(lambda _: self._refills.pop(user_id, None))
+
+    async def _refill(self, user_data: dict, fallback: bool = False) -> None:
+        """
+        Одна пакетна генерація: нові факти без повторів додаються в буфер.
+        fallback=True — якщо всі факти виявилися повторами, беремо перший
+        (користувач, який чекає, не повинен лишитися без відповіді).
+        """
+        try:
+            raw = await self.service.send_question(
+                self.prompt_for(),
+                BATCH_REQUEST.format(count=self.batch_size),
+                feature="random"
+            )
+        except Exception as e:
+            if fallback:
+                raise
+            logger.warning(f"Фонове поповнення фактів не вдалося: {e}")
+            return
+
+        self.batches += 1
+        facts = parse_facts(raw)
+
+        # Буфер беремо після await: user_data могли очистити, поки йшов запит
+        buffer = user_data.setdefault(BUFFER_KEY, [])
+        known = [shingles(f) for f in (*user_data.get(HISTORY_KEY, []), *buffer)]
+
+        for fact in facts:
+            signature = shingles(fact)
+            if any(similarity(signature, other) >= self.threshold for other in known):
+                self.duplicates += 1
+                continue
+            known.append(signature)
+            buffer.append(fact)
+
+        if fallback and not buffer:
+            if not facts:
+                raise ValueError("ChatGPT не повернув жодного факту")
+            buffer.append(facts[0])
+
+    async def close(self) -> None:
+        """Скасовує фонові поповнення (при зупинці бота)."""
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,183 @@
+"""
+gpt_history.py
+--------------
+Політика історії діалогу для режимів /gpt та /talk.
+
+Замість того щоб надсилати всю розмову на кожному кроці:
+- рахуємо приблизну кількість токенів
+- тримаємо «ковзне вікно» останніх реплік у межах бюджету моделі;
+  вікно обрізається з гістерезисом: після перевищення бюджету — до
+  TRIM_TO від нього, тож наступні кілька реплік додаються без обрізання
+- системний промпт не обрізається ніколи
+- старі репліки (за бажанням) стискаються у фоні в короткий підсумок,
+  який додається до запиту як окреме системне повідомлення; підсумок
+  робиться пачками (SUMMARY_BATCH бюджету), а не на кожне обрізання
+"""
+
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+# Розмір контекстного вікна моделей (токени: вхід + вихід)
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+
+# Для невідомих моделей беремо найменше вікно
+DEFAULT_CONTEXT_WINDOW = 16_385
+
+# Службові токени, які API додає до кожного повідомлення
+TOKENS_PER_MESSAGE = 4
+
+# Після перевищення бюджету історія обрізається до цієї частки бюджету
+TRIM_TO = 0.6
+
+# Мінімальна кількість відкинутих реплік, після якої запускаємо підсумок
+SUMMARY_MIN_MESSAGES = 6
+
+# Підсумок — коли відкинуті репліки разом набрали таку частку бюджету токенів
+SUMMARY_BATCH = 1.0
+
+# Скільки відкинутих реплік максимум чекають на підсумок (якщо API недоступне)
+SUMMARY_MAX_PENDING = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Приблизна кількість токенів у тексті.
+    Для кирилиці токенізатор OpenAI дає ~1 токен на 2–3 символи,
+    тому рахуємо з запасом: 1 токен ≈ 3 символи.
+    """
+    return math.ceil(len(text or "") / 3)
+
+
+def message_tokens(message: dict) -> int:
+    """Приблизна «вага» одного повідомлення в токенах."""
+    return estimate_tokens(message.get("content") or "") + TOKENS_PER_MESSAGE
+
+
+class HistoryPolicy:
+    """
+    Визначає, яку частину історії сесії відправляти в модель.
+
+    token_budget — бажаний бюджет вхідних токенів для історії;
+    фактичний бюджет не перевищує вікно моделі мінус max_tokens відповіді.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        max_output_tokens: int = 3000,
+        summarize: bool = True,
+        summary_prompt: str | None = None
+    ):
+        self.token_budget = token_budget
+        self.max_output_tokens = max_output_tokens
+        self.summarize = summarize and bool(summary_prompt)
+        self.summary_prompt = summary_prompt
+
+    def budget_for(self, model: str, max_output_tokens: int | None = None) -> int:
+        """Бюджет вхідних токенів для конкретної моделі (і ліміту відповіді)."""
+        window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        reserved = self.max_output_tokens if max_output_tokens is None else max_output_tokens
+        return max(0, min(self.token_budget, window - reserved))
+
+    def apply(self, session, model: str, max_output_tokens: int | None = None) -> list[dict]:
+        """
+        Обрізає історію сесії під бюджет і повертає список повідомлень для запиту.
+
+        Відкинуті репліки прибираються з сесії (щоб вона не росла в пам'яті)
+        і, якщо увімкнено, передаються на фонове стискання.
+        """
+        messages = session.message_list
+
+        head = messages[:1] if messages and messages[0]["role"] == "system" else []
+        turns = messages[len(head):]
+
+        memory = session.memory_message()
+        budget = self.budget_for(model, max_output_tokens)
+        budget -= sum(message_tokens(m) for m in head)
+        if memory:
+            budget -= message_tokens(memory)
+
+        # Вміщаємося — нічого не обрізаємо. Інакше йдемо від найновіших
+        # реплік до старіших, поки вміщаємося в TRIM_TO бюджету (гістерезис:
+        # інакше після заповнення вікна обрізання й підсумки йшли б щокроку)
+        keep_from = len(turns)
+        if sum(message_tokens(m) for m in turns) <= budget:
+            keep_from = 0
+
+        target = budget * TRIM_TO
+        used = 0
+        while keep_from > 0:
+            cost = message_tokens(turns[keep_from - 1])
+            if used + cost > target and keep_from < len(turns):
+                break
+            used += cost
+            keep_from -= 1
+
+        # Вікно має починатися з репліки користувача
+        while keep_from < len(turns) - 1 and turns[keep_from]["role"] != "user":
+            keep_from += 1
+
+        if keep_from > 0:
+            dropped = turns[:keep_from]
+            session.forget(len(head), keep_from)
+
+            if self.summarize:
+                session.pending_summary.extend(dropped)
+                pending_tokens = sum(message_tokens(m) for m in session.pending_summary)
+                if (len(session.pending_summary) >= SUMMARY_MIN_MESSAGES
+                        and pending_tokens >= budget * SUMMARY_BATCH):
+                    self.schedule_summary(session)
+
+        payload = list(head)
+        if memory:
+            payload.append(memory)
+        payload.extend(session.message_list[len(head):])
+
+        return payload
+
+    def schedule_summary(self, session) -> None:
+        """Запускає фонове стискання старих реплік (якщо воно ще не йде)."""
+        if session.summary_task is not None and not session.summary_task.done():
+            return
+
+        # Попередні спроби не вдалися — найстаріші репліки вже не стискаємо
+        del session.pending_summary[:-SUMMARY_MAX_PENDING]
+
+        session.summary_task = asyncio.create_task(self._summarize(session))
+
+    async def _summarize(self, session) -> None:
+        """Стискає старі репліки + попередній підсумок у новий підсумок."""
+        generation = session.generation
+        dropped = list(session.pending_summary)
+
+        lines = []
+        if session.memory:
+            lines.append(f"Попередній підсумок:\n{session.memory}\n")
+        lines.append("Репліки:")
+        for message in dropped:
+            role = "Користувач" if message["role"] == "user" else "Асистент"
+            lines.append(f"{role}: {message['content']}")
+
+        try:
+            summary = await session.service.send_question(
+                self.summary_prompt, "\n".join(lines), feature="history_summary"
+            )
+        except Exception as e:
+            logger.warning(f"Не вдалося стиснути історію чату {session.chat_id}: {e}")
+            return
+
+        # Поки йшов запит, сесію могли скинути (/gpt, /talk, нова легенда)
+        if generation != session.generation:
+            return
+
+        del session.pending_summary[:len(dropped)]
+        session.set_memory(summary)
@@ -1,12 +1,89 @@
 """
 gpt_instance.py
 ----------------
-Містить єдиний глобальний екземпляр ChatGPT-сервісу,
-який використовується в усіх модулях проєкту.
+Містить єдиний глобальний екземпляр ChatGPT-сервісу
+та менеджер сесій, які використовуються в усіх модулях проєкту.
+
+- chat_gpt — клієнт OpenAI для одноразових запитів (send_question)
+- response_cache — кеш відповідей на одноразові запити (або None)
+- router — модель, max_tokens і температура для кожної функції бота
+- singleflight — об'єднання однакових одночасних запитів (лічильники — singleflight.report())
+- sessions — окрема історія діалогу для кожного чату (await sessions.get(chat_id))
+- state_store — постійне сховище стану (історії діалогів і user_data/chat_data)
 """
 
+import config
 from credentials import ChatGPT_TOKEN
+from gpt_history import HistoryPolicy
 from gpt_service import ChatGptService
+from gpt_session import ChatSessionManager
+from model_router import ModelRouter
+from response_cache import CachePolicy, ResponseCache
+from singleflight import SingleFlight
+from resource_registry import registry
+from state_store import StateStore, build_backend
+from util import load_prompt
+
+registry.require_prompts("history_summary")
+
+# Кеш відповідей send_question: TTL і пошук майже-дублікатів — окремо для кожної функції.
+# Переклади кешує лише TranslationCache (handlers/translate.py) — тут їх не дублюємо
+response_cache = ResponseCache(
+    policies={
+        **{
+            feature: CachePolicy(ttl=ttl, near_duplicate=feature in config.RESPONSE_CACHE_NEAR_FEATURES)
+            for feature, ttl in config.RESPONSE_CACHE_TTLS.items()
+        },
+        "translate": CachePolicy(ttl=0),
+    },
+    default_ttl=config.RESPONSE_CACHE_DEFAULT_TTL,
+    max_entries=config.RESPONSE_CACHE_SIZE,
+    threshold=config.RESPONSE_CACHE_NEAR_THRESHOLD
+) if config.RESPONSE_CACHE_ENABLED else None
+
+# Профілі моделей за функціями (і запасна модель на випадок таймауту/перевантаження)
+router = ModelRouter.from_specs(
+    config.OPENAI_MODEL,
+    dict(config.GPT_MODEL_ROUTES),
+    fallback_model=config.OPENAI_FALLBACK_MODEL,
+    fallback_timeout=config.OPENAI_FALLBACK_TIMEOUT
+)
+
+# Однакові одночасні send_question — один запит до API (лише для перелічених функцій)
+singleflight = SingleFlight(config.SINGLEFLIGHT_FEATURES)
 
 # Єдиний глобальний екземпляр сервісу ChatGPT
-chat_gpt = ChatGptService(ChatGPT_TOKEN)
+chat_gpt = ChatGptService(
+    ChatGPT_TOKEN,
+    base_url=config.OPENAI_BASE_URL,
+    proxy=config.OPENAI_PROXY,
+    max_connections=config.OPENAI_MAX_CONNECTIONS,
+    max_keepalive=config.OPENAI_MAX_KEEPALIVE,
+    connect_timeout=config.OPENAI_CONNECT_TIMEOUT,
+    read_timeout=config.OPENAI_READ_TIMEOUT,
+    cache=response_cache,
+    singleflight=singleflight,
+    router=router
+)
+
+# Стан, що переживає перезапуск: історії діалогів та user_data/chat_data (див. bot.py)
+state_store = StateStore(
+    build_backend(config.STATE_BACKEND, config.STATE_DB, config.STATE_REDIS_URL),
+    flush_delay=config.STATE_FLUSH_DELAY,
+    batch_size=config.STATE_BATCH_SIZE,
+    max_records=config.STATE_CACHE_RECORDS
+)
+
+# Сесії розмов, ключ — chat_id
+sessions = ChatSessionManager(
+    chat_gpt,
+    history=HistoryPolicy(
+        token_budget=config.GPT_HISTORY_TOKEN_BUDGET,
+        summarize=config.GPT_HISTORY_SUMMARY,
+        summary_prompt=load_prompt("history_summary")
+    ),
+    max_sessions=config.GPT_SESSION_MAX,
+    ttl=config.GPT_SESSION_TTL,
+    max_total_chars=config.GPT_SESSION_MAX_CHARS,
+    store=state_store
+)
@@ -1,95 +1,278 @@
-from openai import OpenAI
+import logging
+import time
+
 import httpx
 
+from metrics import OPENAI_ERRORS, OPENAI_LATENCY, OPENAI_TOKENS
+
+from model_router import ModelProfile, ModelRouter
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
 
 class ChatGptService:
     """
     Сервіс роботи з ChatGPT API:
-    - зберігає історію повідомлень
-    - дозволяє працювати з промптом
-    - підтримує одинарні запити (send_question)
-    - підтримує діалог (add_message)
+    - відправляє список повідомлень (send_message_list)
+    - віддає відповідь частинами в потоковому режимі (stream_message_list)
+    - підтримує одинарні запити (send_question) з кешем відповідей
+      та об'єднанням однакових одночасних запитів (single-flight)
+    - обирає модель, max_tokens і температуру за функцією бота (ModelRouter)
+
+    Сервіс не зберігає історію — діалоги кожного чату живуть
+    у ChatSession (див. gpt_session.py).
+
+    Запити йдуть через AsyncOpenAI поверх httpx.AsyncClient,
+    тому очікування відповіді не блокує цикл подій бота.
+
+    SDK openai імпортується (~0.5 с) і клієнт створюється лише при першому
+    зверненні до client — імпорт бота і старт не чекають на нього;
+    warm_up() робить це у фоні й одразу відкриває з'єднання в пулі.
     """
 
-    client: OpenAI = None
-    message_list: list = None
+    _client = None
+    model: str = "gpt-3.5-turbo"      # модель за замовчуванням (без роутера)
+    max_tokens: int = 3000
+    temperature: float = 0.9
 
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        base_url: str | None = None,
+        proxy: str | None = None,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 60.0,
+        cache: ResponseCache | None = None,
+        singleflight: SingleFlight | None = None,
+        router: ModelRouter | None = None
+    ):
         """
-        Ініціалізація клієнта OpenAI.
+        Ініціалізація асинхронного клієнта OpenAI.
         Якщо токен починається з 'gpt:', він конвертується у справжній формат.
+
+        max_connections обмежує кількість одночасних з'єднань у пулі,
+        connect_timeout / read_timeout — таймаути з'єднання та відповіді,
+        cache — кеш відповідей для send_question (None — без кешу),
+        singleflight — об'єднання однакових одночасних send_question (None — вимкнено),
+        router — профілі моделей за функціями (None — model / max_tokens / temperature класу).
         """
-        token = (
+        self.token = (
             "sk-proj-" + token[:3:-1]
             if token.startswith("gpt:")
             else token
         )
-
-        self.client = OpenAI(
-            http_client=httpx.Client(
-                proxy="http://18.199.183.77:49232"
-            ),
-            api_key=token
+        self.base_url = base_url
+        self.proxy = proxy
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
         )
 
-        self.message_list = []
+        self.cache = cache
+        self.singleflight = singleflight
+        self.router = router
+
+        self.http_client: httpx.AsyncClient | None = None
+        self._fast_client = None
 
-    async def send_message_list(self) -> str:
+    @property
+    def client(self):
+        """AsyncOpenAI (створюється при першому зверненні)."""
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    @property
+    def fast_client(self):
         """
-        Відправляє весь список повідомлень у ChatGPT
-        та повертає текст відповіді.
+        Для запитів із запасною моделлю: без внутрішніх повторів SDK,
+        щоб після таймауту одразу перейти на запасну.
         """
-        completion = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",      # можна замінити на gpt-4o / mini
-            messages=self.message_list,
-            max_tokens=3000,
-            temperature=0.9
+        if self._client is None:
+            self._connect()
+        return self._fast_client
+
+    def _connect(self) -> None:
+        from openai import AsyncOpenAI
+
+        self.http_client = httpx.AsyncClient(
+            proxy=self.proxy,
+            timeout=self.timeout,
+            limits=self.limits
         )
+        self._client = AsyncOpenAI(
+            http_client=self.http_client,
+            api_key=self.token,
+            base_url=self.base_url,
+            timeout=self.timeout
+        )
+        self._fast_client = self._client.with_options(max_retries=0)
 
-        message = completion.choices[0].message
-        self.message_list.append(message)
+    async def warm_up(self) -> None:
+        """
+        Створює клієнт і відкриває з'єднання з API (TLS, проксі) заздалегідь,
+        щоб перший запит користувача не платив за них. Помилки не критичні.
+        """
+        started = time.perf_counter()
+        try:
+            base_url = str(self.client.base_url)
+            # Будь-яка відповідь (навіть 404) лишає відкрите з'єднання в пулі
+            await self.http_client.get(base_url)
+        except Exception as e:
+            logger.warning(f"Не вдалося прогріти з'єднання з OpenAI: {e}")
+            return
+        logger.info(f"🔥 З'єднання з OpenAI прогріте за {time.perf_counter() - started:.2f} с")
 
-        return message.content
+    def profile(self, feature: str | None = None) -> ModelProfile:
+        """Модель, max_tokens і температура для функції бота."""
+        if self.router is None:
+            return ModelProfile(self.model, self.max_tokens, self.temperature)
+        return self.router.profile(feature)
 
-    def set_prompt(self, prompt_text: str) -> None:
+    async def send_message_list(self, message_list: list, feature: str | None = None) -> str:
         """
-        Встановлює системний промпт та очищає історію діалогу.
+        Відправляє список повідомлень у ChatGPT
+        та повертає текст відповіді.
         """
-        self.message_list.clear()
-        self.message_list.append({
-            "role": "system",
-            "content": prompt_text
-        })
+        profile = self.profile(feature)
+        if self.router is not None:
+            self.router.count(feature)
+
+        try:
+            completion = await self._create(profile, message_list, feature)
+        except Exception as e:
+            fallback = self.router.fallback(feature, profile, e) if self.router is not None else None
+            if fallback is None:
+                raise
+            completion = await self._create(fallback, message_list, feature)
+
+        return completion.choices[0].message.content
 
-    async def add_message(self, message_text: str) -> str:
+    async def stream_message_list(self, message_list: list, feature: str | None = None):
         """
-        Додає нове повідомлення від користувача
-        та повертає відповідь ChatGPT (у діалоговому режимі).
+        Потоковий режим: асинхронний генератор фрагментів відповіді (дельт)
+        у міру того, як модель їх генерує.
         """
-        self.message_list.append({
-            "role": "user",
-            "content": message_text
-        })
+        profile = self.profile(feature)
+        if self.router is not None:
+            self.router.count(feature)
+
+        started = time.perf_counter()
+        try:
+            stream = await self._create(profile, message_list, feature, stream=True)
+        except Exception as e:
+            fallback = self.router.fallback(feature, profile, e) if self.router is not None else None
+            if fallback is None:
+                raise
+            profile = fallback
+            stream = await self._create(profile, message_list, feature, stream=True)
+
+        label = feature or "default"
+        first = True
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    self._count_tokens(label, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first:
+                        OPENAI_LATENCY.observe(time.perf_counter() - started, label, profile.model)
+                        first = False
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            OPENAI_ERRORS.inc(label, type(e).__name__)
+            raise
+        finally:
+            await stream.close()
+
+    async def _create(self, profile: ModelProfile, message_list: list, feature: str | None,
+                      stream: bool = False):
+        client = self.client
+        options = {}
+        if profile.timeout:
+            client = self.fast_client
+            options["timeout"] = profile.timeout
+        if stream:
+            # Останній фрагмент потоку міститиме кількість токенів
+            options["stream_options"] = {"include_usage": True}
+
+        label = feature or "default"
+        started = time.perf_counter()
+        with span("openai.chat_completion", feature=label, model=profile.model, stream=stream) as current:
+            try:
+                response = await client.chat.completions.create(
+                    model=profile.model,
+                    messages=message_list,
+                    max_tokens=profile.max_tokens,
+                    temperature=profile.temperature,
+                    stream=stream,
+                    **options
+                )
+            except Exception as e:
+                OPENAI_ERRORS.inc(label, type(e).__name__)
+                raise
 
-        return await self.send_message_list()
+            if not stream:
+                OPENAI_LATENCY.observe(time.perf_counter() - started, label, profile.model)
+                if response.usage is not None:
+                    self._count_tokens(label, response.usage)
+                    current.set("tokens.in", response.usage.prompt_tokens or 0)
+                    current.set("tokens.out", response.usage.completion_tokens or 0)
+        return response
 
-    async def send_question(self, prompt_text: str, message_text: str) -> str:
+    @staticmethod
+    def _count_tokens(label: str, usage) -> None:
+        OPENAI_TOKENS.inc(label, "in", amount=usage.prompt_tokens or 0)
+        OPENAI_TOKENS.inc(label, "out", amount=usage.completion_tokens or 0)
+
+    async def send_question(self, prompt_text: str, message_text: str, feature: str | None = None) -> str:
         """
-        Відправляє одноразове питання:
-        - очищає історію
-        - встановлює промпт
-        - додає текст питання
+        Відправляє одноразове питання (без історії):
+        - системний промпт
+        - текст питання
+
+        feature — назва функції бота (quiz_grade, translate, resume…) для кешу
+        відповідей і single-flight; без неї (або для функцій із TTL = 0)
+        кеш не використовується.
         """
-        self.message_list.clear()
+        profile = self.profile(feature)
+
+        with span("gpt.send_question", feature=feature or "default") as current:
+            if self.cache is not None:
+                cached = self.cache.get(feature, profile.model, prompt_text, message_text)
+                current.set("cache", "hit" if cached is not None else "miss")
+                if cached is not None:
+                    return cached
+
+            if self.singleflight is None:
+                return await self._ask(prompt_text, message_text, feature, profile)
 
-        self.message_list.append({
-            "role": "system",
-            "content": prompt_text
-        })
+            key = SingleFlight.key(profile.model, prompt_text, message_text, profile.temperature)
+            return await self.singleflight.do(
+                feature, key, lambda: self._ask(prompt_text, message_text, feature, profile)
+            )
 
-        self.message_list.append({
-            "role": "user",
-            "content": message_text
-        })
+    async def _ask(self, prompt_text: str, message_text: str, feature: str | None,
+                   profile: ModelProfile) -> str:
+        """Один запит до API; відповідь кладеться в кеш (один раз — навіть для об'єднаних запитів)."""
+        answer = await self.send_message_list([
+            {"role": "system", "content": prompt_text},
+            {"role": "user", "content": message_text},
+        ], feature=feature)
 
-        return await self.send_message_list()
+        if self.cache is not None:
+            self.cache.put(feature, profile.model, prompt_text, message_text, answer)
+
+        return answer
+
+    async def close(self) -> None:
+        """
+        Закриває пул з'єднань (викликається при зупинці бота).
+        """
+        if self._client is not None:
+            await self._client.close()
@@ -0,0 +1,274 @@
+"""
+gpt_session.py
+--------------
+Окремі сесії розмови з ChatGPT для кожного чату.
+
+ChatSession зберігає історію повідомлень одного чату
+(обрізану політикою HistoryPolicy, див. gpt_history.py),
+ChatSessionManager видає сесії за chat_id і прибирає старі:
+- за часом неактивності (TTL)
+- за кількістю сесій (LRU)
+- за сумарним обсягом історій (ліміт пам'яті в символах)
+
+Якщо передано store (state_store.StateStore), історія кожного чату
+зберігається після змін і підтягується при першому зверненні до чату,
+тож перезапуск бота її не стирає. Витіснення лише вивантажує сесію з пам'яті.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from gpt_history import HistoryPolicy
+from gpt_service import ChatGptService
+
+
+class ChatSession:
+    """
+    Історія діалогу одного чату:
+    - дозволяє працювати з промптом (set_prompt)
+    - підтримує діалог (add_message, stream_message)
+    - підтримує одинарні запити (send_question) без зміни історії
+    """
+
+    def __init__(self, manager: "ChatSessionManager", chat_id: int):
+        self.manager = manager
+        self.chat_id = chat_id
+        self.message_list: list[dict] = []
+        self.chars = 0
+        self.last_used = time.monotonic()
+
+        # Стислий підсумок старих реплік, які вже не вміщаються у вікно
+        self.memory = ""
+        self.pending_summary: list[dict] = []
+        self.summary_task = None
+
+        # Змінюється при кожному set_prompt — щоб відкидати застарілі підсумки
+        self.generation = 0
+
+        # Завантаження збереженої історії (перше звернення до чату)
+        self.restoring: asyncio.Task | None = None
+
+    @property
+    def service(self) -> ChatGptService:
+        return self.manager.service
+
+    def set_prompt(self, prompt_text: str) -> None:
+        """
+        Встановлює системний промпт та очищає історію діалогу.
+        """
+        self._resize(-self.chars)
+        self.message_list.clear()
+        self.memory = ""
+        self.pending_summary.clear()
+        self.generation += 1
+        self._append("system", prompt_text)
+        self.manager.persist(self)
+
+    async def add_message(self, message_text: str, feature: str = "gpt") -> str:
+        """
+        Додає нове повідомлення від користувача
+        та повертає відповідь ChatGPT (у діалоговому режимі).
+
+        feature — функція бота (gpt, talk) для вибору профілю моделі.
+        """
+        turn = self._append("user", message_text)
+
+        try:
+            profile = self.service.profile(feature)
+            payload = self.manager.history.apply(self, profile.model, profile.max_tokens)
+            answer = await self.service.send_message_list(payload, feature=feature)
+        except BaseException:
+            self._discard(turn)
+            raise
+        self._append("assistant", answer)
+        self.manager.persist(self)
+
+        return answer
+
+    async def stream_message(self, message_text: str, feature: str = "gpt"):
+        """
+        Те саме, що add_message, але віддає відповідь фрагментами.
+        Повна відповідь потрапляє в історію лише після завершення потоку;
+        якщо потік обірвався (помилка, скасування) — репліка користувача
+        теж прибирається, щоб в історії не лишилося питання без відповіді.
+        """
+        turn = self._append("user", message_text)
+
+        parts = []
+        try:
+            profile = self.service.profile(feature)
+            payload = self.manager.history.apply(self, profile.model, profile.max_tokens)
+
+            async for delta in self.service.stream_message_list(payload, feature=feature):
+                parts.append(delta)
+                yield delta
+        except BaseException:
+            self._discard(turn)
+            raise
+
+        self._append("assistant", "".join(parts))
+        self.manager.persist(self)
+
+    async def send_question(self, prompt_text: str, message_text: str, feature: str | None = None) -> str:
+        """
+        Одноразове питання — історія сесії не змінюється.
+        """
+        return await self.service.send_question(prompt_text, message_text, feature=feature)
+
+    def memory_message(self) -> dict | None:
+        """Підсумок старих реплік у вигляді системного повідомлення."""
+        if not self.memory:
+            return None
+        return {
+            "role": "system",
+            "content": f"Коротко про попередню частину розмови:\n{self.memory}"
+        }
+
+    def set_memory(self, summary: str) -> None:
+        """Замінює підсумок старих реплік."""
+        self._resize(len(summary) - len(self.memory))
+        self.memory = summary
+        self.manager.persist(self)
+
+    def forget(self, start: int, count: int) -> None:
+        """Прибирає count повідомлень історії, починаючи з індексу start."""
+        removed = self.message_list[start:start + count]
+        del self.message_list[start:start + count]
+        self._resize(-sum(len(m["content"]) for m in removed))
+        self.manager.persist(self)
+
+    def _append(self, role: str, content: str) -> dict:
+        content = content or ""
+        message = {"role": role, "content": content}
+        self.message_list.append(message)
+        self._resize(len(content))
+        return message
+
+    def _discard(self, message: dict) -> None:
+        """Прибирає репліку, на яку не вдалося отримати відповідь (якщо її ще не стиснуто)."""
+        for i in range(len(self.message_list) - 1, -1, -1):
+            if self.message_list[i] is message:
+                del self.message_list[i]
+                self._resize(-len(message["content"]))
+                self.manager.persist(self)
+                return
+
+    def _resize(self, delta: int) -> None:
+        self.chars += delta
+        # Витіснена сесія вже не входить у загальний обсяг менеджера
+        if self.manager._sessions.get(self.chat_id) is self:
+            self.manager.total_chars += delta
+
+
+class ChatSessionManager:
+    """
+    Реєстр сесій ChatGPT за chat_id з витісненням LRU/TTL.
+    """
+
+    def __init__(
+        self,
+        service: ChatGptService,
+        history: HistoryPolicy | None = None,
+        max_sessions: int = 1000,
+        ttl: float = 3600.0,
+        max_total_chars: int = 5_000_000,
+        store=None
+    ):
+        self.service = service
+        self.history = history or HistoryPolicy()
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_total_chars = max_total_chars
+        self.store = store
+
+        self.total_chars = 0
+        self._sessions: OrderedDict[int, ChatSession] = OrderedDict()
+
+    async def get(self, chat_id: int) -> ChatSession:
+        """
+        Повертає сесію чату (створює нову, якщо її немає або вона застаріла).
+        Збережена історія читається зі сховища, не блокуючи цикл подій.
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        session = self._sessions.get(chat_id)
+        if session is None:
+            session = ChatSession(self, chat_id)
+            self._sessions[chat_id] = session
+            if self.store is not None:
+                session.restoring = asyncio.ensure_future(self._restore(session))
+        else:
+            self._sessions.move_to_end(chat_id)
+
+        session.last_used = now
+        self._evict_overflow(keep=chat_id)
+
+        # Інші звернення до того самого чату чекають на те саме читання
+        if session.restoring is not None and not session.restoring.done():
+            await asyncio.shield(session.restoring)
+
+        return session
+
+    def drop(self, chat_id: int) -> None:
+        """Видаляє сесію чату (наприклад, при поверненні в головне меню)."""
+        self._unload(chat_id)
+        if self.store is not None:
+            self.store.drop("session", chat_id)
+
+    def persist(self, session: ChatSession) -> None:
+        """Ставить історію сесії в чергу на збереження (лише змінені поля)."""
+        if self.store is None or self._sessions.get(session.chat_id) is not session:
+            return
+        self.store.save("session", session.chat_id, {
+            "messages": session.message_list,
+            "memory": session.memory,
+            "updated": time.time(),
+        })
+
+    async def _restore(self, session: ChatSession) -> None:
+        """Підтягує збережену історію, якщо вона не старша за TTL."""
+        data = await self.store.load("session", session.chat_id)
+        age = time.time() - data.get("updated", 0)
+        if not data.get("messages") or age >= self.ttl:
+            return
+
+        for message in data["messages"]:
+            session._append(message["role"], message["content"])
+        session.memory = data.get("memory", "")
+        session._resize(len(session.memory))
+
+    def _unload(self, chat_id: int) -> None:
+        """Прибирає сесію з пам'яті (збережена історія лишається у сховищі)."""
+        session = self._sessions.pop(chat_id, None)
+        if session is not None:
+            self.total_chars -= session.chars
+            session.generation += 1  # фоновий підсумок для неї вже не потрібен
+            if self.store is not None:
+                self.store.forget("session", chat_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._sessions
+
+    def _evict_expired(self, now: float) -> None:
+        """TTL: сесії впорядковані від найстаріших, тож зупиняємось на першій свіжій."""
+        while self._sessions:
+            chat_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.ttl:
+                break
+            self.drop(chat_id)  # історія застаріла — і в сховищі теж
+
+    def _evict_overflow(self, keep: int) -> None:
+        """LRU: витісняємо найдавніші сесії, поки не вкладемося в ліміти."""
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions
+            or self.total_chars > self.max_total_chars
+        ):
+            chat_id = next(iter(self._sessions))
+            if chat_id == keep:
+                break
+            self._unload(chat_id)
@@ -8,8 +8,8 @@ from telegram.ext import ContextTypes
 # ---------------------------------
 # Імпорти локальних модулів застосунку
 # ---------------------------------
-# ✅ ChatGPT сервіс
-from gpt_instance import chat_gpt
+# ✅ сесії ChatGPT
+from gpt_instance import sessions
 
 # ✅ утиліти
 from util import (
@@ -17,6 +17,11 @@ from util import (
     send_image
 )
 
+# ✅ реєстр ресурсів — промпт перевіряється при старті бота
+from resource_registry import registry
+
+registry.require_prompts('gpt')
+
 
 # ---------------------------------
 # 🤖 ChatGPT режим — команда /gpt
@@ -30,7 +35,7 @@ async def gpt_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # 2. Промпт
     prompt = load_prompt('gpt')
-    chat_gpt.set_prompt(prompt)
+    (await sessions.get(update.effective_chat.id)).set_prompt(prompt)
 
     # 3. Текст у MarkdownV2
     await context.bot.send_message(
@@ -17,17 +17,24 @@ from telegram.helpers import escape_markdown
 from handlers.start import start_screen
 from handlers.resume import resume_collect_data
 from handlers.quiz import quiz_check_answer
-from handlers.translate import LANG_NAMES
+from handlers.translate import LANG_NAMES, translation_cache
+from handlers.talk import PERSONALITIES
 
-# ✅ ChatGPT сервіс
-from gpt_instance import chat_gpt
+# ✅ ChatGPT сервіс та сесії
+from gpt_instance import chat_gpt, sessions
+
+# ✅ конфігурація
+import config
 
 # ✅ утиліти
 from util import (
+    StreamingMessageEditor,
+    escape_markdown_partial,
     load_prompt,
+    progress,
+    safe_delete,
     send_text,
-    send_text_buttons,
-    send_text_buttons_raw
+    send_text_buttons
 )
 
 logger = logging.getLogger(__name__)
@@ -59,28 +66,44 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # ✅ 4) Режим GPT
     if state == "gpt":
-        waiting = await send_text(update, context, "🔍 Обробляю ваше питання…")
+        waiting = None
 
         try:
-            response_raw = await chat_gpt.add_message(message_text)
+            session = await sessions.get(update.effective_chat.id)
+            if not session.message_list:
+                # сесію витіснено (TTL/LRU) — відновлюємо промпт режиму
+                session.set_prompt(load_prompt("gpt"))
 
-            # ✅ Екрануємо ТІЛЬКИ відповідь
-            response = escape_markdown(response_raw, version=2)
+            # ✅ Потоковий режим: заглушка поступово стає відповіддю
+            if config.GPT_STREAMING:
+                waiting = await send_text(update, context, "🔍 Обробляю ваше питання…")
+                editor = StreamingMessageEditor(
+                    context.bot,
+                    update.effective_chat.id,
+                    waiting.message_id,
+                    header="🤖 *Відповідь ChatGPT:*\n\n",
+                    interval=config.STREAM_EDIT_INTERVAL_MS / 1000
+                )
 
-            await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
+                async for delta in session.stream_message(message_text):
+                    await editor.push(delta)
 
-            # ✅ Заголовок не екрануємо
-            text = f"🤖 *Відповідь ChatGPT:*\n\n{response}"
+                await editor.finish()
+                return
 
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
-                text=text,
-                parse_mode="MarkdownV2"
-            )
+            async with progress(update, context, "gpt", "🔍 Обробляю ваше питання…") as p:
+                response_raw = await session.add_message(message_text)
+
+                # ✅ Екрануємо ТІЛЬКИ відповідь
+                response = escape_markdown(response_raw, version=2)
+
+                # ✅ Заголовок не екрануємо
+                await p.reply(f"🤖 *Відповідь ChatGPT:*\n\n{response}")
 
         except Exception as e:
             logger.error(f"GPT error: {e}")
-            await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
+            if waiting:
+                await safe_delete(context.bot, update.effective_chat.id, waiting.message_id)
             await send_text(update, context, "😔 Сталася помилка. Спробуйте пізніше.")
         return
 
@@ -90,15 +113,7 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         personality = context.user_data.get("selected_personality")
 
         if not personality:
-            personalities = {
-                'talk_steve_jobs': 'Стів Джобс (Apple) 💡',
-                'talk_elon_musk': 'Ілон Маск (SpaceX) 🚀',
-                'talk_marie_curie': 'Марія Кюрі (Науковиця) ⚗️',
-                'talk_leonardo_da_vinci': 'Леонардо да Вінчі (Митець) 🎨',
-                'talk_nikola_tesla': 'Нікола Тесла (Винахідник) ⚡',
-                'talk_albert_einstein': 'Альберт Ейнштейн (Фізик) 🧠',
-                'start': 'Закінчити 🏁'
-            }
+            personalities = {**PERSONALITIES, 'start': 'Закінчити 🏁'}
 
             return await send_text_buttons(
                 update, context,
@@ -107,37 +122,48 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
 
         # ✅ якщо особистість вже вибрана
-        waiting = await send_text(update, context, "🔍 Обробляю…")
-        context.user_data["waiting_msg_id"] = waiting.message_id
+        waiting = None
 
         try:
-            response = await chat_gpt.add_message(message_text)
-
-            # ✅ БЕЗПЕЧНЕ ВИДАЛЕННЯ
-            msg_id = context.user_data.get("waiting_msg_id")
-            if msg_id:
-                try:
-                    await context.bot.delete_message(update.effective_chat.id, msg_id)
-                except Exception as e:
-                    logger.warning(f"Не вдалось видалити waiting message: {e}")
-            context.user_data["waiting_msg_id"] = None
-
-            await send_text_buttons_raw(
-                update,
-                context,
-                f"👤 *{personality.replace('talk_', '').replace('_', ' ').title()}:*\n\n{response}",
-                {"start": "🏁 Закінчити"}
-            )
+            session = await sessions.get(update.effective_chat.id)
+            if not session.message_list:
+                session.set_prompt(load_prompt(personality))
+
+            name = personality.replace('talk_', '').replace('_', ' ').title()
+
+            # ✅ Потоковий режим: заглушка поступово стає відповіддю
+            if config.GPT_STREAMING:
+                waiting = await send_text(update, context, "🔍 Обробляю…")
+                editor = StreamingMessageEditor(
+                    context.bot,
+                    update.effective_chat.id,
+                    waiting.message_id,
+                    header=f"👤 *{escape_markdown(name, version=2)}:*\n\n",
+                    interval=config.STREAM_EDIT_INTERVAL_MS / 1000
+                )
+
+                async for delta in session.stream_message(message_text, feature="talk"):
+                    await editor.push(delta)
+
+                # Фінал — як у send_text_buttons_raw: *жирний* зберігається
+                await editor.finish(
+                    escape_markdown_partial(f"👤 *{name}:*\n\n{editor.text}"),
+                    {"start": "🏁 Закінчити"}
+                )
+                return
+
+            async with progress(update, context, "talk") as p:
+                response = await session.add_message(message_text, feature="talk")
+
+                await p.reply(
+                    escape_markdown_partial(f"👤 *{name}:*\n\n{response}"),
+                    {"start": "🏁 Закінчити"}
+                )
 
         except Exception as e:
             logger.error(f"TALK error: {e}")
-
-            try:
-                print("DELETE TRY:", context.user_data.get("waiting_msg_id"))
-                await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
-            except:
-                pass
-
+            if waiting:
+                await safe_delete(context.bot, update.effective_chat.id, waiting.message_id)
             await send_text(update, context, "😔 Сталася помилка. Спробуйте пізніше.")
 
         return
@@ -159,29 +185,28 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         lang_label = LANG_NAMES.get(lang_key, "Обрана мова")
 
         prompt = load_prompt(lang_key)
-        chat_gpt.set_prompt(prompt)
 
-        waiting = await send_text(update, context, "🔍 Перекладаю...")
+        # ✅ Повторні фрази беремо з кешу — без запиту до ChatGPT
+        translation = await translation_cache.get(lang_key, prompt, message_text)
 
         try:
-            translation = await chat_gpt.send_question(prompt, message_text)
-            await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
-
-            buttons = {
-                "translate_change": "🌐 Змінити мову",
-                "start": "🏁 Завершити"
-            }
-
-            await send_text_buttons_raw(
-                update,
-                context,
-                f"📘 *Переклад на:* *{lang_label}*\n\n{translation}",
-                buttons
-            )
+            async with progress(update, context, "translate", "🔍 Перекладаю...") as p:
+                if translation is None:
+                    translation = await chat_gpt.send_question(prompt, message_text, feature="translate")
+                    translation_cache.put(lang_key, prompt, message_text, translation)
+
+                buttons = {
+                    "translate_change": "🌐 Змінити мову",
+                    "start": "🏁 Завершити"
+                }
+
+                await p.reply(
+                    escape_markdown_partial(f"📘 *Переклад на:* *{lang_label}*\n\n{translation}"),
+                    buttons
+                )
 
         except Exception as e:
             logger.error(f"Translate error: {e}")
-            await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
             await send_text(update, context, "⚠️ Помилка перекладу. Спробуйте пізніше.")
 
         return
@@ -8,6 +8,7 @@ import logging
 # ---------------------------------
 from telegram import Update
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 
 # ---------------------------------
 # Імпорти локальних модулів застосунку
@@ -18,22 +19,60 @@ from handlers.start import start_screen
 # ✅ ChatGPT сервіс
 from gpt_instance import chat_gpt
 
+# ✅ пул заздалегідь згенерованих питань
+import config
+from quiz_pool import QuizPool
+from quiz_grader import CORRECT, QuizGrader
+
 # ✅ утиліти
 from util import (
+    escape_markdown_partial,
     load_prompt,
+    progress,
     send_image,
     send_text,
-    send_text_raw,
-    send_text_buttons,
-    send_text_buttons_raw
+    send_text_buttons
 )
 
+# ✅ реєстр ресурсів
+from resource_registry import registry
+
 logger = logging.getLogger(__name__)
 
 
 # ------------------------------------------------
 # 🧠 КВІЗ — команда /quiz
 # ------------------------------------------------
+# ✅ Теми квізу (ключ = назва промпту)
+QUIZ_TOPICS = {
+    "quiz_science": "🔬 Наука",
+    "quiz_history": "📜 Історія",
+    "quiz_tech": "💻 Технології",
+    "quiz_space": "🛰️ Космос",
+    "quiz_random": "🎲 Мікс",
+}
+
+# ✅ промпти всіх тем перевіряються при старті бота
+registry.require_prompts(*QUIZ_TOPICS)
+
+# ✅ Пул питань: фонове поповнення запускається в bot.py (on_startup)
+quiz_pool = QuizPool(
+    chat_gpt,
+    QUIZ_TOPICS,
+    load_prompt,
+    depth=config.QUIZ_POOL_DEPTH,
+    batch_size=config.QUIZ_POOL_BATCH,
+    refill_interval=config.QUIZ_POOL_REFILL_INTERVAL,
+    recent_size=config.QUIZ_RECENT_SIZE
+)
+
+# ✅ Локальна перевірка відповідей (ChatGPT — лише для неоднозначних)
+quiz_grader = QuizGrader(
+    accept=config.QUIZ_GRADE_ACCEPT,
+    reject=config.QUIZ_GRADE_REJECT
+)
+
+
 async def quiz_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Стартує режим квізу: показує список тем.
@@ -44,14 +83,7 @@ async def quiz_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await send_image(update, context, "5_quiz_neon")
 
     # Теми квізу
-    topics = {
-        "quiz_science": "🔬 Наука",
-        "quiz_history": "📜 Історія",
-        "quiz_tech": "💻 Технології",
-        "quiz_space": "🛰️ Космос",
-        "quiz_random": "🎲 Мікс",
-        "start": "🏁 Завершити"
-    }
+    topics = {**QUIZ_TOPICS, "start": "🏁 Завершити"}
 
     context.user_data["conversation_state"] = "quiz_select_topic"
 
@@ -96,99 +128,117 @@ async def quiz_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def quiz_generate_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Генерує нове питання квізу через ChatGPT.
+    Видає нове питання квізу з пулу.
+    Якщо пул теми порожній — генерує питання одразу (зі статусом очікування).
     """
     topic = context.user_data["quiz_topic"]
 
-    # Прив'язуємо промпт (наприклад: prompts/quiz_science.txt)
-    prompt = load_prompt(topic)
-    chat_gpt.set_prompt(prompt)
-
-    waiting = await send_text(update, context, "🔍 Генерую питання...")
-
     try:
-        question = await chat_gpt.send_question(
-            prompt,
-            "Згенеруй одне чітке питання квізу без відповіді."
-        )
-
-        await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
+        async with progress(update, context, "quiz_question", "🔍 Генерую питання...") as p:
+            # Питання з пулу видається миттєво — статус очікування не з'являється
+            item = quiz_pool.take(topic) or await quiz_pool.get(topic)
 
-        context.user_data["conversation_state"] = "quiz_waiting_answer"
-        context.user_data["current_question"] = question
+            context.user_data["conversation_state"] = "quiz_waiting_answer"
+            context.user_data["current_question"] = item.question
+            context.user_data["current_answer"] = item.answer
+            context.user_data["current_aliases"] = list(item.aliases)
 
-        await send_text_raw(update, context, f"❓ *Питання:*\n\n{question}\n\n✍️ Напишіть вашу відповідь:")
+            question = escape_markdown(item.question, version=2)
+            await p.reply(f"❓ *Питання:*\n\n{question}\n\n✍️ Напишіть вашу відповідь:")
 
     except Exception as e:
         logger.error(f"Quiz error: {e}")
         await send_text(update, context, "⚠️ Не вдалось згенерувати питання.")
 
 
-async def quiz_check_answer(update: Update, context: ContextTypes.DEFAULT_TYPE, user_answer: str):
+async def quiz_ask_model(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                         question: str, expected: str, user_answer: str):
     """
-    Відправляє відповідь користувача ChatGPT та отримує оцінку.
+    Оцінка відповіді через ChatGPT (для неоднозначних випадків).
+    Повертає (текст оцінки, чи правильна відповідь).
     """
-    question = context.user_data["current_question"]
     prompt = load_prompt(context.user_data["quiz_topic"])
-    chat_gpt.set_prompt(prompt)
 
-    waiting = await send_text(update, context, "🔍 Перевіряю відповідь...")
+    result = await chat_gpt.send_question(
+        prompt,
+        f"Ось питання: {question}\n"
+        + (f"Очікувана відповідь: {expected}\n" if expected else "")
+        + f"Ось відповідь користувача: {user_answer}\n"
+        "Оціни відповідь. Напиши коротко: правильно чи ні, дай коротке пояснення.",
+        feature="quiz_grade"
+    )
 
-    try:
-        # Отримуємо оцінку від ChatGPT
-        result = await chat_gpt.send_question(
-            prompt,
-            f"Ось питання: {question}\nОсь відповідь користувача: {user_answer}\n"
-            "Оціни відповідь. Напиши коротко: правильно чи ні, дай коротке пояснення."
+    result_clean = result.strip().lower()
+
+    # Ключові слова для визначення правильності
+    negative = ("неправ", "невір", "wrong", "incorrect")
+    positive = ("правильно", "вірно", "correct")
+
+    # ✅ Перевірка на “неправильно” (пріоритет)
+    if result_clean.startswith(negative):
+        is_correct = False
+    elif result_clean.startswith(positive):
+        is_correct = True
+    else:
+        # резерв–евристика (якщо раптом промпт дав щось інше)
+        is_correct = (
+            any(p in result_clean for p in positive) and
+            not any(n in result_clean for n in negative)
         )
 
-        await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
-
-        # ✅ Обробка статистики
-        context.user_data["total"] += 1
+    return result, is_correct
 
-        result_clean = result.strip().lower()
 
-        # Ключові слова для визначення правильності
-        negative = ("неправ", "невір", "wrong", "incorrect")
-        positive = ("правильно", "вірно", "correct")
+async def quiz_check_answer(update: Update, context: ContextTypes.DEFAULT_TYPE, user_answer: str):
+    """
+    Перевіряє відповідь користувача: спершу локально (quiz_grader),
+    а до ChatGPT звертається лише тоді, коли локальна оцінка неоднозначна.
+    """
+    question = context.user_data["current_question"]
+    expected = context.user_data.get("current_answer", "")
+    aliases = context.user_data.get("current_aliases", [])
 
-        # ✅ Перевірка на “неправильно” (пріоритет)
-        if result_clean.startswith(negative):
-            is_correct = False
-        elif result_clean.startswith(positive):
-            is_correct = True
-        else:
-            # резерв–евристика (якщо раптом промпт дав щось інше)
-            is_correct = (
-                any(p in result_clean for p in positive) and
-                not any(n in result_clean for n in negative)
+    try:
+        # Статус очікування з'являється лише тоді, коли оцінює ChatGPT (локально — миттєво)
+        async with progress(update, context, "quiz_grade", "🔍 Перевіряю відповідь...") as p:
+            grade = quiz_grader.grade(user_answer, expected, aliases)
+
+            # Кожна частина відповіді екранується рівно один раз:
+            # локальний вердикт — повністю, оцінка ChatGPT — зі збереженням *жирного*
+            if grade.is_final:
+                is_correct = grade.verdict == CORRECT
+                result = escape_markdown(
+                    "✅ Правильно!" if is_correct else f"❌ Неправильно. Правильна відповідь: {expected}",
+                    version=2
+                )
+            else:
+                answer, is_correct = await quiz_ask_model(update, context, question, expected, user_answer)
+                result = escape_markdown_partial(answer)
+
+            # ✅ Обробка статистики
+            context.user_data["total"] += 1
+
+            # ✅ Оновлюємо рахунок
+            if is_correct:
+                context.user_data["correct"] += 1
+
+            score = (
+                f"✅ Правильних: {context.user_data['correct']}\n"
+                f"❔ Всього: {context.user_data['total']}"
             )
 
-        # ✅ Оновлюємо рахунок
-        if is_correct:
-            context.user_data["correct"] += 1
-
-        score = (
-            f"✅ Правильних: {context.user_data['correct']}\n"
-            f"❔ Всього: {context.user_data['total']}"
-        )
-
-
-        # Кнопки дій
-        buttons = {
-            "quiz_next": "🔄 Наступне питання",
-            "quiz_change_topic": "🗂 Змінити тему",
-            "start": "🏁 Завершити"
-        }
-
-        # Відправляємо результат
-        await send_text_buttons_raw(
-            update,
-            context,
-            f"📘 *Результат:*\n\n{result}\n\n📊 *Ваш рахунок:*\n{score}",
-            buttons
-        )
+            # Кнопки дій
+            buttons = {
+                "quiz_next": "🔄 Наступне питання",
+                "quiz_change_topic": "🗂 Змінити тему",
+                "start": "🏁 Завершити"
+            }
+
+            # Відправляємо результат
+            await p.reply(
+                f"📘 *Результат:*\n\n{result}\n\n📊 *Ваш рахунок:*\n{escape_markdown_partial(score)}",
+                buttons
+            )
 
         context.user_data["conversation_state"] = "quiz_question"
 
@@ -19,16 +19,25 @@ from handlers.start import start_screen
 # ✅ ChatGPT сервіс
 from gpt_instance import chat_gpt
 
+# ✅ буфер фактів із фоновим поповненням
+import config
+from facts import FactService
+
 # ✅ утиліти
 from util import (
     load_prompt,
+    progress,
     send_image,
-    send_text,
-    send_text_buttons_mix
+    send_text
 )
 
+# ✅ реєстр ресурсів — промпт перевіряється при старті бота
+from resource_registry import registry
+
 logger = logging.getLogger(__name__)
 
+registry.require_prompts('random')
+
 
 # -------------------------------------
 # 🎲 Випадковий факт — команда /random
@@ -36,75 +45,43 @@ logger = logging.getLogger(__name__)
 # Максимальна кількість збережених фактів в історії
 MAX_FACT_HISTORY = 25
 
+fact_service = FactService(
+    chat_gpt,
+    lambda: load_prompt('random'),
+    batch_size=config.FACTS_BATCH_SIZE,
+    low_water=config.FACTS_LOW_WATER,
+    history_size=MAX_FACT_HISTORY,
+    threshold=config.FACTS_SIMILARITY
+)
+
 
 async def random_fact(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Надсилає випадковий факт з урахуванням кешу."""
+    """Надсилає випадковий факт із буфера користувача."""
 
     # 1. Показуємо картинку
     await send_image(update, context, '2_random_fact_neon')
 
-    # 2. Повідомлення про пошук
-    loading_msg = await send_text(update, context, "🔍 Шукаю щось цікаве...")
-
     try:
-        # Інціалізуємо кеш фактів
-        used_facts = context.user_data.get("used_facts", [])
-
-        prompt = load_prompt('random')
-
-        # 3. Отримуємо новий факт, який не повторюється
-        fact = None
-        attempts = 0
-        new_fact = None
-
-        while attempts < 5:      # 5 спроб знайти унікальний факт
-            new_fact = await chat_gpt.send_question(
-                prompt,
-                "Дай мені один цікавий факт, коротко."
-            )
+        # 2. Статус очікування з'являється, лише якщо буфер порожній
+        #    і факт генерується (режим — PROGRESS_MODES["random"])
+        async with progress(update, context, "random", "🔍 Шукаю щось цікаве...") as p:
+            # 3. Факт із буфера користувача (пачка фактів генерується одним запитом,
+            #    повтори та перефразування відсіюються)
+            fact = await fact_service.next_fact(update.effective_user.id, context.user_data)
 
-            if new_fact not in used_facts:
-                fact = new_fact
-                break
+            # 4. Кнопки
+            buttons = {
+                'random': 'Хочу ще факт 🔄',
+                'start': 'Закінчити 🏁'
+            }
 
-            attempts += 1
+            safe_fact = escape_markdown(fact, version=2)
 
-        # Якщо всі 5 спроб були невдалими — просто приймаємо останній
-        if fact is None:
-            fact = new_fact
-
-        # Додаємо факт у кеш
-        used_facts.append(fact)
-
-        # Обрізаємо кеш, якщо він надто великий
-        if len(used_facts) > MAX_FACT_HISTORY:
-            used_facts = used_facts[-MAX_FACT_HISTORY:]
-
-        context.user_data["used_facts"] = used_facts
-
-        # 4. Видаляємо "Шукаю..."
-        await context.bot.delete_message(update.effective_chat.id, loading_msg.message_id)
-
-        # 5. Кнопки
-        buttons = {
-            'random': 'Хочу ще факт 🔄',
-            'start': 'Закінчити 🏁'
-        }
-
-        safe_fact = escape_markdown(fact, version=2)
-
-        await send_text_buttons_mix(
-            update,
-            context,
-            f"*🚀 Випадковий факт від AI:*\n\n{safe_fact}",
-            buttons
-        )
+            await p.reply(f"*🚀 Випадковий факт від AI:*\n\n{safe_fact}", buttons)
 
     except Exception as e:
         logger.error(f"Помилка при отриманні випадкового факту: {e}")
 
-        await context.bot.delete_message(update.effective_chat.id, loading_msg.message_id)
-
         await send_text(
             update, context,
             "😔 На жаль, виникла помилка при отриманні факту. Спробуйте пізніше."
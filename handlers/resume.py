@@ -20,15 +20,21 @@ from gpt_instance import chat_gpt
 
 # ✅ утиліти
 from util import (
+    escape_markdown_partial,
     load_prompt,
+    progress,
     send_image,
     send_text,
-    send_text_mix,
-    send_text_buttons_raw
+    send_text_mix
 )
 
+# ✅ реєстр ресурсів — промпт перевіряється при старті бота
+from resource_registry import registry
+
 logger = logging.getLogger(__name__)
 
+registry.require_prompts("resume_help")
+
 
 # ------------------------------------------------
 # 💼 ДОПОМОГА З РЕЗЮМЕ — команда /resume_help
@@ -100,7 +106,6 @@ async def resume_collect_data(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def generate_resume(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Генерує резюме через ChatGPT на основі зібраних даних."""
     prompt = load_prompt("resume_help")
-    chat_gpt.set_prompt(prompt)
 
     name = context.user_data.get("resume_name", "")
     education = context.user_data.get("resume_education", "")
@@ -115,23 +120,16 @@ async def generate_resume(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Склади резюме у заданому форматі."
     )
 
-    waiting = await send_text(update, context, "🔍 Формую ваше резюме...")
-
     try:
-        resume_text = await chat_gpt.send_question(prompt, msg)
-        await context.bot.delete_message(update.effective_chat.id, waiting.message_id)
+        async with progress(update, context, "resume", "🔍 Формую ваше резюме...") as p:
+            resume_text = await chat_gpt.send_question(prompt, msg, feature="resume")
 
-        buttons = {
-            "start": "🏁 Завершити",
-            "resume_restart": "🔄 Почати заново"
-        }
+            buttons = {
+                "start": "🏁 Завершити",
+                "resume_restart": "🔄 Почати заново"
+            }
 
-        await send_text_buttons_raw(
-            update,
-            context,
-            f"📄 *Ваше резюме готове:*\n\n{resume_text}",
-            buttons
-        )
+            await p.reply(escape_markdown_partial(f"📄 *Ваше резюме готове:*\n\n{resume_text}"), buttons)
 
         context.user_data["conversation_state"] = "resume_result"
 
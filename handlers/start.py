@@ -7,31 +7,41 @@ from telegram.ext import ContextTypes
 # ---------------------------------
 # Імпорти локальних модулів застосунку
 # ---------------------------------
+# ✅ сесії ChatGPT і сховище стану
+from gpt_instance import sessions, state_store
+
+# ✅ меню команд і кнопка «Меню» — без повторних налаштувань
+from menu_sync import MenuSync
+
+# ✅ метрики: «Завершити» з будь-якої функції рахується як start
+from metrics import timed_handler
+
 # ✅ утиліти
 from util import (
     load_message,
     send_image,
-    send_text_mix,
-    show_main_menu
+    send_text_mix
 )
 
+# ✅ реєстр ресурсів — повідомлення перевіряється при старті бота
+from resource_registry import registry
+
+registry.require_messages("main")
+
+# ✅ меню команд надсилається в bot.py (on_startup) і лише після змін commands.json
+menu_sync = MenuSync(state_store, registry.commands)
+
 
 # ---------------------------------
 # 🏁 Команда /start — головне меню
 # ---------------------------------
+@timed_handler("start")
 async def start_screen(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.clear()  # видалення попередніх станів розмови
+    sessions.drop(update.effective_chat.id)  # і історії діалогу з ChatGPT
 
     text = load_message("main")
 
     await send_image(update, context, '1_start_screen_neon')
     await send_text_mix(update, context, text)
-    await show_main_menu(update, context, {
-        'start': 'Головне меню · 🌟',
-        'random': 'Випадковий факт · 🎲',
-        'gpt': 'Поставити запитання ChatGPT · 🤖',
-        'talk': 'Розмова з відомою особистістю· 👤',
-        'quiz': 'Пройти квіз та перевірити знання · 🧠',
-        'translate': 'Перекладач · 🌐',
-        'resume_help': 'Допомога з резюме · 💼'
-    })
\ No newline at end of file
+    await menu_sync.ensure_chat(context.bot, update.effective_chat.id)
\ No newline at end of file
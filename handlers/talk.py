@@ -16,8 +16,8 @@ from telegram.helpers import escape_markdown
 # ✅ функції з інших хендлерів
 from handlers.start import start_screen
 
-# ✅ ChatGPT сервіс
-from gpt_instance import chat_gpt
+# ✅ сесії ChatGPT
+from gpt_instance import sessions
 
 # ✅ утиліти
 from util import (
@@ -27,12 +27,29 @@ from util import (
     send_text_buttons_raw
 )
 
+# ✅ реєстр ресурсів
+from resource_registry import registry
+
 logger = logging.getLogger(__name__)
 
 
 # -----------------------------------------------------------
 # 👤 Діалог з відомою особистістю — команда /talk
 # -----------------------------------------------------------
+# ✅ Доступні легенди (ключ = назва промпту та картинки)
+PERSONALITIES = {
+    'talk_steve_jobs': 'Стів Джобс (Apple) 💡',
+    'talk_elon_musk': 'Ілон Маск (SpaceX) 🚀',
+    'talk_marie_curie': 'Марія Кюрі (Науковиця) ⚗️',
+    'talk_leonardo_da_vinci': 'Леонардо да Вінчі (Митець) 🎨',
+    'talk_nikola_tesla': 'Нікола Тесла (Винахідник) ⚡',
+    'talk_albert_einstein': 'Альберт Ейнштейн (Фізик) 🧠',
+}
+
+# ✅ промпти всіх легенд перевіряються при старті бота
+registry.require_prompts(*PERSONALITIES)
+
+
 async def talk_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обробник команди /talk.
@@ -43,15 +60,7 @@ async def talk_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await send_image(update, context, '4_famous_people_neon')
 
     # Меню вибору особистостей
-    personalities = {
-        'talk_steve_jobs': 'Стів Джобс (Apple) 💡',
-        'talk_elon_musk': 'Ілон Маск (SpaceX) 🚀',
-        'talk_marie_curie': 'Марія Кюрі (Науковиця) ⚗️',
-        'talk_leonardo_da_vinci': 'Леонардо да Вінчі (Митець) 🎨',
-        'talk_nikola_tesla': 'Нікола Тесла (Винахідник) ⚡',
-        'talk_albert_einstein': 'Альберт Ейнштейн (Фізик) 🧠',
-        'start': 'Закінчити 🏁'
-    }
+    personalities = {**PERSONALITIES, 'start': 'Закінчити 🏁'}
 
     context.user_data['conversation_state'] = 'talk'
 
@@ -85,7 +94,7 @@ async def talk_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         context.user_data['conversation_state'] = 'talk'
 
         prompt = load_prompt(data)
-        chat_gpt.set_prompt(prompt)
+        (await sessions.get(update.effective_chat.id)).set_prompt(prompt)
 
         personality_name = data.replace('talk_', '').replace('_', ' ').title()
 
@@ -11,16 +11,19 @@ from telegram.helpers import escape_markdown
 # ✅ функції з інших хендлерів
 from handlers.start import start_screen
 
-# ✅ ChatGPT сервіс
-from gpt_instance import chat_gpt
-
 # ✅ утиліти
 from util import (
-    load_prompt,
     send_image,
     send_text_buttons
 )
 
+# ✅ реєстр ресурсів
+from resource_registry import registry
+
+# ✅ кеш перекладів
+import config
+from translation_cache import TranslationCache
+
 
 # ------------------------------------------------
 # 🌐 ПЕРЕКЛАДАЧ — команда /translate
@@ -34,6 +37,15 @@ LANG_NAMES = {
     "translate_es": "🇪🇸 Іспанська",
 }
 
+# ✅ промпти всіх мов перевіряються при старті бота
+registry.require_prompts(*LANG_NAMES)
+
+# ✅ Кеш перекладів (мова + версія промпту + текст → переклад)
+translation_cache = TranslationCache(
+    max_entries=config.TRANSLATION_CACHE_SIZE,
+    db_path=config.TRANSLATION_CACHE_DB
+)
+
 
 async def translate_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -90,9 +102,6 @@ async def translate_button_handler(update: Update, context: ContextTypes.DEFAULT
         context.user_data["conversation_state"] = "translate"
         context.user_data["translate_lang"] = data
 
-        prompt = load_prompt(data)
-        chat_gpt.set_prompt(prompt)
-
         lang_name = LANG_NAMES.get(data, "Обрана мова")
 
         # Екрануємо для MarkdownV2
@@ -0,0 +1,286 @@
+"""
+http_server.py — мінімальний асинхронний HTTP/1.1 сервер на asyncio.
+
+Без сторонніх залежностей. Використовується там, де боту потрібен
+власний HTTP-ендпоінт, і для локальних фейкових серверів у benchmarks/.
+Підтримує keep-alive, тіла запитів із Content-Length
+і потокові відповіді (chunked) — наприклад, для Server-Sent Events.
+
+Сервер може слухати публічну адресу (webhook), тому читання обмежене:
+заголовки — MAX_HEADER_SIZE і READ_TIMEOUT, тіло — MAX_BODY_SIZE
+і READ_TIMEOUT, простій keep-alive з'єднання — IDLE_TIMEOUT.
+Тіла з Transfer-Encoding (chunked) не підтримуються — 411/501.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import parse_qsl, urlsplit
+
+# Текстові назви статусів, які реально використовуються в проєкті
+REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Content Too Large",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+# Максимальний розмір тіла запиту (захист від випадкових гігантських запитів)
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+# Максимальний розмір рядка запиту разом із заголовками
+MAX_HEADER_SIZE = 64 * 1024
+
+# Скільки чекати заголовки і тіло запиту, що вже почався (секунди)
+READ_TIMEOUT = 30.0
+
+# Скільки тримати keep-alive з'єднання без нового запиту (секунди)
+IDLE_TIMEOUT = 75.0
+
+logger = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    """Некоректний запит: сервер відповідає status і закриває з'єднання."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Request:
+    """Вхідний HTTP-запит."""
+    method: str
+    path: str
+    query: dict
+    headers: dict
+    body: bytes = b""
+
+    def json(self):
+        """Розбирає тіло запиту як JSON."""
+        return json.loads(self.body or b"null")
+
+
+@dataclass
+class Response:
+    """HTTP-відповідь."""
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class StreamResponse:
+    """Потокова HTTP-відповідь: тіло віддається частинами (Transfer-Encoding: chunked)."""
+    chunks: AsyncIterator[bytes]
+    status: int = 200
+    content_type: str = "text/event-stream"
+    headers: dict = field(default_factory=dict)
+
+
+def json_response(data, status: int = 200) -> Response:
+    """Формує JSON-відповідь."""
+    return Response(
+        status=status,
+        body=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        content_type="application/json"
+    )
+
+
+def text_response(text: str, status: int = 200) -> Response:
+    """Формує текстову відповідь."""
+    return Response(status=status, body=text.encode("utf-8"))
+
+
+Handler = Callable[[Request], Awaitable[Response | StreamResponse]]
+
+
+class HttpServer:
+    """
+    Простий HTTP-сервер: кожен запит передається в handler(request),
+    який повертає Response або StreamResponse.
+    """
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 0,
+                 read_timeout: float = READ_TIMEOUT, idle_timeout: float = IDLE_TIMEOUT):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Запускає сервер. Якщо port=0 — ОС обирає вільний порт."""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port, limit=MAX_HEADER_SIZE
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Зупиняє прийом нових з'єднань і закриває активні."""
+        if self._server is None:
+            return
+
+        self._server.close()
+
+        for task in list(self._connections):
+            task.cancel()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+        await self._server.wait_closed()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        """Базова адреса сервера."""
+        return f"http://{self.host}:{self.port}"
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обслуговує одне TCP-з'єднання (можливо, кілька запитів поспіль)."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._write_response(writer, text_response(e.message, status=e.status), False)
+                    break
+                if request is None:
+                    break
+
+                try:
+                    response = await self.handler(request)
+                except Exception:
+                    logger.exception(f"Помилка обробки {request.method} {request.path}")
+                    response = text_response("internal error", status=500)
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        """
+        Читає та розбирає один запит.
+        None — клієнт закрив з'єднання або не почав новий запит за idle_timeout;
+        HttpError — запит некоректний, завеликий або надто повільний.
+        """
+        # Простій між запитами keep-alive: перший байт нового запиту
+        try:
+            first = await asyncio.wait_for(reader.readexactly(1), self.idle_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return None
+
+        try:
+            head = first + await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(408, "request timeout")
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "request header is too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "bad request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        encoding = headers.get("transfer-encoding", "").lower()
+        if "chunked" in encoding:
+            raise HttpError(411, "chunked request body is not supported, send Content-Length")
+        if encoding and encoding != "identity":
+            raise HttpError(501, "transfer-encoding is not supported")
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HttpError(400, "bad content-length")
+        if length < 0:
+            raise HttpError(400, "bad content-length")
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, "request body is too large")
+
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.read_timeout) if length else b""
+        except asyncio.TimeoutError:
+            raise HttpError(408, "request timeout")
+
+        url = urlsplit(target)
+        return Request(
+            method=method.upper(),
+            path=url.path,
+            query=dict(parse_qsl(url.query)),
+            headers=headers,
+            body=body
+        )
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response, keep_alive: bool):
+        """Записує відповідь у сокет."""
+        reason = REASONS.get(response.status, "Unknown")
+        streaming = isinstance(response, StreamResponse)
+
+        headers = {
+            "Content-Type": response.content_type,
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        if streaming:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            headers["Content-Length"] = str(len(response.body))
+
+        head = f"HTTP/1.1 {response.status} {reason}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        head += "\r\n"
+
+        if not streaming:
+            writer.write(head.encode("latin-1") + response.body)
+            await writer.drain()
+            return
+
+        writer.write(head.encode("latin-1"))
+        async for chunk in response.chunks:
+            if chunk:
+                writer.write(f"{len(chunk):X}\r\n".encode("latin-1") + chunk + b"\r\n")
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
@@ -0,0 +1,230 @@
+"""
+ingress.py — горизонтальне масштабування: вхідний процес + N робітників.
+
+Один процес бота обмежений одним ядром і одним циклом подій.
+У режимі кластера:
+
+    Telegram ──webhook──▶ ingress ──HTTP──▶ робітник shard_for(chat_id)
+                                    ├─────▶ робітник 1
+                                    └─────▶ робітник N-1
+
+    - ingress (IngressServer) приймає webhook від Telegram і пересилає
+      оновлення робітнику за crc32(chat_id) % N — чат завжди потрапляє
+      до того самого робітника (його сесія, user_data, порядок повідомлень);
+    - робітник — звичайний бот із WebhookServer (bot.py --mode worker),
+      який відкидає повтори за update_id;
+    - передача «хоча б один раз»: ingress повторює пересилання, доки робітник
+      не підтвердить прийом, і лише тоді відповідає Telegram 200; якщо
+      робітник недоступний — 503, і Telegram сам доставить оновлення повторно;
+    - робітники ділять сховище стану (STATE_BACKEND: SQLite на одному хості
+      або Redis для кількох хостів), тож зміна кількості робітників
+      не губить розмови.
+
+Робітники можуть бути процесами на одному хості (bot.py --mode cluster)
+або окремими хостами (SHARD_WORKERS=http://host1:8081/update,...).
+"""
+
+import asyncio
+import hmac
+import logging
+import signal
+import subprocess
+import sys
+import zlib
+
+import httpx
+from telegram import Bot, Update
+
+from http_server import HttpServer, Request, json_response, text_response
+from update_processor import ChatOrderedUpdateProcessor
+from webhook import SECRET_HEADER
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(key, shards: int) -> int:
+    """Номер робітника для чату: стабільний між процесами і перезапусками."""
+    return zlib.crc32(str(key).encode("utf-8")) % shards
+
+
+class IngressServer:
+    """
+    Приймає оновлення Telegram і розподіляє їх між робітниками.
+
+    worker_urls — адреси ендпоінтів робітників (індекс = номер шарду),
+    path / secret_token — шлях і секрет webhook від Telegram,
+    worker_secret — секрет, яким ingress підписує пересилання робітникам,
+    retries — скільки разів повторити пересилання, перш ніж відповісти 503.
+    """
+
+    def __init__(self, worker_urls: list[str], path: str = "/telegram", secret_token: str = "",
+                 worker_secret: str = "", host: str = "0.0.0.0", port: int = 8080,
+                 retries: int = 3, timeout: float = 10.0):
+        if not worker_urls:
+            raise ValueError("Потрібен хоча б один робітник (SHARD_WORKERS)")
+
+        self.worker_urls = worker_urls
+        self.path = path
+        self.secret_token = secret_token
+        self.worker_secret = worker_secret
+        self.retries = retries
+        self.server = HttpServer(self.handle, host=host, port=port)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        )
+
+        # chat_id → [замок, кількість оновлень у роботі]: оновлення одного чату
+        # пересилаються по черзі, щоб робітник отримав їх у порядку надходження
+        self._chats: dict[int, list] = {}
+
+        self.accepting = False
+        self.forwarded = [0] * len(worker_urls)
+        self.retried = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        await self.server.start()
+        self.accepting = True
+        logger.info(f"🌐 Ingress слухає {self.server.url}{self.path}, робітників: {len(self.worker_urls)}")
+
+    async def stop(self) -> None:
+        self.accepting = False
+        await self.server.stop()
+        await self.client.aclose()
+
+    @property
+    def url(self) -> str:
+        return f"{self.server.url}{self.path}"
+
+    async def handle(self, request: Request):
+        if request.path == "/healthz":
+            return json_response({
+                "status": "ok" if self.accepting else "stopping",
+                "forwarded": self.forwarded,
+                "retried": self.retried,
+                "failed": self.failed,
+            }, status=200 if self.accepting else 503)
+
+        if request.path != self.path:
+            return text_response("not found", status=404)
+
+        if request.method != "POST":
+            return text_response("method not allowed", status=405)
+
+        if not self.accepting:
+            return text_response("shutting down", status=503)
+
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret_token
+        ):
+            self.rejected += 1
+            return text_response("forbidden", status=403)
+
+        try:
+            key = ChatOrderedUpdateProcessor.chat_key(Update.de_json(request.json(), None))
+        except Exception as e:
+            logger.warning(f"Некоректне оновлення в ingress: {e}")
+            return text_response("bad request", status=400)
+
+        shard = shard_for(key, len(self.worker_urls)) if key is not None else 0
+
+        if key is None:
+            delivered = await self._forward(shard, request.body)
+        else:
+            slot = self._chats.setdefault(key, [asyncio.Lock(), 0])
+            slot[1] += 1
+            try:
+                async with slot[0]:
+                    delivered = await self._forward(shard, request.body)
+            finally:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._chats[key]
+
+        if not delivered:
+            # Telegram повторить доставку — оновлення не загубиться
+            self.failed += 1
+            return text_response("worker unavailable", status=503)
+
+        self.forwarded[shard] += 1
+        return text_response("ok")
+
+    async def _forward(self, shard: int, body: bytes) -> bool:
+        """Пересилає оновлення робітнику; True — робітник підтвердив прийом."""
+        headers = {"content-type": "application/json"}
+        if self.worker_secret:
+            headers[SECRET_HEADER] = self.worker_secret
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(min(0.2 * 2 ** (attempt - 1), 2.0))
+            try:
+                response = await self.client.post(self.worker_urls[shard], content=body, headers=headers)
+            except httpx.HTTPError as e:
+                logger.warning(f"Робітник {shard} недоступний: {e}")
+                continue
+            if response.status_code == 200:
+                return True
+            if response.status_code in (400, 403):
+                logger.error(f"Робітник {shard} відхилив оновлення: {response.status_code}")
+                return False
+        return False
+
+
+async def run_ingress(server: IngressServer, bot: Bot | None = None, webhook_url: str | None = None,
+                      drop_pending_updates: bool = True) -> None:
+    """
+    Життєвий цикл ingress (аналог run_webhook, але без Application).
+
+    bot і webhook_url — для реєстрації webhook у Telegram; None — не реєструвати.
+    """
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    await server.start()
+    try:
+        if bot is not None and webhook_url:
+            async with bot:
+                await bot.set_webhook(
+                    url=webhook_url,
+                    secret_token=server.secret_token or None,
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=drop_pending_updates
+                )
+            logger.info(f"✅ Webhook встановлено: {webhook_url}")
+
+        try:
+            await stop_event.wait()
+        except asyncio.CancelledError:
+            pass
+    finally:
+        logger.info("🛑 Зупинка ingress")
+        await server.stop()
+
+
+def spawn_workers(count: int, base_port: int, script: str = "bot.py") -> list[subprocess.Popen]:
+    """Запускає count робітників (script --mode worker) на портах base_port … base_port + count - 1."""
+    return [
+        subprocess.Popen([sys.executable, script, "--mode", "worker", "--port", str(base_port + i)])
+        for i in range(count)
+    ]
+
+
+def stop_workers(workers: list[subprocess.Popen], timeout: float = 30.0) -> None:
+    """Коректно зупиняє робітників: SIGTERM, а після timeout — kill."""
+    for worker in workers:
+        if worker.poll() is None:
+            worker.terminate()
+    for worker in workers:
+        try:
+            worker.wait(timeout)
+        except subprocess.TimeoutExpired:
+            worker.kill()
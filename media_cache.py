@@ -0,0 +1,178 @@
+"""
+media_cache.py — кешування медіа для надсилання в Telegram.
+
+FileIdCache — постійний кеш Telegram file_id для локальних файлів.
+Після першого завантаження картинки Telegram повертає file_id,
+за яким той самий файл можна надсилати повторно без передачі байтів.
+Ключ кешу — id бота + назва зображення + SHA-256 вмісту файлу,
+тому зміна файлу автоматично дає новий ключ (і нове завантаження).
+
+ImageVariants — пошук оптимізованих варіантів картинок
+(див. scripts/build_images.py) за маніфестом.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Хеші файлів: шлях → (mtime, розмір, sha256)
+_hashes: dict[str, tuple[int, int, str]] = {}
+
+
+def file_sha256(file: Path) -> str:
+    """SHA-256 вмісту файлу; перераховується лише при зміні mtime/розміру."""
+    stat = file.stat()
+    cached = _hashes.get(str(file))
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256(file.read_bytes()).hexdigest()
+    _hashes[str(file)] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+class FileIdCache:
+    """
+    Зберігає відповідність «ключ → file_id» у JSON-файлі.
+
+    Файл спільний для кількох воркерів: кожен запис перечитує файл
+    і накладає на нього лише власні зміни, тож записи інших процесів
+    не затираються.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._ids: dict[str, str] | None = None
+        # Зміни цього процесу, ще не записані у файл: (ключ, file_id або None — видалити)
+        self._pending: list[tuple[str, str | None]] = []
+
+    def key(self, bot_id: int, name: str, file: Path) -> str:
+        """Ключ кешу для файлу (змінюється разом із вмістом файлу)."""
+        return f"{bot_id}:{name}:{file_sha256(file)}"
+
+    def get(self, key: str) -> str | None:
+        return self._load().get(key)
+
+    def put(self, key: str, file_id: str) -> None:
+        """Запам'ятовує file_id і прибирає записи для старих версій того ж файлу."""
+        self._apply(self._load(), key, file_id)
+        self._pending.append((key, file_id))
+        self._save()
+
+    def discard(self, key: str) -> None:
+        """Видаляє file_id, який Telegram відхилив."""
+        if self._load().pop(key, None) is not None:
+            self._pending.append((key, None))
+            self._save()
+
+    @staticmethod
+    def _apply(ids: dict[str, str], key: str, file_id: str | None) -> None:
+        """Одна зміна кешу: новий file_id (без старих версій файлу) або видалення."""
+        if file_id is None:
+            ids.pop(key, None)
+            return
+
+        prefix = key.rsplit(":", 1)[0] + ":"
+        for old in [k for k in ids if k.startswith(prefix) and k != key]:
+            del ids[old]
+        ids[key] = file_id
+
+    def _read(self) -> dict[str, str]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Кеш file_id пошкоджено, починаємо з нуля: {e}")
+            return {}
+
+    def _load(self) -> dict[str, str]:
+        if self._ids is None:
+            self._ids = self._read()
+        return self._ids
+
+    def _save(self) -> None:
+        """
+        Атомарний запис: актуальний вміст файлу + зміни цього процесу
+        у власний тимчасовий файл, потім заміна.
+        """
+        ids = self._read()
+        for key, file_id in self._pending:
+            self._apply(ids, key, file_id)
+
+        tmp_name = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.path.parent,
+                prefix=self.path.name + ".", suffix=".tmp", delete=False
+            ) as tmp:
+                tmp_name = tmp.name
+                json.dump(ids, tmp, ensure_ascii=False, indent=2)
+            os.replace(tmp_name, self.path)
+        except OSError as e:
+            logger.warning(f"Не вдалося зберегти кеш file_id: {e}")
+            if tmp_name:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+            return
+
+        # Записано — беремо також file_id, збережені іншими воркерами
+        self._ids = ids
+        self._pending.clear()
+
+
+class ImageVariants:
+    """
+    Оптимізовані варіанти картинок за маніфестом manifest.json.
+
+    Варіант використовується, лише якщо він існує і хеш оригіналу
+    збігається з тим, із якого варіант зібрано (інакше — оригінал).
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / "manifest.json"
+        self._manifest: dict = {}
+        self._manifest_mtime: int | None = None
+
+    def resolve(self, name: str, source: Path) -> Path:
+        """Повертає шлях до варіанта для надсилання або сам оригінал."""
+        entry = self._load().get(name)
+        if not entry:
+            return source
+
+        variant = self.directory / entry["variant"]
+        try:
+            if file_sha256(source) != entry["source_sha256"] or not variant.exists():
+                return source
+        except OSError:
+            return source
+
+        return variant
+
+    def _load(self) -> dict:
+        """Перечитує маніфест, лише якщо файл змінився."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except OSError:
+            self._manifest, self._manifest_mtime = {}, None
+            return self._manifest
+
+        if mtime != self._manifest_mtime:
+            try:
+                data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+                self._manifest = data.get("images", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Маніфест варіантів картинок пошкоджено: {e}")
+                self._manifest = {}
+            self._manifest_mtime = mtime
+
+        return self._manifest
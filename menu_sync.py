@@ -0,0 +1,130 @@
+"""
+menu_sync.py — меню команд і кнопка «Меню» без зайвих викликів Bot API.
+
+Раніше кожен /start (а також кнопка «Завершити» і кумедна відповідь
+на незрозуміле повідомлення) викликав set_my_commands — глобальне
+налаштування бота — і set_chat_menu_button для чату: два додаткові
+запити до Telegram на найгарячішому шляху.
+
+MenuSync робить кожне налаштування один раз:
+    - меню команд (resources/messages/commands.json) надсилається, лише
+      коли змінився його хеш; хеш останнього успішного надсилання
+      зберігається в state_store, тож рестарт і нові репліки його не
+      повторюють, а зміна commands.json (зокрема гаряче перезавантаження)
+      надсилає меню заново;
+    - кнопка «Меню» встановлюється один раз на чат; множина налаштованих
+      чатів тримається в пам'яті й зберігається в state_store
+      (окремий запис на чат — читається лише при першій зустрічі з чатом).
+
+Повторний /start не робить жодного виклику налаштувань.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Callable, Mapping
+
+from telegram import Bot, BotCommand, MenuButtonCommands
+from telegram.error import TelegramError
+
+logger = logging.getLogger(__name__)
+
+
+def commands_hash(commands: Mapping[str, str]) -> str:
+    raw = json.dumps(dict(commands), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MenuSync:
+    """
+    Синхронізація меню команд (глобально) і кнопки «Меню» (по чатах).
+
+    store — StateStore (стан спільний для перезапусків і реплік),
+    commands — функція, що повертає актуальні команди {команда: опис}.
+    """
+
+    def __init__(self, store, commands: Callable[[], Mapping[str, str]]):
+        self.store = store
+        self.commands = commands
+
+        # Хеш меню, яке вже є в Telegram (None — ще не перевіряли)
+        self._synced: str | None = None
+        # Хеш рахується заново лише тоді, коли реєстр віддав новий об'єкт команд
+        self._source: Mapping[str, str] | None = None
+        self._source_hash = ""
+        self._lock = asyncio.Lock()
+
+        # Чати, в яких кнопку «Меню» вже встановлено
+        self._chats: set[int] = set()
+
+        self.commands_sent = 0
+        self.buttons_sent = 0
+        self.skipped = 0
+
+    def current_hash(self) -> str:
+        commands = self.commands()
+        if commands is not self._source:
+            self._source, self._source_hash = commands, commands_hash(commands)
+        return self._source_hash
+
+    async def sync_commands(self, bot: Bot) -> bool:
+        """Надсилає меню команд, якщо воно змінилося. Повертає True, якщо надіслано."""
+        digest = self.current_hash()
+        if digest == self._synced:
+            return False
+        commands = self._source
+
+        async with self._lock:
+            if digest == self._synced:
+                return False
+
+            saved = await self.store.load("bot", bot.id)
+            if saved.get("commands_hash") == digest:
+                self._synced = digest
+                logger.info("✅ Меню команд не змінилося — set_my_commands пропущено")
+                return False
+
+            try:
+                await bot.set_my_commands([BotCommand(k, v) for k, v in commands.items()])
+            except TelegramError as e:
+                # Спробуємо ще раз при наступному /start
+                logger.warning(f"Не вдалося оновити меню команд: {e}")
+                return False
+
+            self._synced = digest
+            self.store.save("bot", bot.id, {**saved, "commands_hash": digest})
+            self.commands_sent += 1
+            logger.info("✅ MENU UPDATED — sent to Telegram")
+            return True
+
+    async def ensure_chat(self, bot: Bot, chat_id: int) -> None:
+        """Меню команд актуальне і кнопка «Меню» в чаті встановлена (без викликів, якщо вже так)."""
+        await self.sync_commands(bot)
+
+        if chat_id in self._chats:
+            self.skipped += 1
+            return
+
+        if (await self.store.load("menu", chat_id)).get("button"):
+            self._chats.add(chat_id)
+            self.skipped += 1
+            return
+
+        try:
+            await bot.set_chat_menu_button(chat_id=chat_id, menu_button=MenuButtonCommands())
+        except TelegramError as e:
+            logger.warning(f"Не вдалося встановити кнопку меню для чату {chat_id}: {e}")
+            return
+
+        self._chats.add(chat_id)
+        self.store.save("menu", chat_id, {"button": True})
+        self.buttons_sent += 1
+
+    def report(self) -> dict:
+        return {
+            "commands_sent": self.commands_sent,
+            "buttons_sent": self.buttons_sent,
+            "skipped": self.skipped,
+            "chats": len(self._chats),
+        }
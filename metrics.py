@@ -0,0 +1,298 @@
+"""
+metrics.py — метрики бота у текстовому форматі Prometheus.
+
+Досі про роботу бота можна було дізнатися лише з текстових логів.
+Цей модуль збирає:
+    - затримку хендлерів (start, random, gpt, talk, quiz, translate, resume);
+    - затримку запитів до OpenAI, токени на вході/виході та помилки за функціями;
+    - виклики Telegram Bot API і відповіді 429 за методами;
+    - кількість активних сесій і частку влучань кешів (знімаються під час scrape).
+
+Метрики оновлюються лише з циклу подій (один потік), тому лічильники —
+звичайні числа без замків, а гістограми мають заздалегідь виділені
+кошики: спостереження — це bisect і два додавання. Текст формується
+лише тоді, коли Prometheus запитує GET /metrics (MetricsServer).
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+
+from http_server import HttpServer, Request, Response, text_response
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Кошики затримок (секунди): від миттєвих відповідей із кешу до довгих генерацій
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Лічильник, що лише зростає; окреме значення для кожного набору міток."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Gauge:
+    """
+    Поточне значення, яке зчитується під час scrape.
+
+    read — функція, що повертає {мітки: значення} (або одне число без міток).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.read = read
+
+    def samples(self):
+        try:
+            values = self.read()
+        except Exception as e:
+            logger.warning(f"Метрика {self.name} недоступна: {e}")
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            labels = labels if isinstance(labels, tuple) else (labels,)
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Histogram:
+    """
+    Гістограма з фіксованими кошиками.
+
+    Для кожного набору міток — один список лічильників (виділяється
+    при першому спостереженні або одразу через preset).
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS, preset: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # мітки → [лічильники кошиків..., +Inf, сума]
+        self.series: dict[tuple, list] = {}
+        for labels in preset:
+            self._series(labels if isinstance(labels, tuple) else (labels,))
+
+    def _series(self, labels: tuple) -> list:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        return series
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.series.get(labels) or self._series(labels)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> "_Timer":
+        """Контекстний менеджер: with histogram.time("gpt"): ..."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.label_names, labels, f'le="{bound}"'), cumulative
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket", _labels(self.label_names, labels, 'le="+Inf"'), cumulative
+            yield f"{self.name}_sum", _labels(self.label_names, labels), series[-1]
+            yield f"{self.name}_count", _labels(self.label_names, labels), cumulative
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Набір метрик процесу; render() — текст для Prometheus."""
+
+    def __init__(self):
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Метрика {metric.name} вже зареєстрована")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, read: Callable, labels: tuple = ()) -> Gauge:
+        """Реєструє (або замінює) gauge — джерела значень підключаються після створення сервісів."""
+        self.metrics.pop(name, None)
+        return self.add(Gauge(name, help, read, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), **kwargs) -> Histogram:
+        return self.add(Histogram(name, help, labels, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------------------
+# Метрики бота
+# ---------------------------------
+HANDLERS = ("start", "random", "gpt", "talk", "quiz", "translate", "resume")
+
+registry = MetricsRegistry()
+
+HANDLER_LATENCY = registry.histogram(
+    "bot_handler_seconds", "Час обробки оновлення хендлером",
+    labels=("handler",), preset=HANDLERS
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Необроблені винятки в хендлерах", labels=("handler",)
+)
+
+OPENAI_LATENCY = registry.histogram(
+    "openai_request_seconds", "Затримка запитів до OpenAI (для потоків — до першого фрагмента)",
+    labels=("feature", "model")
+)
+OPENAI_TOKENS = registry.counter(
+    "openai_tokens_total", "Токени OpenAI за функціями", labels=("feature", "direction")
+)
+OPENAI_ERRORS = registry.counter(
+    "openai_errors_total", "Помилки запитів до OpenAI", labels=("feature", "error")
+)
+
+TELEGRAM_CALLS = registry.counter(
+    "telegram_api_calls_total", "Виклики Telegram Bot API", labels=("method",)
+)
+TELEGRAM_RETRY_AFTER = registry.counter(
+    "telegram_api_429_total", "Відповіді 429 (RetryAfter) від Telegram", labels=("method",)
+)
+
+
+def handler_for_state(state: str | None) -> str:
+    """Хендлер, якому належить текстове повідомлення в цьому стані розмови."""
+    if not state:
+        return "start"
+    return state.split("_", 1)[0]
+
+
+def handler_for_message(update, context) -> str:
+    """Назва хендлера для загального обробника повідомлень (quiz_waiting_answer → quiz)."""
+    return handler_for_state(context.user_data.get("conversation_state"))
+
+
+# Мітка хендлера поточного оновлення: вкладений timed_handler її уточнює
+_handler_label: ContextVar[list | None] = ContextVar("handler_label", default=None)
+
+
+def timed_handler(handler: str | Callable):
+    """
+    Обгортка хендлера PTB, що пише затримку в HANDLER_LATENCY.
+
+    handler — назва або функція (update, context) -> назва
+    (для загального обробника повідомлень — за станом розмови).
+
+    Якщо всередині викликано інший обгорнутий хендлер (кнопка «Завершити»
+    у квізі викликає start_screen), оновлення рахується за ним — за тим,
+    що справді виконав роботу, — а затримка пишеться один раз.
+    """
+    def decorator(callback):
+        @wraps(callback)
+        async def wrapper(update, context):
+            name = handler(update, context) if callable(handler) else handler
+
+            label = _handler_label.get()
+            if label is not None:
+                label[0] = name
+                return await callback(update, context)
+
+            label = [name]
+            token = _handler_label.set(label)
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            except Exception:
+                HANDLER_ERRORS.inc(label[0])
+                raise
+            finally:
+                _handler_label.reset(token)
+                HANDLER_LATENCY.observe(time.perf_counter() - started, label[0])
+        return wrapper
+    return decorator
+
+
+class MetricsServer:
+    """Локальний HTTP-ендпоінт GET /metrics."""
+
+    def __init__(self, metrics: MetricsRegistry = registry, host: str = "127.0.0.1", port: int = 9100):
+        self.metrics = metrics
+        self.server = HttpServer(self.handle, host=host, port=port)
+
+    async def start(self) -> None:
+        await self.server.start()
+        logger.info(f"📈 Метрики: {self.server.url}/metrics")
+
+    async def stop(self) -> None:
+        await self.server.stop()
+
+    async def handle(self, request: Request):
+        if request.path != "/metrics":
+            return text_response("not found", status=404)
+        if request.method != "GET":
+            return text_response("method not allowed", status=405)
+        return Response(body=self.metrics.render().encode("utf-8"), content_type=CONTENT_TYPE)
@@ -0,0 +1,132 @@
+"""
+model_router.py — вибір моделі, ліміту відповіді та температури для кожної функції бота.
+
+Раніше всі запити йшли з model="gpt-3.5-turbo", max_tokens=3000,
+temperature=0.9: однорядковий переклад і вердикт квізу резервували
+стільки ж токенів відповіді, скільки повне резюме, і генерувалися
+з тією самою «творчою» температурою.
+
+ModelRouter тримає таблицю профілів {функція: ModelProfile}:
+    - model — модель (порожнє значення — модель за замовчуванням);
+    - max_tokens — ліміт токенів відповіді;
+    - temperature — низька для оцінок і перекладу, вища для фактів і діалогу;
+    - timeout — скільки чекати на основну модель, якщо є запасна.
+
+Запасна модель (fallback) використовується, коли основна не відповіла
+вчасно або перевантажена (таймаут, 429, 5xx): запит повторюється
+один раз на швидшій/дешевшій моделі. Для потокових відповідей —
+лише якщо не прийшло жодного фрагмента.
+"""
+
+import logging
+from dataclasses import dataclass, replace
+
+logger = logging.getLogger(__name__)
+
+
+def fallback_errors() -> tuple:
+    """
+    Помилки, після яких має сенс спробувати запасну модель.
+
+    openai імпортується тут, а не на рівні модуля: до першої помилки
+    клієнт уже створений, тож імпорт нічого не коштує, а старт бота — не чекає.
+    """
+    import openai
+
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Параметри запиту для однієї функції бота."""
+    model: str
+    max_tokens: int = 3000
+    temperature: float = 0.9
+    timeout: float | None = None
+
+
+def parse_profile(spec: str, default_model: str) -> ModelProfile:
+    """
+    Розбирає профіль виду "модель:max_tokens:temperature[:timeout]".
+    Порожні поля — значення за замовчуванням ("::0.2" — лише температура).
+    """
+    fields = [part.strip() for part in spec.split(":")]
+    fields += [""] * (4 - len(fields))
+    model, max_tokens, temperature, timeout = fields[:4]
+    base = ModelProfile(default_model)
+    return ModelProfile(
+        model=model or default_model,
+        max_tokens=int(max_tokens) if max_tokens else base.max_tokens,
+        temperature=float(temperature) if temperature else base.temperature,
+        timeout=float(timeout) if timeout else None
+    )
+
+
+class ModelRouter:
+    """
+    Таблиця профілів за функціями.
+
+    profiles — {функція: ModelProfile}; для невідомих функцій діє default,
+    fallback_model — запасна модель (None — без запасної),
+    fallback_timeout — таймаут основної моделі за замовчуванням, якщо є запасна.
+    """
+
+    def __init__(
+        self,
+        default: ModelProfile,
+        profiles: dict[str, ModelProfile] | None = None,
+        fallback_model: str | None = None,
+        fallback_timeout: float | None = None
+    ):
+        self.default = default
+        self.profiles = dict(profiles or {})
+        self.fallback_model = fallback_model
+        self.fallback_timeout = fallback_timeout
+
+        self.requests: dict[str, int] = {}
+        self.fallbacks: dict[str, int] = {}
+
+    @classmethod
+    def from_specs(cls, default_model: str, specs: dict[str, str], **kwargs) -> "ModelRouter":
+        """Будує роутер із рядків конфігурації {функція: "модель:max_tokens:temperature[:timeout]"}."""
+        default = parse_profile(specs.pop("default", ""), default_model)
+        return cls(
+            default,
+            {feature: parse_profile(spec, default.model) for feature, spec in specs.items()},
+            **kwargs
+        )
+
+    def profile(self, feature: str | None) -> ModelProfile:
+        profile = self.profiles.get(feature, self.default) if feature else self.default
+        if not self.fallback_model or self.fallback_model == profile.model:
+            # Переходити нікуди — таймаут і повтори як у звичайного запиту
+            return replace(profile, timeout=None) if profile.timeout else profile
+        if profile.timeout is None and self.fallback_timeout:
+            profile = replace(profile, timeout=self.fallback_timeout)
+        return profile
+
+    def fallback(self, feature: str | None, profile: ModelProfile, error: Exception) -> ModelProfile | None:
+        """Профіль для повтору на запасній моделі або None, якщо повторювати не варто."""
+        if not self.fallback_model or self.fallback_model == profile.model:
+            return None
+        if not isinstance(error, fallback_errors()):
+            return None
+
+        name = feature or "default"
+        self.fallbacks[name] = self.fallbacks.get(name, 0) + 1
+        logger.info(f"{profile.model} недоступна для {name} ({type(error).__name__}) — "
+                    f"повтор на {self.fallback_model}")
+        return replace(profile, model=self.fallback_model, timeout=None)
+
+    def count(self, feature: str | None) -> None:
+        name = feature or "default"
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    def report(self) -> dict:
+        """Знімок лічильників для логів/метрик."""
+        return {"requests": dict(self.requests), "fallbacks": dict(self.fallbacks)}
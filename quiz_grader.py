@@ -0,0 +1,216 @@
+"""
+quiz_grader.py — локальна перевірка відповідей квізу.
+
+Питання з пулу (quiz_pool.py) приходять разом з очікуваною відповіддю
+та допустимими варіантами, тож більшість відповідей можна оцінити
+без запиту до ChatGPT: нормалізація тексту, точний збіг, збіг чисел
+і нечітке порівняння (difflib) з порогами впевненості.
+
+До моделі звертаємося лише тоді, коли локальна оцінка неоднозначна:
+схожість між порогами, інша мова/алфавіт, розгорнута відповідь тощо.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+# Вердикти
+CORRECT = "correct"
+WRONG = "wrong"
+AMBIGUOUS = "ambiguous"
+
+# Службові слова, які не впливають на суть відповіді
+STOP_WORDS = frozenset({
+    "the", "a", "an", "of",
+    "це", "та", "і", "й", "в", "у", "на", "рік", "році", "року",
+})
+
+# Розгорнуті відповіді (речення) краще віддати на оцінку моделі
+MAX_LOCAL_TOKENS = 6
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+# Одиниці, які можуть стояти поруч із числом у числовій відповіді («384 400 км», «1969 рік»)
+UNITS = frozenset({
+    "км", "м", "см", "мм", "кг", "г", "т", "с", "хв", "год", "градус", "градуси", "градусів",
+    "років", "роки", "рік", "метрів", "кілометрів", "відсотків", "мільйонів", "мільярдів",
+    "km", "m", "cm", "kg", "g", "s", "years", "degrees", "percent", "million", "billion",
+})
+
+
+def _numbers(text: str) -> tuple[str, ...]:
+    """Числа у відповіді (3,14 і 3.14 — одне й те саме)."""
+    return tuple(n.replace(",", ".") for n in _NUMBER.findall(text))
+
+
+def _is_numeric(text: str) -> bool:
+    """Відповідь — число (з одиницями виміру), а не назва з числом («Аполлон 11»)."""
+    words = _NUMBER.sub(" ", text).split()
+    return bool(_numbers(text)) and all(word in UNITS for word in words)
+
+
+@dataclass(frozen=True)
+class Grade:
+    """Результат локальної перевірки."""
+    verdict: str
+    confidence: float
+    matched: str = ""
+
+    @property
+    def is_final(self) -> bool:
+        """True — відповідь оцінено локально, модель не потрібна."""
+        return self.verdict != AMBIGUOUS
+
+
+def normalize_answer(text: str) -> str:
+    """Нижній регістр, без наголосів, апострофів, пунктуації та службових слів."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[ʼ'`’]", "", text)
+    text = re.sub(r"[^\w\s.,]|(?<!\d)[.,]|[.,](?!\d)", " ", text)
+    return " ".join(word for word in text.split() if word not in STOP_WORDS)
+
+
+def _alphabet(text: str) -> str | None:
+    """Алфавіт тексту: latin / cyrillic / None (цифри або змішаний)."""
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters:
+        return None
+    if all("a" <= ch <= "z" for ch in letters):
+        return "latin"
+    if all("Ѐ" <= ch <= "ӿ" for ch in letters):
+        return "cyrillic"
+    return None
+
+
+def _similarity(user: str, candidate: str) -> float:
+    """Схожість цілих рядків (difflib)."""
+    return SequenceMatcher(None, user, candidate).ratio()
+
+
+def _allowed_edits(word: str) -> int:
+    """Скільки описок допустимо в слові: коротке — жодної, звичайне — одна, довге — дві."""
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) < 12 else 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Відстань Левенштейна; рахує лише до limit + 1 (далі — «забагато»)."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _words_match(user: str, candidate: str) -> bool:
+    """
+    Кожне слово відповіді збігається з відповідним словом користувача
+    з точністю до описки (_allowed_edits): «Південна Америка» ≠ «Північна Америка»
+    і «Австрія» ≠ «Австралія», хоча рядки загалом схожі на 0,875.
+    """
+    user_words, candidate_words = user.split(), candidate.split()
+    if len(user_words) != len(candidate_words):
+        return False
+    return all(
+        _edit_distance(u, c, _allowed_edits(c)) <= _allowed_edits(c)
+        for u, c in zip(user_words, candidate_words)
+    )
+
+
+def _partial_match(user: str, candidate: str) -> float:
+    """
+    Найкращий збіг окремого слова («Ейнштейн» на «Альберт Ейнштейн»).
+    Лише доводить відповідь до моделі — сам по собі правильність не доводить
+    («Тихий океан» на «Північний Льодовитий океан» збігається словом «океан»).
+    """
+    user_words, candidate_words = user.split(), candidate.split()
+    if len(candidate_words) < 2 or len(user_words) >= len(candidate_words):
+        return 0.0
+    return max(
+        (SequenceMatcher(None, u, c).ratio() for c in candidate_words if len(c) >= 4 for u in user_words),
+        default=0.0
+    )
+
+
+class QuizGrader:
+    """
+    Локальна оцінка відповідей із порогами впевненості.
+
+    accept — від цієї схожості відповідь вважається правильною,
+    reject — до цієї схожості (включно) — неправильною,
+    між порогами — неоднозначно, рішення за моделлю.
+    """
+
+    def __init__(self, accept: float = 0.85, reject: float = 0.5):
+        self.accept = accept
+        self.reject = reject
+
+        self.local = 0
+        self.escalated = 0
+
+    def grade(self, user_answer: str, answer: str, aliases=()) -> Grade:
+        """Оцінює відповідь користувача і рахує, скільки запитів до моделі зекономлено."""
+        grade = self._grade(user_answer, answer, aliases)
+        if grade.is_final:
+            self.local += 1
+        else:
+            self.escalated += 1
+        return grade
+
+    def _grade(self, user_answer: str, answer: str, aliases) -> Grade:
+        user = normalize_answer(user_answer)
+        candidates = [c for c in (normalize_answer(a) for a in (answer, *aliases)) if c]
+
+        # Без очікуваної відповіді (старе питання) або з порожньою відповіддю
+        if not candidates or not user:
+            return Grade(AMBIGUOUS, 0.0)
+
+        # 1) Точний збіг після нормалізації
+        if user in candidates:
+            return Grade(CORRECT, 1.0, user)
+
+        # 2) Числові відповіді (число з одиницями): число або збігається, або ні
+        expected_numbers = {_numbers(c) for c in candidates if _is_numeric(c)}
+        user_numbers = _numbers(user)
+        if expected_numbers and user_numbers:
+            if user_numbers in expected_numbers:
+                return Grade(CORRECT, 1.0, " ".join(user_numbers))
+            return Grade(WRONG, 1.0)
+
+        # Розгорнуту відповідь (речення) локально не оцінюємо
+        if len(user.split()) > MAX_LOCAL_TOKENS:
+            return Grade(AMBIGUOUS, 0.0)
+
+        # 3) Нечітке порівняння з відповіддю та синонімами:
+        #    правильно — лише якщо схожий весь рядок і кожне слово
+        score, matched = max((_similarity(user, c), c) for c in candidates)
+
+        if score >= self.accept and _words_match(user, matched):
+            return Grade(CORRECT, score, matched)
+
+        # Збіг окремого слова — неоднозначно, але точно не «неправильно»
+        score = max(score, *(_partial_match(user, c) for c in candidates))
+
+        # «Неправильно» — лише якщо відповідь написана тим самим алфавітом,
+        # що й очікувана («oxygen» на «кисень» може бути правильним перекладом)
+        if score <= self.reject and _alphabet(candidates[0]) in (None, _alphabet(user)):
+            return Grade(WRONG, 1.0 - score)
+        return Grade(AMBIGUOUS, min(score, self.accept), matched)
+
+    def stats(self) -> dict:
+        """Скільки відповідей оцінено локально і скільки пішло до моделі."""
+        total = self.local + self.escalated
+        return {
+            "local": self.local,
+            "escalated": self.escalated,
+            "local_ratio": round(self.local / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,274 @@
+"""
+quiz_pool.py — пул заздалегідь згенерованих питань квізу.
+
+Замість запиту до ChatGPT на кожне «Наступне питання» фонова задача
+тримає для кожної теми запас питань (target depth), генеруючи їх пачками
+одним запитом. Разом із питанням зберігається очікувана відповідь
+та її допустимі варіанти — це знадобиться для перевірки відповіді.
+
+Щойно видані питання запам'ятовуються, і повтори (після нормалізації тексту)
+в пул не потрапляють. Статистика (глибина, генерації, hit ratio) — у stats().
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Інструкція для пакетної генерації (додається до промпту теми)
+BATCH_REQUEST = (
+    "Згенеруй {count} різних питань квізу на цю тему.\n"
+    "Поверни ТІЛЬКИ JSON-масив без жодного іншого тексту, у форматі:\n"
+    '[{{"question": "текст питання", "answer": "коротка правильна відповідь", '
+    '"aliases": ["інші допустимі варіанти відповіді"]}}]\n'
+    "Відповідь має бути короткою (слово, число, імʼя або термін)."
+)
+
+
+@dataclass(frozen=True)
+class QuizQuestion:
+    """Питання квізу з очікуваною відповіддю."""
+    question: str
+    answer: str = ""
+    aliases: tuple[str, ...] = ()
+
+
+@dataclass
+class TopicStats:
+    """Лічильники однієї теми."""
+    hits: int = 0
+    misses: int = 0
+    generated: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    failures: int = 0
+
+
+def normalize_question(text: str) -> str:
+    """Нормалізація для пошуку повторів: регістр, пунктуація, пробіли."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def parse_batch(raw: str) -> list[QuizQuestion]:
+    """Розбирає JSON-масив питань із відповіді моделі (ігнорує зайвий текст навколо)."""
+    start, end = raw.find("["), raw.rfind("]")
+    if start == -1 or end <= start:
+        return []
+
+    try:
+        items = json.loads(raw[start:end + 1])
+    except ValueError:
+        return []
+
+    questions = []
+    for item in items:
+        if not isinstance(item, dict) or not str(item.get("question", "")).strip():
+            continue
+        aliases = item.get("aliases") or []
+        questions.append(QuizQuestion(
+            question=str(item["question"]).strip(),
+            answer=str(item.get("answer", "")).strip(),
+            aliases=tuple(str(a).strip() for a in aliases if str(a).strip())
+        ))
+    return questions
+
+
+class QuizPool:
+    """
+    Пул питань за темами з фоновим поповненням.
+
+    depth — скільки питань тримати напоготові для кожної теми,
+    batch_size — скільки питань просити в одному запиті,
+    refill_interval — мінімальна пауза між пакетними запитами (темп поповнення).
+    """
+
+    def __init__(
+        self,
+        service,
+        topics,
+        prompt_for: Callable[[str], str],
+        depth: int = 5,
+        batch_size: int = 5,
+        refill_interval: float = 1.0,
+        recent_size: int = 200
+    ):
+        self.service = service
+        self.topics = list(topics)
+        self.prompt_for = prompt_for
+        self.depth = depth
+        self.batch_size = batch_size
+        self.refill_interval = refill_interval
+
+        self._queues: dict[str, deque[QuizQuestion]] = {t: deque() for t in self.topics}
+        self._stats: dict[str, TopicStats] = {t: TopicStats() for t in self.topics}
+        self._recent: deque[str] = deque(maxlen=recent_size)
+        self._recent_set: set[str] = set()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._started_at = time.monotonic()
+
+    # ---------------------------
+    # ВИДАЧА ПИТАНЬ
+    # ---------------------------
+
+    def take(self, topic: str) -> QuizQuestion | None:
+        """Миттєво повертає питання з пулу або None, якщо пул теми порожній."""
+        question = self._pop(topic)
+        if question is not None:
+            self._stats[topic].hits += 1
+        return question
+
+    async def get(self, topic: str) -> QuizQuestion:
+        """Питання з пулу, а якщо пул порожній — генерує пачку одразу."""
+        question = self.take(topic)
+        if question is not None:
+            return question
+
+        self._stats[topic].misses += 1
+        await self._refill(topic, wanted=1)
+
+        question = self._pop(topic)
+        if question is None:
+            raise RuntimeError(f"Не вдалося згенерувати питання для теми {topic}")
+        return question
+
+    def _pop(self, topic: str) -> QuizQuestion | None:
+        queue = self._queues.setdefault(topic, deque())
+        self._stats.setdefault(topic, TopicStats())
+
+        # Кожна видача — сигнал фоновій задачі перевірити глибину пулу
+        self._request_refill()
+
+        if not queue:
+            return None
+
+        question = queue.popleft()
+        self._remember(question)
+        return question
+
+    # ---------------------------
+    # ФОНОВЕ ПОПОВНЕННЯ
+    # ---------------------------
+
+    def start(self) -> None:
+        """Запускає фонове поповнення (потрібен запущений цикл подій)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _request_refill(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            for topic in list(self._queues):
+                while len(self._queues[topic]) < self.depth:
+                    added = await self._refill(topic, wanted=self.depth)
+                    await asyncio.sleep(self.refill_interval)
+                    if not added:
+                        break
+
+    async def _refill(self, topic: str, wanted: int) -> int:
+        """
+        Одна пакетна генерація для теми, якщо в пулі менше wanted питань
+        (перевіряється вже під замком — паралельні запити не дублюються).
+        Повертає кількість нових питань.
+        """
+        lock = self._locks.setdefault(topic, asyncio.Lock())
+
+        async with lock:
+            stats = self._stats.setdefault(topic, TopicStats())
+            queue = self._queues.setdefault(topic, deque())
+
+            if len(queue) >= wanted:
+                return 0
+
+            try:
+                raw = await self.service.send_question(
+                    self.prompt_for(topic),
+                    BATCH_REQUEST.format(count=self.batch_size),
+                    feature="quiz_pool"
+                )
+            except Exception as e:
+                stats.failures += 1
+                logger.warning(f"Пул квізу {topic}: помилка генерації: {e}")
+                return 0
+
+            stats.batches += 1
+            known = self._recent_set | {normalize_question(q.question) for q in queue}
+
+            added = 0
+            for question in parse_batch(raw):
+                key = normalize_question(question.question)
+                if key in known:
+                    stats.duplicates += 1
+                    continue
+                known.add(key)
+                queue.append(question)
+                added += 1
+
+            stats.generated += added
+            if added == 0:
+                stats.failures += 1
+
+            logger.info(
+                f"🧠 Пул квізу {topic}: +{added}, глибина {len(queue)}/{self.depth}, "
+                f"hit ratio {self.hit_ratio(topic):.2f}"
+            )
+            return added
+
+    def _remember(self, question: QuizQuestion) -> None:
+        """Запам'ятовує видане питання, щоб не повторювати його найближчим часом."""
+        key = normalize_question(question.question)
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_set.discard(self._recent[0])
+        self._recent.append(key)
+        self._recent_set.add(key)
+
+    # ---------------------------
+    # СТАТИСТИКА
+    # ---------------------------
+
+    def hit_ratio(self, topic: str | None = None) -> float:
+        """Частка питань, виданих із пулу без очікування."""
+        stats = [self._stats[topic]] if topic else list(self._stats.values())
+        hits = sum(s.hits for s in stats)
+        total = hits + sum(s.misses for s in stats)
+        return hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Знімок стану пулу: глибина, лічильники, hit ratio, темп генерації."""
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            topic: {
+                "depth": len(self._queues.get(topic, ())),
+                "target_depth": self.depth,
+                "hit_ratio": round(self.hit_ratio(topic), 3),
+                "generated_per_min": round(stats.generated * 60 / uptime, 2),
+                **stats.__dict__,
+            }
+            for topic, stats in self._stats.items()
+        }
@@ -0,0 +1,359 @@
+"""
+rate_limiter.py — планувальник вихідних запитів до Telegram Bot API.
+
+Telegram обмежує частоту повідомлень: ~30 на секунду для бота загалом,
+~1 на секунду в одному чаті (короткі сплески допускаються), ~20 на хвилину
+в групі. Перевищення дає 429 (RetryAfter) і втрачені повідомлення.
+
+TelegramRateLimiter підключається через ApplicationBuilder().rate_limiter(...),
+тож через нього проходять усі виклики бота — і send_text / send_image /
+send_text_buttons з util.py, і редагування, і видалення. Він:
+
+    - тримає token bucket для кожного чату та глобальний; відро чату
+      витрачають лише повідомлення (send*, пересилання, редагування) —
+      видалення й інші виклики з chat_id йдуть лише через глобальне;
+    - роздає токени за пріоритетом: відповіді користувачу → редагування →
+      «косметика» (видалення заглушок); sendChatAction — без лімітів;
+    - на RetryAfter ставить на паузу відра чату (або глобальне) і повторює запит;
+    - схлопує зайві редагування: якщо для того самого повідомлення вже
+      чекає новіше редагування, старе не надсилається, а отримує результат нового.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from metrics import TELEGRAM_CALLS, TELEGRAM_RETRY_AFTER
+from tracing import span
+from util import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+# Пріоритети (менше — важливіше)
+PRIORITY_REPLY = 0
+PRIORITY_EDIT = 1
+PRIORITY_COSMETIC = 2
+
+EDIT_ENDPOINTS = frozenset({"editMessageText", "editMessageCaption", "editMessageReplyMarkup"})
+COSMETIC_ENDPOINTS = frozenset({"deleteMessage"})
+
+# Службові виклики, на які не поширюються ліміти повідомлень
+UNLIMITED_ENDPOINTS = frozenset({
+    "getMe", "getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo",
+    "answerCallbackQuery", "setMyCommands", "getMyCommands", "deleteMyCommands",
+    "setChatMenuButton", "getChatMenuButton", "getFile", "logOut", "close",
+    "sendChatAction",
+})
+
+# Виклики, що з'являються в чаті як повідомлення, крім send* (ліміт чату)
+MESSAGE_ENDPOINTS = EDIT_ENDPOINTS | {
+    "forwardMessage", "forwardMessages", "copyMessage", "copyMessages",
+    "editMessageMedia", "editMessageLiveLocation",
+}
+
+
+def is_message_endpoint(endpoint: str) -> bool:
+    """Виклик витрачає ліміт повідомлень у чаті (~1 на секунду)."""
+    return endpoint.startswith("send") or endpoint in MESSAGE_ENDPOINTS
+
+
+class TokenBucket:
+    """
+    Відро токенів із чергою очікування за пріоритетом.
+
+    rate — токенів за секунду, capacity — розмір сплеску.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: int = PRIORITY_REPLY) -> None:
+        """Чекає на токен; при нестачі першими обслуговуються важливіші запити."""
+        if not self._waiters and self._try_take():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Токен уже видано, а запит скасовано — повертаємо
+                self.release()
+            future.cancel()
+            raise
+
+    def release(self) -> None:
+        """Повертає невикористаний токен."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+        self._wake()
+
+    def pause(self, seconds: float) -> None:
+        """Telegram попросив зачекати: нових токенів не буде seconds секунд."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+    async def wait_unpaused(self) -> None:
+        """Чекає кінця паузи після RetryAfter (токен не витрачається)."""
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @property
+    def idle(self) -> bool:
+        """Відро повне і ніхто не чекає — його можна забути."""
+        self._refill(time.monotonic())
+        return not self._waiters and self.tokens >= self.capacity
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def _try_take(self) -> bool:
+        now = time.monotonic()
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _wake(self) -> None:
+        self._timer = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+        now = time.monotonic()
+        delay = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+
+@dataclass
+class _PendingEdit:
+    """Останнє редагування повідомлення, що чекає надсилання."""
+    seq: int
+    result: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class TelegramRateLimiter(BaseRateLimiter):
+    """
+    Ліміти Telegram для всіх викликів бота.
+
+    global_rate / global_burst — повідомлень за секунду на бота і дозволений сплеск,
+    chat_rate / group_rate — повідомлень за секунду в особистому чаті / групі,
+    burst — дозволений сплеск у чаті,
+    max_retries — скільки разів повторювати запит після RetryAfter.
+
+    За будь-яку секунду відро пропускає не більше burst + rate запитів,
+    тому значення за замовчуванням узяті із запасом від лімітів Telegram.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 25.0,
+        global_burst: int = 5,
+        chat_rate: float = 1.0,
+        group_rate: float = 20 / 60,
+        burst: int = 2,
+        max_retries: int = 3
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_retries = max_retries
+
+        self._chats: dict[Any, TokenBucket] = {}
+        self._edits: dict[tuple, _PendingEdit] = {}
+        self._edit_seq = itertools.count()
+
+        self.sent = 0
+        self.retries = 0
+        self.coalesced = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in UNLIMITED_ENDPOINTS:
+            TELEGRAM_CALLS.inc(endpoint)
+            with span(f"telegram.{endpoint}"):
+                return await callback(*args, **kwargs)
+
+        priority = self._priority(endpoint, rate_limit_args)
+        chat_id = data.get("chat_id")
+        # Відро чату: токен — лише для повідомлень, пауза після RetryAfter — для всіх
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        charge_chat = chat_bucket is not None and is_message_endpoint(endpoint)
+
+        edit_key = None
+        if endpoint in EDIT_ENDPOINTS and chat_id is not None and data.get("message_id") is not None:
+            edit_key = (chat_id, data["message_id"])
+
+        if edit_key is None:
+            return await self._send(endpoint, callback, args, kwargs, priority, chat_bucket, charge_chat)
+
+        # Нове редагування заміняє попереднє, яке ще чекає в черзі
+        pending = _PendingEdit(next(self._edit_seq))
+        pending.result.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._edits[edit_key] = pending
+
+        try:
+            result = await self._send(
+                endpoint, callback, args, kwargs, priority, chat_bucket, charge_chat, edit_key, pending
+            )
+        except _Superseded as superseded:
+            self.coalesced += 1
+            # Результат нового редагування — і для цього, і для ще старіших, що чекають на нього
+            try:
+                result = await asyncio.shield(superseded.newer.result)
+            except Exception as e:
+                pending.result.set_exception(e)
+                raise
+            except BaseException:
+                pending.result.cancel()
+                raise
+            pending.result.set_result(result)
+            return result
+        except Exception as e:
+            # Старі редагування, що чекають на це, отримають ту саму помилку
+            pending.result.set_exception(e)
+            raise
+        except BaseException:
+            pending.result.cancel()
+            raise
+        finally:
+            if self._edits.get(edit_key) is pending:
+                del self._edits[edit_key]
+
+        pending.result.set_result(result)
+        return result
+
+    async def _send(self, endpoint, callback, args, kwargs, priority, chat_bucket, charge_chat,
+                    edit_key=None, pending=None):
+        for attempt in range(self.max_retries + 1):
+            if charge_chat:
+                await chat_bucket.acquire(priority)
+            elif chat_bucket is not None:
+                # Без токена, але й не під час паузи чату після RetryAfter
+                await chat_bucket.wait_unpaused()
+            try:
+                await self.global_bucket.acquire(priority)
+            except asyncio.CancelledError:
+                if charge_chat:
+                    chat_bucket.release()
+                raise
+
+            # Поки чекали на токен, з'явилося новіше редагування — це вже не потрібне
+            if edit_key is not None:
+                newer = self._edits.get(edit_key)
+                if newer is not None and newer is not pending:
+                    self.global_bucket.release()
+                    if charge_chat:
+                        chat_bucket.release()
+                    raise _Superseded(newer)
+
+            try:
+                return await self._call(endpoint, callback, args, kwargs, chat_bucket, attempt)
+            except _RetryLater:
+                continue
+
+        raise RuntimeError("unreachable")
+
+    async def _call(self, endpoint, callback, args, kwargs, chat_bucket, attempt: int = 0):
+        TELEGRAM_CALLS.inc(endpoint)
+        try:
+            # Лише сам HTTP-запит: очікування в черзі лімітера — різниця з батьківським span
+            with span(f"telegram.{endpoint}", attempt=attempt):
+                result = await callback(*args, **kwargs)
+        except RetryAfter as e:
+            TELEGRAM_RETRY_AFTER.inc(endpoint)
+            delay = retry_after_seconds(e)
+            (chat_bucket or self.global_bucket).pause(delay)
+
+            if attempt >= self.max_retries:
+                logger.warning(f"Telegram RetryAfter {delay} с — запит не повторюється")
+                raise
+
+            self.retries += 1
+            logger.info(f"Telegram RetryAfter {delay} с — повтор #{attempt + 1}")
+            raise _RetryLater() from e
+
+        self.sent += 1
+        return result
+
+    def _priority(self, endpoint: str, rate_limit_args) -> int:
+        if isinstance(rate_limit_args, dict) and "priority" in rate_limit_args:
+            return rate_limit_args["priority"]
+        if endpoint in EDIT_ENDPOINTS:
+            return PRIORITY_EDIT
+        if endpoint in COSMETIC_ENDPOINTS:
+            return PRIORITY_COSMETIC
+        return PRIORITY_REPLY
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Прибираємо повні відра неактивних чатів, щоб словник не ріс безмежно
+            if len(self._chats) >= 10_000:
+                for key in [k for k, b in self._chats.items() if b.idle]:
+                    del self._chats[key]
+
+            is_group = str(chat_id).startswith("-")
+            bucket = TokenBucket(self.group_rate if is_group else self.chat_rate, self.burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def report(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retries": self.retries,
+            "coalesced_edits": self.coalesced,
+            "chats": len(self._chats),
+        }
+
+
+class _Superseded(Exception):
+    """Редагування замінене новішим для того самого повідомлення."""
+
+    def __init__(self, newer: _PendingEdit):
+        super().__init__()
+        self.newer = newer
+
+
+class _RetryLater(Exception):
+    """Після RetryAfter запит треба повторити (відра вже на паузі)."""
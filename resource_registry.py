@@ -0,0 +1,183 @@
+"""
+resource_registry.py — реєстр текстових ресурсів бота в пам'яті.
+
+Промпти (resources/prompts/*.txt), повідомлення (resources/messages/*.txt)
+і список команд (resources/messages/commands.json) читаються з диска
+один раз — при старті — у незмінні словники. Пошук промпту на «гарячому»
+шляху — це звичайний доступ до словника.
+
+Хендлери оголошують потрібні їм ключі через require_prompts / require_messages,
+а bot.py викликає validate() при старті: відсутній промпт зупиняє запуск,
+а не ламає розмову посередині.
+
+Зміни файлів підхоплюються без перезапуску: фонова задача раз на кілька
+секунд порівнює mtime/розміри файлів і перечитує ресурси, якщо щось змінилося.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResourceSnapshot:
+    """Незмінний знімок усіх ресурсів."""
+    prompts: Mapping[str, str]
+    messages: Mapping[str, str]
+    commands: Mapping[str, str]
+    signature: tuple
+
+
+class ResourceRegistry:
+    """
+    Реєстр промптів, повідомлень і команд бота.
+    """
+
+    def __init__(self, base_dir: str | Path = "resources"):
+        self.base_dir = Path(base_dir)
+        self.prompts_dir = self.base_dir / "prompts"
+        self.messages_dir = self.base_dir / "messages"
+        self.commands_file = self.messages_dir / "commands.json"
+
+        self.required_prompts: set[str] = set()
+        self.required_messages: set[str] = set()
+        self.reloads = 0
+
+        self._snapshot = self._read()
+        self._watch_task: asyncio.Task | None = None
+
+    # ---------------------------
+    # ДОСТУП ДО РЕСУРСІВ
+    # ---------------------------
+
+    def prompt(self, name: str) -> str:
+        return self._snapshot.prompts[name]
+
+    def message(self, name: str) -> str:
+        return self._snapshot.messages[name]
+
+    def commands(self) -> Mapping[str, str]:
+        return self._snapshot.commands
+
+    # ---------------------------
+    # ПЕРЕВІРКА ПРИ СТАРТІ
+    # ---------------------------
+
+    def require_prompts(self, *names: str) -> None:
+        """Оголошує промпти, без яких модуль не може працювати."""
+        self.required_prompts.update(names)
+
+    def require_messages(self, *names: str) -> None:
+        """Оголошує повідомлення, без яких модуль не може працювати."""
+        self.required_messages.update(names)
+
+    def validate(self) -> None:
+        """Кидає RuntimeError, якщо якогось оголошеного ресурсу немає."""
+        self._check(self._snapshot)
+
+    def _check(self, snapshot: ResourceSnapshot) -> None:
+        missing = [
+            f"prompts/{name}.txt" for name in sorted(self.required_prompts - snapshot.prompts.keys())
+        ] + [
+            f"messages/{name}.txt" for name in sorted(self.required_messages - snapshot.messages.keys())
+        ]
+
+        if missing:
+            raise RuntimeError(f"Відсутні ресурси бота: {', '.join(missing)}")
+
+    # ---------------------------
+    # ГАРЯЧЕ ПЕРЕЗАВАНТАЖЕННЯ
+    # ---------------------------
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитує ресурси, якщо файли змінилися.
+        Новий знімок застосовується лише тоді, коли він проходить перевірку.
+        """
+        if self._signature() == self._snapshot.signature:
+            return False
+
+        try:
+            snapshot = self._read()
+            self._check(snapshot)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.error(f"Ресурси не перезавантажено, лишаємо попередні: {e}")
+            return False
+
+        self._snapshot = snapshot
+        self.reloads += 1
+        logger.info("🔄 Ресурси бота перезавантажено")
+        return True
+
+    def start_watching(self, interval: float) -> None:
+        """Запускає фонову перевірку змін (interval <= 0 — вимкнено)."""
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def stop_watching(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
+
+    # ---------------------------
+    # ЧИТАННЯ З ДИСКА
+    # ---------------------------
+
+    def _files(self) -> list[Path]:
+        files = sorted(self.prompts_dir.glob("*.txt")) + sorted(self.messages_dir.glob("*.txt"))
+        if self.commands_file.exists():
+            files.append(self.commands_file)
+        return files
+
+    def _signature(self) -> tuple:
+        """Відбиток стану файлів: шлях, mtime і розмір кожного."""
+        signature = []
+        for file in self._files():
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            signature.append((str(file), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _read(self) -> ResourceSnapshot:
+        signature = self._signature()
+
+        prompts = {
+            file.stem: file.read_text(encoding="utf8")
+            for file in sorted(self.prompts_dir.glob("*.txt"))
+        }
+        messages = {
+            file.stem: file.read_text(encoding="utf8")
+            for file in sorted(self.messages_dir.glob("*.txt"))
+        }
+
+        commands = {}
+        if self.commands_file.exists():
+            commands = json.loads(self.commands_file.read_text(encoding="utf-8"))
+
+        return ResourceSnapshot(
+            prompts=MappingProxyType(prompts),
+            messages=MappingProxyType(messages),
+            commands=MappingProxyType(commands),
+            signature=signature
+        )
+
+
+# Єдиний реєстр ресурсів застосунку
+registry = ResourceRegistry()
@@ -0,0 +1,262 @@
+"""
+response_cache.py — кеш відповідей на одноразові запити до ChatGPT.
+
+send_question (квіз, переклад, резюме…) не має стану: однакові
+(системний промпт, текст) дають по суті однакову відповідь. Кеш
+повертає збережену відповідь без запиту до API.
+
+Пошук:
+    - точний збіг — модель + промпт + текст (без зайвих пробілів;
+      регістр зберігається — «Рим» і «рим» можуть вимагати різних відповідей);
+    - (за бажанням, для окремих функцій) майже-дублікат — MinHash
+      символьних шинглів із LSH-індексом: «Розкажи про Марс» і
+      «Розкажи про Марс!» знаходять один запис.
+
+Функції, відповідь яких має точно відповідати вхідному тексту
+(EXACT_FEATURES: переклад, оцінка відповіді квізу), шукаються лише
+точним збігом: «третій поверх» і «четвертий поверх» схожі на 90 %,
+але переклад одного не підходить для іншого.
+
+Кожна функція (feature) має власну політику: TTL і чи дозволено
+пошук майже-дублікатів. TTL = 0 — кеш вимкнено (наприклад, /random
+та генерація питань квізу, де потрібна різноманітність).
+"""
+
+import hashlib
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+
+# Просте число Мерсенна для універсального хешування MinHash
+_PRIME = (1 << 61) - 1
+
+SHINGLE_SIZE = 3
+
+# Функції, для яких пошук майже-дублікатів заборонено незалежно від налаштувань
+EXACT_FEATURES = frozenset({"translate", "quiz_grade"})
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Політика кешу для однієї функції бота."""
+    ttl: float
+    near_duplicate: bool = False
+
+
+@dataclass
+class _Entry:
+    response: str
+    expires: float
+    namespace: str
+    signature: tuple | None = None
+
+
+@dataclass
+class ResponseCacheStats:
+    """Лічильники кешу відповідей."""
+    exact_hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    by_feature: dict = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.exact_hits + self.near_hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+def normalize_text(text: str) -> str:
+    """Нормалізація для ключа: лише пробіли (регістр може змінювати зміст)."""
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    """
+    Кеш відповідей із політиками за функціями.
+
+    policies — {feature: CachePolicy}; для невідомих функцій діє default_ttl,
+    max_entries — розмір LRU,
+    threshold — мінімальна оцінка схожості (Jaccard) для майже-дубліката,
+    max_near_chars — довші тексти шукаються лише точним збігом.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, CachePolicy] | None = None,
+        default_ttl: float = 3600.0,
+        max_entries: int = 2000,
+        threshold: float = 0.9,
+        num_perm: int = 32,
+        bands: int = 8,
+        max_near_chars: int = 500
+    ):
+        self.policies = {
+            feature: replace(policy, near_duplicate=False) if feature in EXACT_FEATURES else policy
+            for feature, policy in (policies or {}).items()
+        }
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_near_chars = max_near_chars
+        self.stats = ResponseCacheStats()
+
+        rng = random.Random(1234)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # LSH: (простір, номер смуги, значення смуги) → ключі записів
+        self._buckets: dict[tuple, set[str]] = {}
+
+    def policy(self, feature: str) -> CachePolicy:
+        return self.policies.get(feature) or CachePolicy(ttl=self.default_ttl)
+
+    # ---------------------------
+    # ПОШУК / ЗБЕРЕЖЕННЯ
+    # ---------------------------
+
+    def get(self, feature: str | None, model: str, prompt: str, text: str) -> str | None:
+        """Відповідь із кешу або None (None також для функцій без кешу)."""
+        if not self._enabled(feature):
+            self.stats.bypassed += 1
+            return None
+
+        now = time.monotonic()
+        namespace = self._namespace(feature, model, prompt)
+        normalized = normalize_text(text)
+
+        # 1) Точний збіг
+        entry = self._live(self._key(namespace, normalized), now)
+        if entry is not None:
+            self._hit(feature, exact=True)
+            return entry.response
+
+        # 2) Майже-дублікат (лише для дозволених функцій і коротких текстів)
+        if self.policy(feature).near_duplicate and len(normalized) <= self.max_near_chars:
+            signature = self._signature(normalized)
+            best, best_score = None, self.threshold
+            for key in self._candidates(namespace, signature):
+                candidate = self._live(key, now)
+                if candidate is None or candidate.signature is None:
+                    continue
+                score = self._estimate(signature, candidate.signature)
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                self._hit(feature, exact=False)
+                return best.response
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, feature: str | None, model: str, prompt: str, text: str, response: str) -> None:
+        if not self._enabled(feature) or not response:
+            return
+
+        policy = self.policy(feature)
+        namespace = self._namespace(feature, model, prompt)
+        normalized = normalize_text(text)
+        key = self._key(namespace, normalized)
+
+        signature = None
+        if policy.near_duplicate and len(normalized) <= self.max_near_chars:
+            signature = self._signature(normalized)
+
+        self._drop(key)
+        self._entries[key] = _Entry(response, time.monotonic() + policy.ttl, namespace, signature)
+        if signature is not None:
+            for band in self._bands(namespace, signature):
+                self._buckets.setdefault(band, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def report(self) -> dict:
+        """Знімок лічильників для логів/метрик."""
+        return {
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats.hit_rate, 3),
+            **self.stats.__dict__,
+        }
+
+    # ---------------------------
+    # ДОПОМІЖНЕ
+    # ---------------------------
+
+    def _enabled(self, feature: str | None) -> bool:
+        return feature is not None and self.policy(feature).ttl > 0
+
+    @staticmethod
+    def _namespace(feature: str, model: str, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{feature}:{model}:{digest}"
+
+    @staticmethod
+    def _key(namespace: str, normalized: str) -> str:
+        return namespace + ":" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _live(self, key: str, now: float) -> _Entry | None:
+        """Запис, якщо він є і не прострочений (прострочений видаляється)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.signature is None:
+            return
+        for band in self._bands(entry.namespace, entry.signature):
+            keys = self._buckets.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[band]
+
+    def _hit(self, feature: str, exact: bool) -> None:
+        if exact:
+            self.stats.exact_hits += 1
+        else:
+            self.stats.near_hits += 1
+        self.stats.by_feature[feature] = self.stats.by_feature.get(feature, 0) + 1
+
+    # ---------------------------
+    # MINHASH + LSH
+    # ---------------------------
+
+    def _signature(self, normalized: str) -> tuple:
+        text = re.sub(r"[^\w\s]", "", normalized)
+        if len(text) <= SHINGLE_SIZE:
+            shingles = {text}
+        else:
+            shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    def _bands(self, namespace: str, signature: tuple):
+        for i in range(self.bands):
+            yield namespace, i, signature[i * self.rows:(i + 1) * self.rows]
+
+    def _candidates(self, namespace: str, signature: tuple) -> set[str]:
+        found = set()
+        for band in self._bands(namespace, signature):
+            found |= self._buckets.get(band, set())
+        return found
+
+    @staticmethod
+    def _estimate(a: tuple, b: tuple) -> float:
+        """Оцінка схожості Жаккара за двома підписами MinHash."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
@@ -0,0 +1,6 @@
+"""
+scripts — службові скрипти збирання ресурсів TelegramGPT_DO.
+
+Запуск із кореня проєкту, наприклад:
+    python -m scripts.build_images
+"""
@@ -0,0 +1,113 @@
+"""
+build_images.py — збирання оптимізованих варіантів картинок.
+
+Оригінальні неонові PNG у resources/images важать 1–2.3 МБ,
+хоча Telegram усе одно перетискає фото. Скрипт створює
+у resources/images/optimized/ зменшені варіанти (JPEG або WebP,
+довша сторона не більше --max-size) і маніфест manifest.json:
+
+    назва → файл варіанта, SHA-256 оригіналу та варіанта, розміри в байтах
+
+send_image (util.py) бере варіант, лише якщо хеш оригіналу
+збігається з маніфестом, тож застарілий варіант ніколи не надсилається.
+
+Потрібен Pillow (лише для збирання, не для роботи бота):
+    pip install Pillow
+    python -m scripts.build_images
+    python -m scripts.build_images --format webp --quality 80
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+
+SOURCE_DIR = Path("resources/images")
+OUTPUT_DIR = SOURCE_DIR / "optimized"
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_variant(source: bytes, image_format: str, max_size: int, quality: int) -> tuple[bytes, tuple[int, int]]:
+    """Зменшує картинку та стискає у потрібний формат."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(source)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+        out = io.BytesIO()
+        if image_format == "webp":
+            image.save(out, "WEBP", quality=quality, method=6)
+        else:
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+
+        return out.getvalue(), image.size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=("jpeg", "webp"), default="jpeg", help="формат варіантів")
+    parser.add_argument("--max-size", type=int, default=1280, help="максимальна довша сторона, px")
+    parser.add_argument("--quality", type=int, default=85, help="якість стиснення (1–95)")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("❌ Для збирання потрібен Pillow: pip install Pillow")
+        return 1
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    extension = "webp" if args.format == "webp" else "jpg"
+
+    images = {}
+    for source in sorted(SOURCE_DIR.iterdir()):
+        if source.suffix.lower() not in SOURCE_EXTENSIONS:
+            continue
+
+        data = source.read_bytes()
+        variant, (width, height) = build_variant(data, args.format, args.max_size, args.quality)
+
+        # Якщо стиснення нічого не дало — варіант не потрібен
+        if len(variant) >= len(data):
+            print(f"⏭  {source.name}: варіант не менший за оригінал")
+            continue
+
+        variant_name = f"{source.stem}.{extension}"
+        (OUTPUT_DIR / variant_name).write_bytes(variant)
+
+        images[source.stem] = {
+            "source": source.name,
+            "source_sha256": sha256(data),
+            "source_bytes": len(data),
+            "variant": variant_name,
+            "sha256": sha256(variant),
+            "bytes": len(variant),
+            "width": width,
+            "height": height,
+        }
+        print(f"✅ {source.name}: {len(data):,} → {len(variant):,} байт ({width}×{height})")
+
+    manifest = {
+        "format": args.format,
+        "max_size": args.max_size,
+        "quality": args.quality,
+        "images": images,
+    }
+    (OUTPUT_DIR / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8"
+    )
+
+    print(f"\nМаніфест: {OUTPUT_DIR / 'manifest.json'} ({len(images)} картинок)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+image_report.py — звіт «до/після» для оптимізованих картинок.
+
+Порівнює сумарний розмір оригіналів у resources/images з варіантами
+з маніфесту resources/images/optimized/manifest.json і показує,
+скільки байтів завантажується в Telegram для нового чату.
+Позначає застарілі варіанти (оригінал змінився після збирання).
+
+Запуск:
+    python -m scripts.image_report
+"""
+
+import hashlib
+import json
+import sys
+
+from scripts.build_images import OUTPUT_DIR, SOURCE_DIR, SOURCE_EXTENSIONS
+
+
+def main() -> int:
+    manifest_path = OUTPUT_DIR / "manifest.json"
+    images = {}
+    if manifest_path.exists():
+        images = json.loads(manifest_path.read_text(encoding="utf-8")).get("images", {})
+
+    before = after = stale = 0
+
+    print(f"{'картинка':<28} {'оригінал':>12} {'варіант':>12} {'економія':>9}")
+    for source in sorted(SOURCE_DIR.iterdir()):
+        if source.suffix.lower() not in SOURCE_EXTENSIONS:
+            continue
+
+        data = source.read_bytes()
+        entry = images.get(source.stem)
+        variant = OUTPUT_DIR / entry["variant"] if entry else None
+
+        sent = len(data)
+        note = "—"
+        if entry and variant.exists():
+            if hashlib.sha256(data).hexdigest() == entry["source_sha256"]:
+                sent = variant.stat().st_size
+                note = f"{100 - sent * 100 // len(data)}%"
+            else:
+                stale += 1
+                note = "застарів"
+
+        before += len(data)
+        after += sent
+        print(f"{source.stem:<28} {len(data):>12,} {sent:>12,} {note:>9}")
+
+    print(f"\nУсього до:    {before:>12,} байт")
+    print(f"Усього після: {after:>12,} байт  (у {before / max(after, 1):.1f} раза менше)")
+    if stale:
+        print(f"⚠️ Застарілих варіантів: {stale} — запустіть python -m scripts.build_images")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
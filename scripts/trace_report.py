@@ -0,0 +1,95 @@
+"""
+trace_report.py — розкладка найповільніших оновлень із файлу трасувань.
+
+Читає logs/traces.jsonl (OTLP/JSON, див. tracing.py) і для N найдовших
+оновлень друкує дерево span-ів із тривалістю кожного — видно, куди
+пішов час: промпти, картинки, ChatGPT чи надсилання в Telegram.
+
+Запуск:
+    python -m scripts.trace_report
+    python -m scripts.trace_report --file logs/traces-8081.jsonl --top 5
+    python -m scripts.trace_report --command /quiz
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def read_traces(path: Path) -> list[list[dict]]:
+    """Список трасувань; кожне — список span-ів (OTLP/JSON)."""
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            spans = [
+                span
+                for resource in request.get("resourceSpans", [])
+                for scope in resource.get("scopeSpans", [])
+                for span in scope.get("spans", [])
+            ]
+            if spans:
+                traces.append(spans)
+    return traces
+
+
+def duration_ms(span: dict) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def attributes(span: dict) -> dict:
+    return {a["key"]: next(iter(a["value"].values())) for a in span.get("attributes", [])}
+
+
+def root_of(spans: list[dict]) -> dict:
+    return next(span for span in spans if not span.get("parentSpanId"))
+
+
+def print_tree(spans: list[dict]) -> None:
+    children: dict[str | None, list[dict]] = {}
+    for span in spans:
+        children.setdefault(span.get("parentSpanId"), []).append(span)
+
+    def walk(span: dict, depth: int) -> None:
+        attrs = attributes(span)
+        details = ", ".join(f"{k}={v}" for k, v in attrs.items() if k not in ("chat.id", "update.id"))
+        error = " ❌ " + span["status"].get("message", "") if span.get("status", {}).get("code") == 2 else ""
+        print(f"  {'  ' * depth}{span['name']:<{40 - 2 * depth}} {duration_ms(span):>9.1f} мс  {details}{error}")
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            walk(child, depth + 1)
+
+    walk(root_of(spans), 0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, default=Path("logs/traces.jsonl"))
+    parser.add_argument("--top", type=int, default=10, help="скільки найповільніших оновлень показати")
+    parser.add_argument("--command", help="лише оновлення з цією командою (наприклад, /quiz)")
+    args = parser.parse_args()
+
+    if not args.file.exists():
+        print(f"Файл {args.file} не знайдено — увімкніть TRACE_ENABLED і зачекайте на повільні оновлення")
+        return 1
+
+    traces = read_traces(args.file)
+    if args.command:
+        traces = [t for t in traces if attributes(root_of(t)).get("command") == args.command]
+
+    traces.sort(key=lambda t: duration_ms(root_of(t)), reverse=True)
+    print(f"трасувань: {len(traces)}\n")
+
+    for spans in traces[:args.top]:
+        root = root_of(spans)
+        print(f"trace {root['traceId']}  {duration_ms(root):.0f} мс")
+        print_tree(spans)
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
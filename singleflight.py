@@ -0,0 +1,99 @@
+"""
+singleflight.py — об'єднання однакових запитів до ChatGPT, що виконуються одночасно.
+
+Коли кілька користувачів в одну мить перекладають ту саму фразу
+або отримують ту саму оцінку квізу, кеш відповідей ще порожній —
+і send_question відправляє кілька однакових запитів. SingleFlight
+пропускає до API лише перший («лідер»), а решта чекають на його результат.
+
+Ключ — модель, хеш промпту, хеш тексту і температура.
+Працює лише для функцій, явно перелічених у features (opt-in):
+там, де потрібна різноманітність відповідей (/random, генерація
+питань квізу), однакові запити мають іти окремо.
+
+Помилка лідера дістається всім, хто на нього чекав; скасування
+одного з очікувачів (або самого лідера) не скасовує спільний запит.
+"""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Лічильники об'єднання запитів."""
+    leaders: int = 0
+    collapsed: int = 0
+    bypassed: int = 0
+    by_feature: dict = field(default_factory=dict)
+
+    @property
+    def collapse_rate(self) -> float:
+        total = self.leaders + self.collapsed
+        return self.collapsed / total if total else 0.0
+
+
+class SingleFlight:
+    """
+    Реєстр запитів «у польоті».
+
+    features — функції бота, для яких дозволено об'єднання.
+    """
+
+    def __init__(self, features: set[str] | frozenset[str] = frozenset()):
+        self.features = set(features)
+        self.stats = SingleFlightStats()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key(model: str, prompt: str, text: str, temperature: float) -> str:
+        prompt_digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        text_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{temperature}:{prompt_digest}:{text_digest}"
+
+    def enabled(self, feature: str | None) -> bool:
+        return feature is not None and feature in self.features
+
+    async def do(self, feature: str | None, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Виконує call() або приєднується до такого самого запиту, що вже виконується.
+        """
+        if not self.enabled(feature):
+            self.stats.bypassed += 1
+            return await call()
+
+        task = self._inflight.get(key)
+        if task is None:
+            # Окрема задача: скасування лідера не зачепить тих, хто на нього чекає
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.stats.leaders += 1
+        else:
+            self.stats.collapsed += 1
+            self.stats.by_feature[feature] = self.stats.by_feature.get(feature, 0) + 1
+
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def report(self) -> dict:
+        """Знімок лічильників для логів/метрик."""
+        return {
+            "inflight": len(self._inflight),
+            "collapse_rate": round(self.stats.collapse_rate, 3),
+            **self.stats.__dict__,
+        }
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Якщо всі очікувачі скасовані, помилку ніхто не прочитає — читаємо тут
+        if not task.cancelled():
+            task.exception()
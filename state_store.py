@@ -0,0 +1,507 @@
+"""
+state_store.py — постійне сховище стану бота.
+
+Без нього весь стан живе в пам'яті: context.user_data (режим розмови,
+рахунок квізу, поля резюме, використані факти) та історії діалогів
+ChatSessionManager — і зникає після кожного перезапуску чи деплою.
+
+StateStore зберігає стан інкрементально:
+    - кожен запис (kind + key, наприклад "user" + user_id) — це набір полів,
+      у сховище пишуться лише поля, що змінилися (порівнюються хеші JSON);
+    - зміни накопичуються в буфері (write-behind) і записуються пачкою
+      раз на flush_delay секунд або коли буфер досягає batch_size;
+    - запис читається лише при першому зверненні до чату/користувача,
+      тож старт не залежить від кількості користувачів; читання, як і запис,
+      іде в потоці (asyncio.to_thread) і не блокує цикл подій;
+    - хеші полів тримаються лише для max_records нещодавніх записів (LRU):
+      запис, витіснений із пам'яті, при наступному save переписується цілком.
+
+Бекенди:
+    - SqliteBackend — файл SQLite (WAL), за замовчуванням;
+    - RedisBackend — будь-який клієнт із Redis-сумісним API (hgetall/hset/hdel/
+      delete/pipeline), наприклад redis.Redis або локальний LocalRedis.
+
+StatePersistence підключає сховище до PTB (ApplicationBuilder().persistence(...)):
+user_data/chat_data довантажуються в refresh_user_data/refresh_chat_data
+перед першим хендлером, а зміни PTB передає в update_user_data/update_chat_data.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+# Видалення цілого запису в буфері змін
+_DROP_RECORD = None
+
+
+class SqliteBackend:
+    """Записи у таблиці SQLite: один рядок на поле."""
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Запис іде з потоку asyncio.to_thread, читання — з основного
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (kind, key, field)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def load(self, kind: str, key: str) -> dict[str, str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT field, value FROM state WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchall()
+        return dict(rows)
+
+    def write(self, drops: list[tuple[str, str]], deletes: list[tuple[str, str, str]],
+              puts: list[tuple[str, str, str, str]]) -> None:
+        """Застосовує пачку змін однією транзакцією."""
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM state WHERE kind = ? AND key = ?", drops)
+            self._db.executemany("DELETE FROM state WHERE kind = ? AND key = ? AND field = ?", deletes)
+            self._db.executemany(
+                "INSERT INTO state (kind, key, field, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (kind, key, field) DO UPDATE SET value = excluded.value",
+                puts
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisBackend:
+    """
+    Записи як Redis-хеші: ключ "{prefix}{kind}:{key}", поле хешу — поле запису.
+
+    client — redis.Redis(decode_responses=True) або сумісний (LocalRedis).
+    """
+
+    def __init__(self, client, prefix: str = "tgbot:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _name(self, kind: str, key: str) -> str:
+        return f"{self.prefix}{kind}:{key}"
+
+    def load(self, kind: str, key: str) -> dict[str, str]:
+        raw = self.client.hgetall(self._name(kind, key)) or {}
+        return {
+            (f.decode() if isinstance(f, bytes) else f): (v.decode() if isinstance(v, bytes) else v)
+            for f, v in raw.items()
+        }
+
+    def write(self, drops: list[tuple[str, str]], deletes: list[tuple[str, str, str]],
+              puts: list[tuple[str, str, str, str]]) -> None:
+        pipe = self.client.pipeline()
+
+        for kind, key in drops:
+            pipe.delete(self._name(kind, key))
+
+        fields: dict[str, list[str]] = {}
+        for kind, key, field in deletes:
+            fields.setdefault(self._name(kind, key), []).append(field)
+        for name, names in fields.items():
+            pipe.hdel(name, *names)
+
+        mappings: dict[str, dict[str, str]] = {}
+        for kind, key, field, value in puts:
+            mappings.setdefault(self._name(kind, key), {})[field] = value
+        for name, mapping in mappings.items():
+            pipe.hset(name, mapping=mapping)
+
+        pipe.execute()
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+class LocalRedis:
+    """
+    Мінімальна заміна Redis у пам'яті процесу (hgetall/hset/hdel/delete/pipeline).
+
+    Для розробки й бенчмарків: дає той самий шлях коду, що й справжній Redis,
+    але нічого не зберігає між перезапусками.
+    """
+
+    def __init__(self):
+        self.data: dict[str, dict[str, str]] = {}
+
+    def hgetall(self, name: str) -> dict[str, str]:
+        return dict(self.data.get(name, {}))
+
+    def hset(self, name: str, mapping: dict[str, str]) -> int:
+        record = self.data.setdefault(name, {})
+        added = sum(1 for field in mapping if field not in record)
+        record.update(mapping)
+        return added
+
+    def hdel(self, name: str, *fields: str) -> int:
+        record = self.data.get(name, {})
+        removed = sum(1 for field in fields if record.pop(field, None) is not None)
+        if not record:
+            self.data.pop(name, None)
+        return removed
+
+    def delete(self, *names: str) -> int:
+        return sum(1 for name in names if self.data.pop(name, None) is not None)
+
+    def pipeline(self) -> "_LocalPipeline":
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    """Черга команд LocalRedis, що виконується в execute()."""
+
+    def __init__(self, client: LocalRedis):
+        self.client = client
+        self.commands: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return command
+
+    def execute(self) -> list:
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands.clear()
+        return results
+
+
+class StateStore:
+    """
+    Інкрементальне сховище записів із буфером відкладеного запису.
+
+    backend — SqliteBackend / RedisBackend,
+    flush_delay — через скільки секунд після першої зміни записувати пачку,
+    batch_size — при такій кількості змінених полів записувати одразу,
+    max_records — скільки записів пам'ятати (хеші полів), решта витісняється.
+    """
+
+    def __init__(self, backend, flush_delay: float = 1.0, batch_size: int = 500,
+                 max_records: int = 10_000):
+        self.backend = backend
+        self.flush_delay = flush_delay
+        self.batch_size = batch_size
+        self.max_records = max_records
+
+        # (kind, key) → {поле: хеш JSON} — що вже лежить у сховищі (LRU)
+        self._saved: OrderedDict[tuple[str, str], dict[str, int]] = OrderedDict()
+
+        # Буфер: (kind, key, поле) → JSON або None (видалити поле);
+        # (kind, key, None) → _DROP_RECORD (видалити весь запис)
+        self._pending: dict[tuple[str, str, str | None], str | None] = {}
+
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+        # Читання з бекенду не перетинається із записом пачки: інакше прочитаний
+        # запис міг би не містити змін, які вже прибрано з буфера, але ще не записано
+        self._io = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._urgent_task: asyncio.Task | None = None
+
+        self.loads = 0
+        self.writes = 0
+        self.flushes = 0
+
+    async def load(self, kind: str, key: Any) -> dict:
+        """Читає запис зі сховища (з урахуванням ще не записаних змін)."""
+        key = str(key)
+
+        async with self._io:
+            await self._io.wait_for(lambda: not self._writing)
+            self._readers += 1
+        try:
+            raw = await asyncio.to_thread(self.backend.load, kind, key)
+        except Exception as e:
+            logger.warning(f"Не вдалося прочитати стан {kind}:{key}: {e}")
+            raw = {}
+        finally:
+            async with self._io:
+                self._readers -= 1
+                self._io.notify_all()
+        self.loads += 1
+
+        if (kind, key, None) in self._pending:
+            raw = {}
+        for (p_kind, p_key, field), value in self._pending.items():
+            if p_kind == kind and p_key == key and field is not None:
+                if value is None:
+                    raw.pop(field, None)
+                else:
+                    raw[field] = value
+
+        self._remember(kind, key, {field: hash(value) for field, value in raw.items()})
+
+        data = {}
+        for field, value in raw.items():
+            try:
+                data[field] = json.loads(value)
+            except ValueError:
+                logger.warning(f"Пошкоджене поле стану {kind}:{key}:{field} — пропускаю")
+        return data
+
+    def save(self, kind: str, key: Any, data: dict) -> int:
+        """
+        Ставить у буфер лише поля, що змінилися з останнього збереження.
+        Повертає кількість змінених полів.
+        """
+        key = str(key)
+        saved = self._saved.get((kind, key))
+        replaced = saved is None
+        if replaced:
+            # Запис не читали або його витіснено — невідомо, які поля вже у сховищі,
+            # тому записуємо його цілком (старі поля не залишаться)
+            self._discard_pending(kind, key)
+            self._pending[(kind, key, None)] = _DROP_RECORD
+            saved = self._remember(kind, key, {})
+        else:
+            self._saved.move_to_end((kind, key))
+        changed = 0
+
+        for field, value in data.items():
+            field = str(field)
+            try:
+                encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+            except (TypeError, ValueError):
+                # Задачі, об'єкти тощо — не стан, а службові дані процесу
+                continue
+
+            digest = hash(encoded)
+            if saved.get(field) != digest:
+                saved[field] = digest
+                self._pending[(kind, key, field)] = encoded
+                changed += 1
+
+        current = {str(field) for field in data}
+        for field in [f for f in saved if f not in current]:
+            del saved[field]
+            self._pending[(kind, key, field)] = None
+            changed += 1
+
+        if changed or replaced:
+            self._schedule_flush()
+        return changed
+
+    def drop(self, kind: str, key: Any) -> None:
+        """Видаляє запис повністю."""
+        key = str(key)
+        self._saved.pop((kind, key), None)
+        self._discard_pending(kind, key)
+        self._pending[(kind, key, None)] = _DROP_RECORD
+        self._schedule_flush()
+
+    def forget(self, kind: str, key: Any) -> None:
+        """Забуває запис у пам'яті (дані у сховищі лишаються до наступного load)."""
+        self._saved.pop((kind, str(key)), None)
+
+    def _remember(self, kind: str, key: str, hashes: dict[str, int]) -> dict[str, int]:
+        """Хеші збережених полів запису; найдавніші записи витісняються."""
+        self._saved[(kind, key)] = hashes
+        self._saved.move_to_end((kind, key))
+        while len(self._saved) > self.max_records:
+            self._saved.popitem(last=False)
+        return hashes
+
+    def _discard_pending(self, kind: str, key: str) -> None:
+        for pending in [p for p in self._pending if p[0] == kind and p[1] == key]:
+            del self._pending[pending]
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> None:
+        """Записує всі накопичені зміни однією пачкою."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            # Нові читання чекають, поточні — дочитують
+            async with self._io:
+                self._writing = True
+                await self._io.wait_for(lambda: self._readers == 0)
+            try:
+                await self._write_batch()
+            finally:
+                async with self._io:
+                    self._writing = False
+                    self._io.notify_all()
+
+    async def _write_batch(self) -> None:
+        """Записує буфер змін однією транзакцією бекенду."""
+        batch, self._pending = self._pending, {}
+        drops, deletes, puts = [], [], []
+        for (kind, key, field), value in batch.items():
+            if field is None:
+                drops.append((kind, key))
+            elif value is None:
+                deletes.append((kind, key, field))
+            else:
+                puts.append((kind, key, field, value))
+
+        try:
+            await asyncio.to_thread(self.backend.write, drops, deletes, puts)
+        except Exception as e:
+            logger.warning(f"Не вдалося записати стан ({len(batch)} змін): {e}")
+            # Повертаємо в буфер те, що не перезаписали новіші зміни
+            for item, value in batch.items():
+                self._pending.setdefault(item, value)
+            return
+
+        self.flushes += 1
+        self.writes += len(batch)
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # поза event loop — запишеться при наступному flush()
+
+        if len(self._pending) >= self.batch_size:
+            # Буфер заповнено — пишемо одразу, не чекаючи flush_delay
+            if self._urgent_task is None or self._urgent_task.done():
+                self._urgent_task = loop.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def close(self) -> None:
+        """Записує залишок буфера і закриває бекенд."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._urgent_task is not None:
+            await self._urgent_task
+        await self.flush()
+        self.backend.close()
+
+    def report(self) -> dict:
+        return {
+            "loads": self.loads,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "pending": len(self._pending),
+        }
+
+
+class StatePersistence(BasePersistence):
+    """
+    Persistence для PTB поверх StateStore.
+
+    get_user_data/get_chat_data при старті повертають порожні словники,
+    а дані конкретного користувача/чату довантажуються перед першим
+    хендлером (refresh_user_data / refresh_chat_data).
+    """
+
+    def __init__(self, store: StateStore, update_interval: float = 5.0):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=True, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.store = store
+        # Записи, вже підтягнуті зі сховища (LRU, розмір — як у store)
+        self._hydrated: OrderedDict[tuple[str, int], None] = OrderedDict()
+
+    async def get_user_data(self) -> dict[int, dict]:
+        return {}
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self.store.save("user", user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self.store.save("chat", chat_id, data)
+
+    async def update_bot_data(self, data) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._hydrated.pop(("user", user_id), None)
+        self.store.drop("user", user_id)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._hydrated.pop(("chat", chat_id), None)
+        self.store.drop("chat", chat_id)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        await self._hydrate("user", user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        await self._hydrate("chat", chat_id, chat_data)
+
+    async def refresh_bot_data(self, bot_data) -> None:
+        pass
+
+    async def flush(self) -> None:
+        await self.store.flush()
+
+    async def _hydrate(self, kind: str, key: int, data: dict) -> None:
+        """Перше звернення після старту — підтягуємо збережений стан."""
+        if (kind, key) in self._hydrated:
+            self._hydrated.move_to_end((kind, key))
+            return
+        self._hydrated[(kind, key)] = None
+        while len(self._hydrated) > self.store.max_records:
+            self._hydrated.popitem(last=False)
+
+        for field, value in (await self.store.load(kind, key)).items():
+            data.setdefault(field, value)
+
+
+def build_backend(kind: str, sqlite_path: str | Path, redis_url: str = ""):
+    """Бекенд за назвою з конфігурації: sqlite | redis | memory."""
+    if kind == "sqlite":
+        return SqliteBackend(sqlite_path)
+
+    if kind == "memory":
+        return RedisBackend(LocalRedis())
+
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Для STATE_BACKEND=redis потрібен пакет redis: pip install redis")
+        return RedisBackend(redis.Redis.from_url(redis_url, decode_responses=True))
+
+    raise ValueError(f"Невідомий STATE_BACKEND: {kind}")
@@ -0,0 +1,305 @@
+"""
+tracing.py — трасування одного оновлення: хендлер → ChatGPT → надсилання в Telegram.
+
+Коли «/quiz відповідав 12 секунд», метрики показують лише загальну затримку.
+Трасування розкладає її на відрізки (span):
+
+    update (chat_id, тип)
+    ├── load_prompt quiz_science
+    ├── send_image quiz
+    │   └── telegram.sendPhoto
+    ├── gpt.send_question quiz_grade (кеш: miss)
+    │   └── openai.chat_completion gpt-4o-mini
+    └── progress.reply
+        └── telegram.editMessageText
+
+Ідентифікатор трасування і поточний span передаються через contextvars,
+тож span відкривається будь-де (util, gpt_service, rate_limiter) без
+передавання параметрів — він автоматично стає дочірнім для поточного.
+Поза оновленням (фонові задачі після завершення трасування) span — порожній.
+
+Вибірка: трасування зберігається, якщо воно потрапило у вибірку
+(sample_rate) або виявилося повільним (довше slow_threshold) — span-и
+кожного оновлення накопичуються в пам'яті й записуються лише після
+завершення кореневого span. Формат файлу — JSON Lines, по одному
+ExportTraceServiceRequest (OTLP/JSON) на рядок: його читає
+OpenTelemetry Collector (приймач otlpjsonfile) або scripts/trace_report.py.
+"""
+
+import inspect
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "telegramgpt-do-bot"
+
+_current: ContextVar["Span | None"] = ContextVar("trace_span", default=None)
+
+
+class _Trace:
+    """Span-и одного трасування, що чекають рішення про збереження."""
+    __slots__ = ("trace_id", "spans", "sampled", "closed")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: list[Span] = []
+        self.sampled = sampled
+        self.closed = False
+
+
+class Span:
+    """Відрізок роботи всередині трасування; контекстний менеджер (with / async with)."""
+    __slots__ = ("tracer", "trace", "span_id", "parent_id", "name", "attributes",
+                 "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, name: str, parent: "Span | None", attributes: dict):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Закрито в іншому контексті (наприклад, в іншій задачі) — просто скидаємо
+            _current.set(None)
+        self.tracer._finish(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class _NoopSpan:
+    """Span поза трасуванням або з вимкненим трасуванням — нічого не робить."""
+    __slots__ = ()
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class JsonlExporter:
+    """
+    Дописує трасування у файл JSON Lines (OTLP/JSON).
+
+    Записуються лише вибрані й повільні трасування, тож синхронний
+    запис невеликого рядка не затримує цикл подій помітно.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self.exported = 0
+
+    def export(self, spans: list[Span]) -> None:
+        self._file.write(json.dumps(otlp_request(spans), ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.exported += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Tracer:
+    """
+    Створює span-и й вирішує, які трасування зберегти.
+
+    exporter — куди записувати (None — трасування вимкнено),
+    sample_rate — частка оновлень, що зберігаються завжди (0..1),
+    slow_threshold — оновлення, довші за стільки секунд, зберігаються завжди (None — ні),
+    max_spans — межа span-ів в одному трасуванні (довгі потокові відповіді).
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 0.0,
+                 slow_threshold: float | None = None, max_spans: int = 256):
+        self.configure(exporter, sample_rate, slow_threshold, max_spans)
+
+    def configure(self, exporter=None, sample_rate: float = 0.0,
+                  slow_threshold: float | None = None, max_spans: int = 256) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold or None
+        self.max_spans = max_spans
+        self.enabled = exporter is not None and (sample_rate > 0 or self.slow_threshold is not None)
+
+        self.traces = 0
+        self.exported = 0
+        self.dropped_spans = 0
+
+    def trace(self, name: str, **attributes) -> Span | _NoopSpan:
+        """Кореневий span нового трасування (наприклад, обробка одного оновлення)."""
+        if not self.enabled:
+            return NOOP
+        self.traces += 1
+        trace = _Trace(sampled=random.random() < self.sample_rate)
+        return Span(self, trace, name, None, attributes)
+
+    def span(self, name: str, **attributes) -> Span | _NoopSpan:
+        """Дочірній span поточного трасування (порожній, якщо трасування немає)."""
+        parent = _current.get()
+        if parent is None:
+            return NOOP
+        trace = parent.trace
+        if trace.closed or len(trace.spans) >= self.max_spans:
+            self.dropped_spans += 1
+            return NOOP
+        return Span(self, trace, name, parent, attributes)
+
+    def _finish(self, span: Span) -> None:
+        trace = span.trace
+        if trace.closed:
+            # Фонова задача пережила оновлення — трасування вже записане або відкинуте
+            self.dropped_spans += 1
+            return
+        trace.spans.append(span)
+        if span.parent_id is not None:
+            return
+
+        # Завершився корінь — вирішуємо, чи зберігати трасування
+        trace.closed = True
+        spans, trace.spans = trace.spans, []
+        keep = trace.sampled or (self.slow_threshold is not None and span.duration >= self.slow_threshold)
+        if keep:
+            try:
+                self.exporter.export(spans)
+                self.exported += 1
+            except Exception as e:
+                logger.warning(f"Не вдалося записати трасування: {e}")
+
+    def close(self) -> None:
+        if self.exporter is not None and hasattr(self.exporter, "close"):
+            self.exporter.close()
+
+    def report(self) -> dict:
+        return {"traces": self.traces, "exported": self.exported, "dropped_spans": self.dropped_spans}
+
+
+# Глобальний трасувальник процесу (вимкнений, доки bot.py не викличе configure)
+tracer = Tracer()
+
+
+def current_trace_id() -> str | None:
+    """Ідентифікатор поточного трасування — наприклад, для рядків логу."""
+    span = _current.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def span(name: str, **attributes) -> Span | _NoopSpan:
+    """Дочірній span поточного трасування: with span("load_prompt", name=...): ..."""
+    return tracer.span(name, **attributes)
+
+
+def traced(name: str | None = None):
+    """Декоратор: виклик функції (звичайної чи async) — окремий span."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await fn(*args, **kwargs)
+                with tracer.span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with tracer.span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------
+# OTLP/JSON
+# ---------------------------------
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def otlp_span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id is not None:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+def otlp_request(spans: list[Span]) -> dict:
+    """ExportTraceServiceRequest з одним трасуванням."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [otlp_span(span) for span in spans],
+            }],
+        }]
+    }
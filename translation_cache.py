@@ -0,0 +1,221 @@
+"""
+translation_cache.py — кеш перекладів для режиму /translate.
+
+Привітання та типові фрази перекладають знову й знову, а результат
+для тієї самої мови і того самого промпту не змінюється. Тому переклад
+кешується за ключем: мова + хеш версії промпту + нормалізований текст.
+
+Два рівні:
+    - LRU у пам'яті (обмежена кількість записів) — влучання за мікросекунди;
+    - необов'язковий SQLite-файл на диску — переклади переживають рестарт.
+      Читання йде в потоці (asyncio.to_thread), нові переклади буферизуються
+      і записуються пачкою (один commit) раз на flush_delay секунд —
+      цикл подій не чекає ні на диск, ні на fsync.
+
+Зміна файлу промпту дає новий хеш, тож старі переклади просто
+перестають збігатися (і з часом витісняються з LRU).
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_source(text: str) -> str:
+    """Нормалізація тексту для ключа: Unicode NFC і схлопнуті пробіли (регістр зберігається)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+@lru_cache(maxsize=64)
+def prompt_version(prompt: str) -> str:
+    """Короткий хеш промпту — версія, за якою кешуються переклади."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class CacheStats:
+    """Лічильники кешу перекладів."""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+
+class TranslationCache:
+    """
+    Кеш перекладів: LRU у пам'яті + необов'язковий SQLite.
+
+    max_entries — розмір LRU у пам'яті,
+    db_path — файл SQLite (None — лише пам'ять),
+    max_text_chars — довші тексти не кешуються (вони майже не повторюються),
+    flush_delay — через скільки секунд після першого нового перекладу писати пачку на диск.
+    """
+
+    def __init__(self, max_entries: int = 1000, db_path: str | Path | None = None, max_text_chars: int = 1000,
+                 flush_delay: float = 1.0):
+        self.max_entries = max_entries
+        self.max_text_chars = max_text_chars
+        self.flush_delay = flush_delay
+        self.stats = CacheStats()
+
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+        # Ще не записані на диск переклади: ключ → (мова, переклад, час)
+        self._pending: dict[str, tuple[str, str, float]] = {}
+        self._flush_task: asyncio.Task | None = None
+
+        if db_path:
+            self._open(Path(db_path))
+
+    @staticmethod
+    def key(lang: str, prompt: str, text: str) -> str:
+        """Ключ запису: мова + версія промпту + нормалізований текст."""
+        raw = f"{lang}\0{prompt_version(prompt)}\0{normalize_source(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, lang: str, prompt: str, text: str) -> str | None:
+        """Переклад із кешу або None."""
+        if len(text) > self.max_text_chars:
+            return None
+
+        key = self.key(lang, prompt, text)
+
+        translation = self._memory.get(key)
+        if translation is None and key in self._pending:
+            # Витіснений із LRU, але ще не записаний на диск
+            translation = self._pending[key][1]
+        if translation is not None:
+            self._remember(key, translation)
+            self.stats.memory_hits += 1
+        else:
+            translation = await asyncio.to_thread(self._db_get, key) if self._db is not None else None
+            if translation is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, translation)
+
+        # Не надіслані (промпт + текст) і не отримані (переклад) байти
+        self.stats.bytes_saved += len(prompt.encode("utf-8")) + len(text.encode("utf-8")) \
+            + len(translation.encode("utf-8"))
+        return translation
+
+    def put(self, lang: str, prompt: str, text: str, translation: str) -> None:
+        """Зберігає переклад в обох рівнях."""
+        if len(text) > self.max_text_chars or not translation.strip():
+            return
+
+        key = self.key(lang, prompt, text)
+        self._remember(key, translation)
+
+        if self._db is not None:
+            self._pending[key] = (lang, translation, time.time())
+            self._schedule_flush()
+
+    async def flush(self) -> None:
+        """Записує накопичені переклади на диск однією транзакцією."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        await asyncio.to_thread(self._db_put, batch)
+
+    def report(self) -> dict:
+        """Знімок лічильників для логів/метрик."""
+        return {
+            "entries": len(self._memory),
+            "hit_rate": round(self.stats.hit_rate, 3),
+            **self.stats.__dict__,
+        }
+
+    async def close(self) -> None:
+        """Дописує буфер на диск і закриває SQLite."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---------------------------
+    # LRU У ПАМ'ЯТІ
+    # ---------------------------
+
+    def _remember(self, key: str, translation: str) -> None:
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---------------------------
+    # SQLITE НА ДИСКУ
+    # ---------------------------
+
+    def _open(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Запити йдуть з потоків asyncio.to_thread (по черзі, під _db_lock)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, lang TEXT NOT NULL, "
+                "translation TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Кеш перекладів на диску недоступний, лише пам'ять: {e}")
+            self._db = None
+
+    def _db_get(self, key: str) -> str | None:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Помилка читання кешу перекладів: {e}")
+                return None
+        return row[0] if row else None
+
+    def _db_put(self, batch: dict[str, tuple[str, str, float]]) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO translations (key, lang, translation, created) VALUES (?, ?, ?, ?)",
+                        [(key, lang, translation, created) for key, (lang, translation, created) in batch.items()]
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Помилка запису кешу перекладів ({len(batch)} записів): {e}")
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # поза event loop — запишеться при наступному flush()/close()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
@@ -0,0 +1,119 @@
+"""
+update_processor.py — паралельна обробка оновлень зі збереженням порядку в чаті.
+
+За замовчуванням PTB обробляє оновлення по одному: повільна відповідь
+ChatGPT одному користувачу затримує всіх інших. ChatOrderedUpdateProcessor
+дозволяє обробляти оновлення різних чатів паралельно, але:
+
+    - оновлення одного чату виконуються строго по черзі й у порядку
+      надходження — повідомлення не «обганяють» одне одне і не змагаються
+      за context.user_data / context.chat_data;
+    - одночасно виконується не більше workers хендлерів (пул «робітників»);
+    - max_pending обмежує, скільки оновлень загалом може чекати в обробці.
+
+Підключається в bot.py: ApplicationBuilder().concurrent_updates(processor).
+"""
+
+import asyncio
+from typing import Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from tracing import NOOP, tracer
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Пул робітників + послідовна черга для кожного чату.
+
+    workers — скільки хендлерів виконуються одночасно,
+    max_pending — загальна межа оновлень «в роботі» (включно з тими,
+    що чекають своєї черги в чаті); має бути значно більшою за workers,
+    щоб один «гарячий» чат не зайняв усі місця.
+    """
+
+    def __init__(self, workers: int = 16, max_pending: int = 1024):
+        super().__init__(max_concurrent_updates=max(max_pending, workers, 2))
+        self.workers = workers
+        self._workers = asyncio.Semaphore(workers)
+
+        # chat_id → [замок, кількість оновлень, що його тримають або чекають]
+        self._chats: dict[int, list] = {}
+
+        self.active = 0
+        self.peak_active = 0
+
+    @staticmethod
+    def chat_key(update: object) -> int | None:
+        """Ключ черги: чат, а якщо його немає (inline-запити) — користувач."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.chat_key(update)
+        if key is None:
+            async with self._workers:
+                await self._run(update, coroutine)
+            return
+
+        slot = self._chats.setdefault(key, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            # Спершу черга чату (у порядку надходження), потім — вільний робітник
+            async with slot[0]:
+                async with self._workers:
+                    await self._run(update, coroutine)
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._chats[key]
+
+    async def _run(self, update: object, coroutine: Awaitable[Any]) -> None:
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            # Корінь трасування: усі span-и хендлера (GPT, надсилання) — його нащадки
+            span = tracer.trace("update", **self.trace_attributes(update)) if tracer.enabled else NOOP
+            with span:
+                await coroutine
+        finally:
+            self.active -= 1
+
+    @staticmethod
+    def trace_attributes(update: object) -> dict:
+        """Що відомо про оновлення без тексту користувача: тип, чат, команда або кнопка."""
+        if not isinstance(update, Update):
+            return {"update.kind": type(update).__name__}
+        attributes = {"update.id": update.update_id}
+        if update.effective_chat is not None:
+            attributes["chat.id"] = update.effective_chat.id
+        if update.callback_query is not None:
+            attributes["update.kind"] = "callback"
+            attributes["callback.data"] = update.callback_query.data or ""
+        elif update.message is not None and update.message.text:
+            text = update.message.text
+            if text.startswith("/"):
+                attributes["update.kind"] = "command"
+                attributes["command"] = text.split()[0].split("@")[0]
+            else:
+                attributes["update.kind"] = "message"
+        else:
+            attributes["update.kind"] = "other"
+        return attributes
+
+    @property
+    def waiting_chats(self) -> int:
+        """Скільки чатів зараз мають оновлення в роботі або в черзі."""
+        return len(self._chats)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -4,16 +4,30 @@
 
 from telegram import (
     Update, Message, InlineKeyboardButton,
-    InlineKeyboardMarkup, BotCommand,
-    MenuButtonCommands
+    InlineKeyboardMarkup
 )
 
 from telegram.helpers import escape_markdown
-from telegram.constants import ParseMode
+from telegram.constants import ChatAction, ParseMode
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import ContextTypes
+from contextlib import suppress
+from datetime import timedelta
 from pathlib import Path
-import json
+import asyncio
+import logging
 import re
+import time
+
+import config
+from media_cache import FileIdCache, ImageVariants
+from resource_registry import registry
+from tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Максимальна довжина текстового повідомлення Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
 
 
 # ---------------------------
@@ -52,6 +66,7 @@ def protect_markdown_blocks(text: str):
 # НАДСИЛАННЯ ТЕКСТУ
 # ---------------------------
 
+@traced()
 async def send_text(update, context, text: str):
     """Надсилає безпечний MarkdownV2 текст."""
     safe = escape_markdown(text, version=2)
@@ -63,6 +78,7 @@ async def send_text(update, context, text: str):
     )
 
 
+@traced()
 async def send_text_mix(update, context, text: str):
     """
     Розумне надсилання тексту у MarkdownV2.
@@ -77,6 +93,7 @@ async def send_text_mix(update, context, text: str):
     )
 
 
+@traced()
 async def send_text_raw(update, context, text: str):
     """
     Надсилає сирий текст із MarkdownV2 без будь-якої обробки.
@@ -89,6 +106,7 @@ async def send_text_raw(update, context, text: str):
     )
 
 
+@traced()
 async def send_text_buttons(update, context, text: str, buttons: dict):
     """Відправка тексту з MarkdownV2 з екрануванням + кнопки."""
     safe = escape_markdown(text, version=2)
@@ -104,6 +122,7 @@ async def send_text_buttons(update, context, text: str, buttons: dict):
     )
 
 
+@traced()
 async def send_text_buttons_mix(update, context, raw_text: str, buttons: dict):
     """
     raw_text — текст, який може містити *жирні* елементи, його НЕ екрануємо.
@@ -121,6 +140,7 @@ async def send_text_buttons_mix(update, context, raw_text: str, buttons: dict):
     )
 
 
+@traced()
 async def send_text_buttons_raw(update, context, text: str, buttons: dict):
     """
     Надсилає текст із кнопками. Використовує MarkdownV2,
@@ -139,69 +159,254 @@ async def send_text_buttons_raw(update, context, text: str, buttons: dict):
     )
 
 
+# ---------------------------------------------
+# ПОТОКОВА ВІДПОВІДЬ (поступове редагування)
+# ---------------------------------------------
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Повертає паузу з RetryAfter у секундах (int або timedelta залежно від версії PTB)."""
+    value = error.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+def split_markdown(raw: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list[str]:
+    """
+    Ділить сирий текст на частини, кожна з яких ПІСЛЯ екранування
+    MarkdownV2 вміщується в limit символів. Ріже по переносу рядка, якщо можна.
+    """
+    parts = []
+
+    while raw:
+        cut = len(raw)
+        safe = escape_markdown(raw, version=2)
+
+        while len(safe) > limit:
+            cut -= max(1, (len(safe) - limit) // 2)
+            safe = escape_markdown(raw[:cut], version=2)
+
+        if cut < len(raw):
+            newline = raw.rfind("\n", 0, cut)
+            if newline > cut // 2:
+                cut = newline + 1
+                safe = escape_markdown(raw[:cut], version=2)
+
+        parts.append(safe)
+        raw = raw[cut:]
+
+    return parts
+
+
+class StreamingMessageEditor:
+    """
+    Поступово редагує повідомлення-заглушку («🔍 Обробляю…»),
+    поки ChatGPT генерує відповідь.
+
+    - редагування не частіше, ніж раз на interval секунд
+      (ліміти Telegram на editMessageText), RetryAfter відсуває наступне
+    - проміжний текст щоразу екранується повністю, тому MarkdownV2
+      валідний на будь-якій межі фрагмента
+    - header — готовий MarkdownV2-заголовок, який не екранується
+    """
+
+    def __init__(self, bot, chat_id: int, message_id: int, header: str = "", interval: float = 1.0):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.header = header
+        self.interval = interval
+
+        self.text = ""
+        self.edits = 0
+        self._shown = ""
+        self._next_edit_at = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def push(self, delta: str) -> None:
+        """Додає фрагмент відповіді; за потреби запускає редагування у фоні."""
+        self.text += delta
+
+        busy = self._task is not None and not self._task.done()
+        if busy or time.monotonic() < self._next_edit_at:
+            return
+
+        self._next_edit_at = time.monotonic() + self.interval
+        self._task = asyncio.create_task(self._edit(self._render_partial()))
+
+    async def finish(self, text: str | None = None, buttons: dict | None = None) -> None:
+        """
+        Фінальне редагування.
+
+        text — готовий MarkdownV2 (наприклад, із збереженим *жирним*);
+        якщо не передано або Telegram його не прийняв — використовується
+        повністю екранована відповідь. Задовгий текст ділиться на кілька повідомлень.
+        """
+        if self._task is not None:
+            await self._task
+
+        # Фінальне редагування теж тримається в межах інтервалу
+        delay = self._next_edit_at - time.monotonic()
+        if self.edits and delay > 0:
+            await asyncio.sleep(delay)
+
+        markup = None
+        if buttons:
+            keyboard = [[InlineKeyboardButton(v, callback_data=k)] for k, v in buttons.items()]
+            markup = InlineKeyboardMarkup(keyboard)
+
+        if text is not None and len(text) <= TELEGRAM_MESSAGE_LIMIT:
+            try:
+                await self._edit_final(text, markup)
+                return
+            except BadRequest as e:
+                logger.warning(f"Фінальний MarkdownV2 не прийнято, надсилаю екранований текст: {e}")
+
+        parts = split_markdown(self.text, TELEGRAM_MESSAGE_LIMIT - len(self.header)) or [""]
+        parts[0] = self.header + parts[0]
+
+        await self._edit_final(parts[0], markup if len(parts) == 1 else None)
+
+        for i, part in enumerate(parts[1:], start=1):
+            await self.bot.send_message(
+                chat_id=self.chat_id,
+                text=part,
+                reply_markup=markup if i == len(parts) - 1 else None,
+                parse_mode=ParseMode.MARKDOWN_V2
+            )
+
+    def _render_partial(self) -> str:
+        """Проміжний текст: екранований, обрізаний до ліміту, з «…» у кінці."""
+        limit = TELEGRAM_MESSAGE_LIMIT - len(self.header) - 2
+        body = split_markdown(self.text, limit)[0] if self.text else ""
+        return f"{self.header}{body} …"
+
+    async def _edit(self, text: str) -> None:
+        """Проміжне редагування: помилки не зупиняють потік відповіді."""
+        if text == self._shown:
+            return
+
+        try:
+            await self.bot.edit_message_text(
+                text=text,
+                chat_id=self.chat_id,
+                message_id=self.message_id,
+                parse_mode=ParseMode.MARKDOWN_V2
+            )
+            self._shown = text
+            self.edits += 1
+        except RetryAfter as e:
+            self._next_edit_at = time.monotonic() + retry_after_seconds(e)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                logger.warning(f"Не вдалося оновити потокову відповідь: {e}")
+
+    async def _edit_final(self, text: str, markup) -> None:
+        """
+        Фінальне редагування: чекаємо RetryAfter, бо його не можна пропустити.
+        Якщо Telegram тричі поспіль просить зачекати — обрізане повідомлення
+        видаляється, а відповідь надсилається новим (помилка цього надсилання
+        йде до хендлера).
+        """
+        for _ in range(3):
+            try:
+                await self.bot.edit_message_text(
+                    text=text,
+                    chat_id=self.chat_id,
+                    message_id=self.message_id,
+                    reply_markup=markup,
+                    parse_mode=ParseMode.MARKDOWN_V2
+                )
+                self._shown = text
+                self.edits += 1
+                return
+            except RetryAfter as e:
+                await asyncio.sleep(retry_after_seconds(e))
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    return
+                raise
+
+        logger.warning(f"Фінальне редагування чату {self.chat_id} не вдалося — надсилаю відповідь новим повідомленням")
+        message = await self.bot.send_message(
+            chat_id=self.chat_id,
+            text=text,
+            reply_markup=markup,
+            parse_mode=ParseMode.MARKDOWN_V2
+        )
+        await safe_delete(self.bot, self.chat_id, self.message_id)
+        self.message_id = message.message_id
+        self._shown = text
+
+
 # ------------------------------------
 # НАДСИЛАННЯ ЗОБРАЖЕНЬ (авто png/jpg)
 # ------------------------------------
 
+# Кеш file_id: повторні надсилання картинок не завантажують байти
+file_ids = FileIdCache(config.MEDIA_CACHE_FILE)
+
+# Оптимізовані варіанти картинок (scripts/build_images.py)
+image_variants = ImageVariants("resources/images/optimized")
+
+
 async def send_image(update: Update, context: ContextTypes.DEFAULT_TYPE, name: str) -> Message:
-    """Автоматично відправляє .png або .jpg"""
+    """
+    Автоматично відправляє .png або .jpg.
+    Якщо є актуальний оптимізований варіант — надсилає його замість оригіналу.
+    Якщо картинку вже завантажували — надсилає її за file_id.
+    """
     base = Path("resources/images")
+    chat_id = update.effective_chat.id
 
-    for ext in ("png", "jpg", "jpeg"):
-        file = base / f"{name}.{ext}"
-        if file.exists():
-            with open(file, "rb") as img:
-                return await context.bot.send_photo(update.effective_chat.id, img)
+    with span("send_image", image=name) as current:
+        for ext in ("png", "jpg", "jpeg"):
+            file = base / f"{name}.{ext}"
+            if file.exists():
+                with span("image.resolve"):
+                    file = image_variants.resolve(name, file)
+                    key = file_ids.key(context.bot.id, name, file)
+                file_id = file_ids.get(key)
 
-    return await send_text(update, context, f"⚠️ Зображення '{name}' не знайдено")
+                if file_id:
+                    current.set("upload", False)
+                    try:
+                        return await context.bot.send_photo(chat_id, file_id)
+                    except BadRequest as e:
+                        # file_id більше не дійсний — завантажуємо файл заново
+                        logger.warning(f"file_id для '{name}' відхилено: {e}")
+                        file_ids.discard(key)
 
+                current.set("upload", True)
+                with open(file, "rb") as img:
+                    message = await context.bot.send_photo(chat_id, img)
 
-# ---------------------------
-# МЕНЮ КОМАНД TELEGRAM
-# ---------------------------
+                if message.photo:
+                    file_ids.put(key, message.photo[-1].file_id)
 
-async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, commands: dict):
-    """Показати меню команд бота в чаті"""
-    cmd = [BotCommand(k, v) for k, v in commands.items()]
+                return message
 
-    await context.bot.set_my_commands(cmd)
-    await context.bot.set_chat_menu_button(
-        chat_id=update.effective_chat.id,
-        menu_button=MenuButtonCommands()
-    )
+        return await send_text(update, context, f"⚠️ Зображення '{name}' не знайдено")
 
 
 # -------------------------------------
 # ЗАВАНТАЖЕННЯ ФАЙЛІВ (PROMPTS & TEXT)
+#     Файли читаються один раз у реєстр
+#     (resource_registry.py), тут — лише доступ.
 # -------------------------------------
 
 def load_message(name: str) -> str:
     """
-    Завантажує текстове повідомлення з каталогу resources/messages.
+    Повертає текстове повідомлення з каталогу resources/messages.
     """
-    with open(f"resources/messages/{name}.txt", encoding="utf8") as f:
-        return f.read()
+    with span("load_message", resource=name):
+        return registry.message(name)
 
 
 def load_prompt(name: str) -> str:
     """
-    Завантажує промпт із каталогу resources/prompts.
-    """
-    with open(f"resources/prompts/{name}.txt", encoding="utf8") as f:
-        return f.read()
-
-
-def load_bot_commands() -> dict:
-    """
-    Завантажує список команд бота з JSON-файлу.
-
-    Повертає:
-        dict: словник команд у форматі {"command": "description"}.
+    Повертає промпт із каталогу resources/prompts.
     """
-    file_path = Path("resources/messages/commands.json")
-
-    with file_path.open("r", encoding="utf-8") as file:
-        return json.load(file)
+    with span("load_prompt", resource=name):
+        return registry.prompt(name)
 
 
 # -----------------------------------
@@ -223,12 +428,14 @@ async def default_callback_handler(update: Update, context: ContextTypes.DEFAULT
 # НАДСИЛАННЯ ДОКУМЕНТІВ
 # ---------------------------
 
+@traced()
 async def send_document(update: Update, context: ContextTypes.DEFAULT_TYPE, filepath: str):
     """Надсилає файл"""
     with open(filepath, "rb") as f:
         return await context.bot.send_document(update.effective_chat.id, f)
 
 
+@traced()
 async def send_wait(update, context, text="🔍 Обробляю…"):
     """
     Надсилає службове повідомлення "завантаження" без Markdown,
@@ -248,6 +455,7 @@ async def send_wait(update, context, text="🔍 Обробляю…"):
         return None
 
 
+@traced()
 async def safe_delete(bot, chat_id, message_id):
     """
     Безпечно видаляє повідомлення. Ігнорує помилки, якщо його не існує.
@@ -259,3 +467,165 @@ async def safe_delete(bot, chat_id, message_id):
         await bot.delete_message(chat_id, message_id)
     except:
         pass
+
+
+# ---------------------------------------------
+# ІНДИКАЦІЯ ОЧІКУВАННЯ (typing / заглушка)
+# ---------------------------------------------
+
+PROGRESS_TYPING = "typing"
+PROGRESS_EDIT = "edit"
+PROGRESS_MESSAGE = "message"
+
+
+class Progress:
+    """
+    Показує користувачу, що відповідь готується, і надсилає саму відповідь.
+
+    Замість пари «заглушка + видалення» на кожен запит:
+        - typing  — статус «друкує…», повторюється кожні interval секунд;
+        - edit    — заглушка text, яка редагується у відповідь (без видалення);
+        - message — заглушка, яка видаляється перед відповіддю (старий спосіб).
+
+    Індикація з'являється лише через delay секунд: якщо відповідь готова
+    раніше (кеш, пул питань), зайвих викликів Bot API немає зовсім.
+
+    Використання:
+        async with progress(update, context, "resume", "🔍 Формую…") as p:
+            text = await chat_gpt.send_question(...)
+            await p.reply(text, buttons)
+
+    Якщо всередині блоку сталася помилка — заглушка видаляється.
+    """
+
+    def __init__(self, bot, chat_id: int, text: str = "🔍 Обробляю…", mode: str = PROGRESS_TYPING,
+                 delay: float = 0.5, interval: float = 4.5):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.text = text
+        self.mode = mode
+        self.delay = delay
+        self.interval = interval
+
+        self.message: Message | None = None
+        self.calls = 0
+        self._task: asyncio.Task | None = None
+        self._sending = False
+
+    async def __aenter__(self) -> "Progress":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await self._stop()
+        if self.message is not None:
+            await safe_delete(self.bot, self.chat_id, self.message.message_id)
+            self.calls += 1
+            self.message = None
+        return False
+
+    @traced("progress.reply")
+    async def reply(self, text: str, buttons: dict | None = None,
+                    parse_mode: str | None = ParseMode.MARKDOWN_V2) -> Message:
+        """Фінальна відповідь: редагує заглушку (режим edit) або надсилає нове повідомлення."""
+        await self._stop()
+
+        markup = None
+        if buttons:
+            keyboard = [[InlineKeyboardButton(v, callback_data=k)] for k, v in buttons.items()]
+            markup = InlineKeyboardMarkup(keyboard)
+
+        if self.message is not None and self.mode == PROGRESS_EDIT:
+            placeholder, self.message = self.message, None
+            try:
+                message = await self.bot.edit_message_text(
+                    text=text,
+                    chat_id=self.chat_id,
+                    message_id=placeholder.message_id,
+                    reply_markup=markup,
+                    parse_mode=parse_mode
+                )
+                self.calls += 1
+                return message
+            except BadRequest as e:
+                self.calls += 1
+                if "not modified" in str(e).lower():
+                    return placeholder
+                # Заглушку видалено або розмітку не прийнято — відповідь окремим повідомленням
+                logger.warning(f"Не вдалося відредагувати заглушку, надсилаю нове повідомлення: {e}")
+                self.message = placeholder
+
+        if self.message is not None:
+            await safe_delete(self.bot, self.chat_id, self.message.message_id)
+            self.calls += 1
+            self.message = None
+
+        return await self._send(text, markup, parse_mode)
+
+    async def _send(self, text: str, markup, parse_mode: str | None) -> Message:
+        """Нове повідомлення; якщо розмітку не прийнято — простим текстом."""
+        self.calls += 1
+        try:
+            return await self.bot.send_message(
+                chat_id=self.chat_id,
+                text=text,
+                reply_markup=markup,
+                parse_mode=parse_mode
+            )
+        except BadRequest as e:
+            if parse_mode is None:
+                raise
+            logger.warning(f"Розмітку відповіді не прийнято, надсилаю простий текст: {e}")
+
+        self.calls += 1
+        return await self.bot.send_message(
+            chat_id=self.chat_id,
+            text=text,
+            reply_markup=markup,
+            parse_mode=None
+        )
+
+    async def _run(self) -> None:
+        await asyncio.sleep(self.delay)
+
+        if self.mode != PROGRESS_TYPING:
+            # Заглушку не скасовуємо посеред надсилання, інакше вона залишиться в чаті
+            self._sending = True
+            try:
+                self.message = await self.bot.send_message(self.chat_id, self.text, parse_mode=None)
+                self.calls += 1
+            except Exception as e:
+                logger.warning(f"Не вдалося надіслати заглушку: {e}")
+            finally:
+                self._sending = False
+            return
+
+        while True:
+            try:
+                await self.bot.send_chat_action(self.chat_id, ChatAction.TYPING)
+                self.calls += 1
+            except Exception as e:
+                logger.debug(f"Не вдалося надіслати статус «друкує»: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _stop(self) -> None:
+        if self._task is None:
+            return
+        if not self._sending:
+            self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+def progress(update: Update, context: ContextTypes.DEFAULT_TYPE, feature: str,
+             text: str = "🔍 Обробляю…") -> Progress:
+    """Progress для функції бота з режимом із конфігурації (PROGRESS_MODES)."""
+    return Progress(
+        context.bot,
+        update.effective_chat.id,
+        text,
+        mode=config.PROGRESS_MODES.get(feature, config.PROGRESS_DEFAULT_MODE),
+        delay=config.PROGRESS_DELAY_MS / 1000,
+        interval=config.PROGRESS_TYPING_INTERVAL
+    )
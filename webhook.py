@@ -0,0 +1,174 @@
+"""
+webhook.py — режим webhook: Telegram сам надсилає оновлення боту.
+
+На відміну від long polling (один цикл getUpdates), оновлення
+приходять HTTP-запитами одразу після появи, а кілька реплік бота
+можуть стояти за балансувальником з однією адресою webhook.
+
+Сервер побудований на http_server.HttpServer (без tornado,
+який потрібен для вбудованого Application.run_webhook):
+    POST <path>   — оновлення від Telegram; перевіряється заголовок
+                    X-Telegram-Bot-Api-Secret-Token, оновлення кладеться
+                    в app.update_queue, відповідь — одразу 200;
+    GET /healthz  — перевірка живучості для балансувальника
+                    (503 під час зупинки, щоб трафік пішов на інші репліки).
+
+Зупинка (SIGINT/SIGTERM): спершу перестаємо приймати запити,
+потім Application.stop() обробляє все, що вже в черзі.
+
+Той самий сервер приймає оновлення від ingress у режимі кластера
+(див. ingress.py); dedupe > 0 відкидає повторні доставки за update_id.
+"""
+
+import asyncio
+import hmac
+import logging
+import signal
+from collections import deque
+
+from telegram import Update
+from telegram.ext import Application
+
+from http_server import HttpServer, Request, json_response, text_response
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookServer:
+    """
+    HTTP-ендпоінт для оновлень Telegram.
+
+    app — ініціалізований Application (оновлення йдуть у його update_queue),
+    path — шлях webhook, secret_token — секрет, який Telegram передає в заголовку
+    (порожній — без перевірки; лише для локальних тестів),
+    dedupe — скільки останніх update_id пам'ятати, щоб не обробляти повтори (0 — не перевіряти).
+    """
+
+    def __init__(self, app: Application, path: str = "/telegram", secret_token: str = "",
+                 host: str = "0.0.0.0", port: int = 8080, dedupe: int = 0):
+        self.app = app
+        self.path = path
+        self.secret_token = secret_token
+        self.server = HttpServer(self.handle, host=host, port=port)
+
+        self.dedupe = dedupe
+        self._recent_ids: deque[int] = deque()
+        self._recent_set: set[int] = set()
+
+        self.accepting = False
+        self.received = 0
+        self.rejected = 0
+        self.duplicates = 0
+
+    async def start(self) -> None:
+        await self.server.start()
+        self.accepting = True
+        logger.info(f"🌐 Webhook слухає {self.server.url}{self.path}")
+
+    async def stop(self) -> None:
+        self.accepting = False
+        await self.server.stop()
+
+    @property
+    def url(self) -> str:
+        return f"{self.server.url}{self.path}"
+
+    async def handle(self, request: Request):
+        if request.path == "/healthz":
+            status = 200 if self.accepting and self.app.running else 503
+            return json_response({
+                "status": "ok" if status == 200 else "stopping",
+                "pending_updates": self.app.update_queue.qsize(),
+                "received": self.received,
+                "duplicates": self.duplicates,
+            }, status=status)
+
+        if request.path != self.path:
+            return text_response("not found", status=404)
+
+        if request.method != "POST":
+            return text_response("method not allowed", status=405)
+
+        if not self.accepting:
+            return text_response("shutting down", status=503)
+
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret_token
+        ):
+            self.rejected += 1
+            return text_response("forbidden", status=403)
+
+        try:
+            update = Update.de_json(request.json(), self.app.bot)
+        except Exception as e:
+            logger.warning(f"Некоректне оновлення у webhook: {e}")
+            return text_response("bad request", status=400)
+
+        if self.dedupe and self._seen(update.update_id):
+            # Повторна доставка (ретрай ingress або Telegram) — вже в обробці
+            self.duplicates += 1
+            return text_response("ok")
+
+        self.received += 1
+        await self.app.update_queue.put(update)
+        return text_response("ok")
+
+    def _seen(self, update_id: int) -> bool:
+        """Запам'ятовує update_id; True — таке оновлення вже приймали."""
+        if update_id in self._recent_set:
+            return True
+        self._recent_ids.append(update_id)
+        self._recent_set.add(update_id)
+        if len(self._recent_ids) > self.dedupe:
+            self._recent_set.discard(self._recent_ids.popleft())
+        return False
+
+
+async def run_webhook(app: Application, server: WebhookServer, webhook_url: str | None = None,
+                      drop_pending_updates: bool = True, on_startup=None, on_shutdown=None) -> None:
+    """
+    Повний життєвий цикл бота в режимі webhook (аналог app.run_polling).
+
+    webhook_url — публічна адреса для setWebhook; None — не реєструвати
+    (наприклад, на додаткових репліках, коли webhook уже встановлено).
+    """
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: сигнали обробляються через KeyboardInterrupt
+            pass
+
+    await app.initialize()
+    try:
+        if on_startup is not None:
+            await on_startup(app)
+
+        await app.start()
+        await server.start()
+
+        if webhook_url:
+            await app.bot.set_webhook(
+                url=webhook_url,
+                secret_token=server.secret_token or None,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=drop_pending_updates
+            )
+            logger.info(f"✅ Webhook встановлено: {webhook_url}")
+
+        try:
+            await stop_event.wait()
+        except asyncio.CancelledError:
+            pass
+
+        logger.info("🛑 Зупинка webhook: дообробляємо чергу оновлень")
+        await server.stop()
+        await app.stop()
+    finally:
+        if on_shutdown is not None:
+            await on_shutdown(app)
+        await app.shutdown()